@@ -14,7 +14,11 @@
         Fonctionnalités :
         - Import automatique des fichiers CSV via tâche planifiée
         - Configuration du chemin des fichiers CSV dans la fiche société
-        - Archivage automatique des fichiers importés
+        - Archivage automatique des fichiers importés (gzip, zstd ou Parquet), avec rétention
+          et relecture d'une archive (replay_archive)
+        - Historique des imports : durée de chaque étape, volumes et débit par fichier
+        - Synthèses mensuelles (soldes par compte et journal, par axe et section),
+          recalculées à chaque import
     """,
     "author"   : "InfoSaône",
     "category" : "InfoSaône",
@@ -32,6 +36,8 @@
         'views/is_cegid_absencesalarie_views.xml',
         'views/is_cegid_analytiq_views.xml',
         'views/res_company_views.xml',
+        'views/is_cegid_import_run_views.xml',
+        'views/is_cegid_solde_views.xml',
         'views/is_cegid_menus.xml',
         'data/ir_cron_data.xml',
     ],
@@ -0,0 +1,15 @@
+# -*- coding: utf-8 -*-
+"""
+Mesures de performance de l'import Cegid (non chargé par Odoo au démarrage du module).
+
+Lancement depuis un shell Odoo, sur une base de test :
+
+    odoo shell -d base_de_test
+    >>> from odoo.addons.is_cegid2odoo.benchmark import runner
+    >>> runner.run(env, rows=(1000, 100000), output='/tmp/cegid_benchmark.json')
+
+La conversion des cellules est mesurée sur 1 million de cellules par table (paramètre convert_cells).
+
+Les imports sont exécutés dans un savepoint annulé à la fin de chaque mesure : les tables is.cegid.*
+de la base ne sont pas modifiées.
+"""
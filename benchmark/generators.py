@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+"""
+Génération de fichiers Cegid synthétiques, avec les colonnes des tables Cegid déclarées (IsCegidImport._get_cegid_tables).
+Les valeurs dépendent du type du champ Odoo cible et du nom de la colonne ; elles contiennent des
+caractères accentués pour vérifier la lecture en latin-1.
+"""
+
+import csv
+import uuid
+import random
+from datetime import datetime, timedelta
+
+# Formats de date des extractions Cegid (voir DATE_FORMATS dans is_cegid_import.py)
+DATE_FORMATS = {
+    'iso': '%Y-%m-%d %H:%M:%S',
+    'iso_date': '%Y-%m-%d',
+    'us': '%m/%d/%Y %H:%M:%S',
+    'eu': '%d/%m/%Y',
+}
+
+JOURNAUX = ['ACH', 'VTE', 'BQ1', 'BQ2', 'OD', 'PAI', 'AN']
+AXES = ['A1', 'A2', 'A3']
+LIBELLES = ['Facture fournisseur', 'Règlement client', 'Écriture de régularisation', 'Prime d\'été',
+            'Indemnité congés payés', 'Achat matières premières', 'Frais de déplacement']
+TYPES_CONGE = ['CPA', 'MAL', 'RTT', 'ABS', 'FOR']
+
+
+def _char_value(column, row, rng):
+    """
+    Valeur texte réaliste selon le nom de la colonne Cegid
+    """
+    if column == 'PCN_GUID':
+        return str(uuid.UUID(int=rng.getrandbits(128)))
+    if column.endswith('_JOURNAL'):
+        return JOURNAUX[row % len(JOURNAUX)]
+    if column.endswith('_GENERAL'):
+        return f"{rng.choice('12345678')}{rng.randint(0, 99999):05d}"
+    if column.endswith('_AXE'):
+        return AXES[row % len(AXES)]
+    if column.endswith('_SECTION'):
+        return f"S{rng.randint(1, 400):04d}"
+    if column.endswith('_LIBELLE'):
+        return f"{rng.choice(LIBELLES)} n°{row}"
+    if column.endswith('_SALARIE'):
+        return f"{row // 50:08d}"
+    if column == 'PHC_CUMULPAIE':
+        return f"{row % 50:02d}"
+    if column in ('E_REFINTERNE', 'Y_REFINTERNE'):
+        return str(100000 + row)
+    if column == 'PCN_TYPECONGE':
+        return TYPES_CONGE[row % len(TYPES_CONGE)]
+    if column.endswith(('DJ', '_SENSABS', '_TYPEMVT', '_TYPEIMPUTE', '_MVTDUPLIQUE')):
+        return rng.choice(['MAT', 'PAM', '-', '+', 'X', ''])
+    return f"{column[:3]}{rng.randint(0, 9999):04d}"
+
+
+def make_value_factory(column, field_type, date_format, rng, base_date=datetime(2024, 1, 1)):
+    """
+    Fonction row -> valeur CSV (texte) d'une colonne, selon le type du champ Odoo cible
+    """
+    if field_type in ('date', 'datetime'):
+        return lambda row: (base_date + timedelta(days=rng.randint(0, 730))).strftime(date_format)
+    if field_type == 'float':
+        return lambda row: f"{rng.uniform(-5000, 50000):.2f}" if rng.random() > 0.1 else ''
+    if field_type == 'integer':
+        return lambda row: str(row) if column.endswith('REFINTERNE') else str(rng.randint(0, 500))
+    return lambda row: _char_value(column, row, rng)
+
+
+def write_extract(path, mapping_info, model_obj, rows, encoding='utf-8-sig', delimiter=';',
+                  date_format=DATE_FORMATS['iso'], seed=0):
+    """
+    Écrit un fichier CSV synthétique pour une table Cegid
+    :param mapping_info: définition de table de IsCegidImport._get_cegid_tables (colonnes CSV => champs Odoo)
+    :param model_obj: modèle Odoo cible (types des champs)
+    Retourne la liste des colonnes écrites
+    """
+    rng = random.Random(seed)
+    columns = sorted(mapping_info['fields'])
+    factories = []
+    for column in columns:
+        field = model_obj._fields.get(mapping_info['fields'][column])
+        factories.append(make_value_factory(column, field.type if field else 'char', date_format, rng))
+    with open(path, 'w', encoding=encoding, newline='', errors='replace') as f:
+        writer = csv.writer(f, delimiter=delimiter)
+        writer.writerow(columns)
+        for row in range(rows):
+            writer.writerow([factory(row) for factory in factories])
+    return columns
+
+
+def sample_cells(mapping_info, model_obj, rows, date_format=DATE_FORMATS['iso'], seed=0):
+    """
+    Cellules synthétiques en mémoire, par colonne : liste de tuples (colonne CSV, champ Odoo, type, valeurs)
+    """
+    rng = random.Random(seed)
+    samples = []
+    for column in sorted(mapping_info['fields']):
+        odoo_field = mapping_info['fields'][column]
+        field = model_obj._fields.get(odoo_field)
+        field_type = field.type if field else 'char'
+        factory = make_value_factory(column, field_type, date_format, rng)
+        samples.append((column, odoo_field, field_type, [factory(row) for row in range(rows)]))
+    return samples
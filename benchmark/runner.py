@@ -0,0 +1,217 @@
+# -*- coding: utf-8 -*-
+"""
+Mesures de performance de l'import Cegid, résultats écrits dans un fichier JSON :
+- détection du modèle à partir des colonnes (_detect_model_from_columns) ;
+- conversion des cellules : _convert_value (référence) et convertisseurs compilés (_compile_converter) ;
+- import complet d'un fichier synthétique (_import_csv_file), annulé à la fin de chaque mesure.
+Deux fichiers de résultats peuvent être comparés avec compare().
+"""
+
+import os
+import json
+import time
+import shutil
+import logging
+import platform
+import tempfile
+from datetime import datetime
+
+from odoo import release
+
+from ..models.is_cegid_import import _compile_converter
+from . import generators
+
+_logger = logging.getLogger(__name__)
+
+
+class _Rollback(Exception):
+    """Annule le savepoint d'une mesure d'import"""
+
+
+def _best_of(repeat, func):
+    """
+    Meilleure durée (s) de plusieurs exécutions de func
+    """
+    durations = []
+    for i in range(repeat):
+        start = time.perf_counter()
+        func()
+        durations.append(time.perf_counter() - start)
+    return min(durations)
+
+
+def bench_detect(importer, repeat=3, calls=10000):
+    """
+    Durée moyenne (µs) de _detect_model_from_columns pour l'en-tête complet de chaque table Cegid
+    """
+    results = []
+    for mapping_info in importer._get_cegid_tables():
+        columns = sorted(mapping_info['fields'])
+
+        def detect():
+            for i in range(calls):
+                importer._detect_model_from_columns(columns)
+
+        duration = _best_of(repeat, detect)
+        results.append({
+            'bench': 'detect',
+            'model': mapping_info['model'],
+            'calls': calls,
+            'us_per_call': duration / calls * 1e6,
+        })
+    return results
+
+
+def bench_convert(importer, cells=1000000, date_formats=('iso',), repeat=3):
+    """
+    Débit de conversion des cellules (cellules / s) : _convert_value et convertisseurs compilés
+    :param cells: nombre de cellules converties par table (environ : nombre entier de lignes)
+    """
+    results = []
+    for mapping_info in importer._get_cegid_tables():
+        model_obj = importer.env[mapping_info['model']]
+        rows = max(1, cells // len(mapping_info['fields']))
+        for date_format in date_formats:
+            samples = generators.sample_cells(mapping_info, model_obj, rows, generators.DATE_FORMATS[date_format])
+            cells = rows * len(samples)
+
+            def reference():
+                for column, odoo_field, field_type, values in samples:
+                    for value in values:
+                        importer._convert_value(value, odoo_field, model_obj)
+
+            def compiled():
+                for column, odoo_field, field_type, values in samples:
+                    convert = _compile_converter(field_type)
+                    for value in values:
+                        convert(value)
+
+            reference_time = _best_of(repeat, reference)
+            compiled_time = _best_of(repeat, compiled)
+            results.append({
+                'bench': 'convert',
+                'model': mapping_info['model'],
+                'date_format': date_format,
+                'cells': cells,
+                'convert_value_cells_per_s': cells / reference_time if reference_time else 0.0,
+                'compiled_cells_per_s': cells / compiled_time if compiled_time else 0.0,
+                'speedup': reference_time / compiled_time if compiled_time else 0.0,
+            })
+    return results
+
+
+def bench_import(importer, rows=(1000,), encodings=('utf-8-sig',), delimiters=(';',), date_formats=('iso',),
+                 models=None):
+    """
+    Import complet de fichiers synthétiques (_import_csv_file) pour chaque combinaison de paramètres.
+    Chaque import est exécuté dans un savepoint annulé : la base n'est pas modifiée.
+    """
+    results = []
+    tmp_dir = tempfile.mkdtemp(prefix='cegid_bench_')
+    try:
+        for mapping_info in importer._get_cegid_tables():
+            if models and mapping_info['model'] not in models:
+                continue
+            model_obj = importer.env[mapping_info['model']]
+            for row_count in rows:
+                for encoding in encodings:
+                    for delimiter in delimiters:
+                        for date_format in date_formats:
+                            path = os.path.join(tmp_dir, f"{model_obj._table}.csv")
+                            generators.write_extract(path, mapping_info, model_obj, row_count, encoding, delimiter,
+                                                     generators.DATE_FORMATS[date_format])
+                            size = os.path.getsize(path)
+                            result = {}
+                            start = time.perf_counter()
+                            try:
+                                with importer.env.cr.savepoint():
+                                    try:
+                                        result = importer._import_csv_file(path)
+                                    except Exception as e:
+                                        result = {'success': False, 'error': str(e)}
+                                    duration = time.perf_counter() - start
+                                    raise _Rollback()
+                            except _Rollback:
+                                pass
+                            model_obj.invalidate_model()
+                            _logger.info(f"Benchmark import {mapping_info['model']} {row_count} lignes "
+                                         f"{encoding} '{delimiter}' {date_format}: {duration:.2f} s")
+                            results.append({
+                                'bench': 'import',
+                                'model': mapping_info['model'],
+                                'rows': row_count,
+                                'bytes': size,
+                                'encoding': encoding,
+                                'delimiter': delimiter,
+                                'date_format': date_format,
+                                'import_mode': result.get('mode'),
+                                'success': result.get('success', False),
+                                'error': result.get('error') or None,
+                                'seconds': duration,
+                                'rows_per_s': row_count / duration if duration else 0.0,
+                                'mb_per_s': size / (1024 * 1024) / duration if duration else 0.0,
+                                'timings': result.get('timings', {}),
+                            })
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    return results
+
+
+def run(env, rows=(1000, 100000), encodings=('utf-8-sig', 'latin-1'), delimiters=(';', ','),
+        date_formats=('iso', 'us'), models=None, repeat=3, output='cegid_benchmark.json', convert_cells=1000000):
+    """
+    Lance toutes les mesures et écrit les résultats dans le fichier JSON 'output'
+    :param models: noms des modèles à importer (par défaut, ceux de toutes les tables Cegid)
+    :param convert_cells: nombre de cellules par table de la mesure de conversion
+    Retourne le dict des résultats
+    """
+    importer = env['is.cegid.import']
+    start = time.perf_counter()
+    results = []
+    results += bench_detect(importer, repeat=repeat)
+    results += bench_convert(importer, convert_cells, date_formats, repeat)
+    results += bench_import(importer, rows, encodings, delimiters, date_formats, models)
+    report = {
+        'date': datetime.now().isoformat(timespec='seconds'),
+        'database': env.cr.dbname,
+        'odoo': release.version,
+        'python': platform.python_version(),
+        'machine': platform.node(),
+        'cpu_count': os.cpu_count(),
+        'duration': time.perf_counter() - start,
+        'results': results,
+    }
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    _logger.info(f"Benchmark Cegid terminé: {len(results)} mesures écrites dans {output}")
+    return report
+
+
+def _result_key(result):
+    return tuple((k, result.get(k)) for k in ('bench', 'model', 'rows', 'encoding', 'delimiter', 'date_format'))
+
+
+def compare(reference_path, current_path, tolerance=0.10):
+    """
+    Compare deux fichiers de résultats : retourne la liste des mesures ralenties de plus de 'tolerance'
+    (10 % par défaut), sous forme de tuples (mesure, valeur de référence, valeur actuelle)
+    """
+    metrics = {'detect': ('us_per_call', False), 'convert': ('compiled_cells_per_s', True),
+               'import': ('rows_per_s', True)}
+    with open(reference_path, encoding='utf-8') as f:
+        reference = {_result_key(r): r for r in json.load(f)['results']}
+    with open(current_path, encoding='utf-8') as f:
+        current = json.load(f)['results']
+    regressions = []
+    for result in current:
+        previous = reference.get(_result_key(result))
+        if not previous:
+            continue
+        metric, higher_is_better = metrics[result['bench']]
+        before, after = previous.get(metric) or 0.0, result.get(metric) or 0.0
+        if not before or not after:
+            continue
+        slower = before / after - 1 if higher_is_better else after / before - 1
+        if slower > tolerance:
+            regressions.append((dict(_result_key(result)), before, after))
+    return regressions
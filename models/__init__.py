@@ -4,5 +4,7 @@ from . import is_cegid_histocumsal
 from . import is_cegid_ecriture
 from . import is_cegid_absencesalarie
 from . import is_cegid_analytiq
+from . import is_cegid_solde
 from . import res_company
 from . import is_cegid_import
+from . import is_cegid_import_run
@@ -0,0 +1,196 @@
+# -*- coding: utf-8 -*-
+
+import io
+import os
+import re
+import gzip
+import shutil
+import logging
+from datetime import datetime
+
+_logger = logging.getLogger(__name__)
+
+# Formats d'archivage des fichiers importés (paramètre système 'is_cegid2odoo.archive_format')
+# 'csv' : fichier d'origine, non compressé ; 'gzip' : CSV compressé (bibliothèque standard) ;
+# 'zstd' : CSV compressé zstd (paquet zstandard) ; 'parquet' : colonnes typées (paquet pyarrow)
+ARCHIVE_EXTENSIONS = {
+    'csv': '',
+    'gzip': '.gz',
+    'zstd': '.zst',
+    'parquet': '.parquet',
+}
+
+# Préfixe horodaté ajouté au nom des fichiers archivés (YYYYMMDD_HHMMSS_)
+ARCHIVE_PREFIX = re.compile(r'^(\d{8}_\d{6})_')
+
+# Type Arrow des colonnes Parquet selon le type du champ Odoo (texte par défaut)
+PARQUET_TYPES = {
+    'integer': 'int64',
+    'float': 'float64',
+    'monetary': 'float64',
+    'boolean': 'bool_',
+    'date': 'timestamp',
+    'datetime': 'timestamp',
+}
+
+
+def resolve_archive_format(archive_format):
+    """
+    Retourne le format d'archivage utilisable : zstd et parquet se replient sur gzip
+    si le paquet Python nécessaire n'est pas installé
+    """
+    if archive_format not in ARCHIVE_EXTENSIONS:
+        _logger.warning(f"     Format d'archivage inconnu: {archive_format}, utilisation de gzip")
+        return 'gzip'
+    try:
+        if archive_format == 'zstd':
+            import zstandard  # noqa: F401
+        elif archive_format == 'parquet':
+            import pyarrow.parquet  # noqa: F401
+    except ImportError:
+        _logger.warning(f"     Format d'archivage {archive_format} indisponible (paquet absent), utilisation de gzip")
+        return 'gzip'
+    return archive_format
+
+
+def archive_path(dest_path, archive_format):
+    """
+    Chemin de l'archive d'un fichier CSV : nom.csv.gz, nom.csv.zst ou nom.parquet
+    """
+    if archive_format == 'parquet':
+        return os.path.splitext(dest_path)[0] + '.parquet'
+    return dest_path + ARCHIVE_EXTENSIONS[archive_format]
+
+
+def original_name(archive_name):
+    """
+    Nom du fichier CSV d'origine d'une archive (sans horodatage ni extension de compression)
+    """
+    name = ARCHIVE_PREFIX.sub('', os.path.basename(archive_name))
+    for extension in ('.gz', '.zst'):
+        if name.endswith(extension):
+            return name[:-len(extension)]
+    if name.endswith('.parquet'):
+        return name[:-len('.parquet')] + '.csv'
+    return name
+
+
+def archive_date(path):
+    """
+    Date d'archivage d'un fichier : horodatage du nom, ou à défaut date de modification
+    """
+    match = ARCHIVE_PREFIX.match(os.path.basename(path))
+    if match:
+        try:
+            return datetime.strptime(match.group(1), '%Y%m%d_%H%M%S')
+        except ValueError:
+            pass
+    return datetime.fromtimestamp(os.path.getmtime(path))
+
+
+def _write_atomic(dest_path, write):
+    """
+    Écrit un fichier via un .part synchronisé sur disque puis renommé
+    """
+    temp_path = dest_path + '.part'
+    try:
+        with open(temp_path, 'wb') as raw:
+            write(raw)
+            raw.flush()
+            os.fsync(raw.fileno())
+        os.replace(temp_path, dest_path)
+    except Exception:
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+        raise
+    return dest_path
+
+
+def compress_file(src_path, dest_path, archive_format):
+    """
+    Compresse un fichier CSV en flux (gzip ou zstd), sans le charger en mémoire
+    Retourne le chemin de l'archive
+    """
+    def write(raw):
+        with open(src_path, 'rb') as src:
+            if archive_format == 'zstd':
+                import zstandard
+                zstandard.ZstdCompressor(level=10).copy_stream(src, raw)
+            else:
+                with gzip.GzipFile(filename=os.path.basename(src_path), mode='wb', fileobj=raw) as out:
+                    shutil.copyfileobj(src, out, 1024 * 1024)
+
+    return _write_atomic(archive_path(dest_path, archive_format), write)
+
+
+def write_parquet(dest_path, records, field_types, metadata, batch_size=50000):
+    """
+    Écrit des enregistrements (dicts champ Odoo => valeur convertie) dans un fichier Parquet typé,
+    par lots, avec les métadonnées indiquées (modèle, fichier d'origine...)
+    :param field_types: liste de tuples (champ Odoo, type du champ), dans l'ordre des colonnes
+    Retourne le chemin de l'archive
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    def arrow_type(field_type):
+        type_name = PARQUET_TYPES.get(field_type)
+        if type_name == 'timestamp':
+            return pa.timestamp('s')
+        return getattr(pa, type_name)() if type_name else pa.string()
+
+    schema = pa.schema(
+        [(name, arrow_type(field_type)) for name, field_type in field_types],
+        metadata={key: str(value) for key, value in metadata.items()},
+    )
+
+    def write(raw):
+        writer = pq.ParquetWriter(raw, schema, compression='zstd')
+        try:
+            batch = []
+            for record in records:
+                batch.append(record)
+                if len(batch) >= batch_size:
+                    writer.write_table(pa.Table.from_pylist(batch, schema=schema))
+                    batch = []
+            if batch:
+                writer.write_table(pa.Table.from_pylist(batch, schema=schema))
+        finally:
+            writer.close()
+
+    return _write_atomic(archive_path(dest_path, 'parquet'), write)
+
+
+def read_parquet_metadata(path):
+    """
+    Métadonnées (dict texte) et noms des colonnes d'une archive Parquet
+    """
+    import pyarrow.parquet as pq
+    schema = pq.read_schema(path)
+    metadata = {key.decode(): value.decode() for key, value in (schema.metadata or {}).items()
+                if not key.startswith(b'ARROW:')}
+    return metadata, schema.names
+
+
+def iter_parquet_records(path, batch_size=50000):
+    """
+    Relit les enregistrements d'une archive Parquet par lots ; les valeurs vides ne sont pas restituées,
+    comme pour la lecture d'un CSV
+    """
+    import pyarrow.parquet as pq
+    parquet_file = pq.ParquetFile(path)
+    for batch in parquet_file.iter_batches(batch_size=batch_size):
+        for record in batch.to_pylist():
+            yield {key: value for key, value in record.items() if value is not None}
+
+
+def open_archive(path):
+    """
+    Flux binaire décompressé d'un CSV archivé (.gz, .zst ou non compressé)
+    """
+    if path.endswith('.gz'):
+        return gzip.open(path, 'rb')
+    if path.endswith('.zst'):
+        import zstandard
+        return io.BufferedReader(zstandard.ZstdDecompressor().stream_reader(open(path, 'rb')))
+    return open(path, 'rb')
@@ -0,0 +1,218 @@
+# -*- coding: utf-8 -*-
+
+import re
+import logging
+from datetime import date, datetime
+
+_logger = logging.getLogger(__name__)
+
+# Découpage des tables partitionnées (paramètre 'partition' d'une table Cegid, voir IsCegidImport._get_cegid_tables)
+# 'year' : une partition par année civile ; 'month' : une partition par mois
+PARTITION_GRANULARITIES = ('year', 'month')
+
+# Bornes d'une partition : FOR VALUES FROM ('2024-01-01 00:00:00') TO ('2025-01-01 00:00:00')
+PARTITION_BOUND = re.compile(r"FROM \('([^']+)'\) TO \('([^']+)'\)")
+
+
+def period_start(value, granularity):
+    """
+    Premier jour de l'année ou du mois contenant la date 'value'
+    """
+    if granularity == 'year':
+        return date(value.year, 1, 1)
+    return date(value.year, value.month, 1)
+
+
+def next_period(start, granularity, count=1):
+    """
+    Début de la période située 'count' périodes après 'start'
+    """
+    if granularity == 'year':
+        return date(start.year + count, 1, 1)
+    month = start.month - 1 + count
+    return date(start.year + month // 12, month % 12 + 1, 1)
+
+
+def partition_name(table, start, granularity):
+    """
+    Nom de la partition d'une période : <table>_p2024 ou <table>_p202401
+    """
+    return f"{table}_p{start.strftime('%Y' if granularity == 'year' else '%Y%m')}"
+
+
+def is_partitioned(cr, table):
+    """
+    Indique si la table est une table partitionnée (PostgreSQL >= 10)
+    """
+    cr.execute("SELECT relkind FROM pg_class WHERE oid = to_regclass(%s)", (table,))
+    row = cr.fetchone()
+    return bool(row) and row[0] == 'p'
+
+
+def list_partitions(cr, table):
+    """
+    Partitions d'une table : liste de tuples (nom, début, fin), triée par période.
+    La partition par défaut (dates vides ou hors des partitions) a un début et une fin à None.
+    """
+    cr.execute("""
+        SELECT c.relname, pg_get_expr(c.relpartbound, c.oid)
+          FROM pg_inherits i
+          JOIN pg_class c ON c.oid = i.inhrelid
+         WHERE i.inhparent = %s::regclass
+    """, (table,))
+    partitions = []
+    for name, bound in cr.fetchall():
+        match = PARTITION_BOUND.search(bound or '')
+        if match:
+            start, end = (datetime.fromisoformat(value).date() for value in match.groups())
+            partitions.append((name, start, end))
+        else:
+            partitions.append((name, None, None))
+    return sorted(partitions, key=lambda p: (p[1] is None, p[1] or date.min))
+
+
+def create_partition(cr, table, column, start, granularity):
+    """
+    Crée la partition de la période commençant à 'start', si elle n'existe pas.
+    Les lignes de cette période déjà rangées dans la partition par défaut y sont déplacées
+    (PostgreSQL refuse sinon la création de la partition).
+    Retourne le nom de la partition créée, ou None si elle existait déjà
+    """
+    end = next_period(start, granularity)
+    if any(p_start == start for name, p_start, p_end in list_partitions(cr, table)):
+        return None
+    name = partition_name(table, start, granularity)
+    default = f"{table}_pdefault"
+    cr.execute(f"SELECT 1 FROM {default} WHERE {column} >= %s AND {column} < %s LIMIT 1", (start, end))
+    if cr.fetchone():
+        cr.execute(f"ALTER TABLE {table} DETACH PARTITION {default}")
+        cr.execute(f"CREATE TABLE {name} PARTITION OF {table} FOR VALUES FROM (%s) TO (%s)", (start, end))
+        cr.execute(f"""
+            WITH moved AS (DELETE FROM {default} WHERE {column} >= %s AND {column} < %s RETURNING *)
+            INSERT INTO {name} SELECT * FROM moved
+        """, (start, end))
+        _logger.info(f"     {cr.rowcount} lignes déplacées de {default} vers {name}")
+        cr.execute(f"ALTER TABLE {table} ATTACH PARTITION {default} DEFAULT")
+    else:
+        cr.execute(f"CREATE TABLE {name} PARTITION OF {table} FOR VALUES FROM (%s) TO (%s)", (start, end))
+    _logger.info(f"     Partition {name} créée ({start} - {end})")
+    return name
+
+
+def first_period(cr, table, column, granularity, until, since=None):
+    """
+    Première période à partitionner : celle de la plus ancienne date de la table, sans remonter avant 'since'.
+    Une date aberrante (1900-01-01...) créerait sinon des centaines de partitions vides : les lignes
+    antérieures à 'since' restent dans la partition par défaut.
+    """
+    cr.execute(f"SELECT MIN({column}) FROM {table}")
+    first = cr.fetchone()[0]
+    first = first.date() if isinstance(first, datetime) else first
+    start = period_start(min(first or until, until), granularity)
+    if since and start < period_start(since, granularity):
+        cr.execute(f"SELECT COUNT(*) FROM {table} WHERE {column} < %s", (since,))
+        _logger.warning(f"     {table}: {cr.fetchone()[0]} lignes antérieures au {since} (plus ancienne : {first}) "
+                        f"laissées dans la partition par défaut")
+        start = period_start(since, granularity)
+    return start
+
+
+def ensure_id_key(cr, table, column):
+    """
+    Unicité des id d'une table partitionnée : PostgreSQL exige que la clé primaire contienne la colonne de
+    partitionnement, la clé primaire devient donc (id, column) si la colonne est obligatoire (NOT NULL).
+    Sinon, contrainte UNIQUE (id, column) et index unique sur id dans la partition par défaut, qui reçoit
+    toutes les lignes sans date. Remplace l'index simple sur id des tables partitionnées par une version
+    précédente. Retourne True si la contrainte a été créée
+    """
+    cr.execute("""
+        SELECT 1 FROM pg_constraint WHERE conrelid = %s::regclass AND conname IN (%s, %s)
+    """, (table, f"{table}_pkey", f"{table}_id_{column}_key"))
+    if cr.fetchone():
+        return False
+    cr.execute("SELECT attnotnull FROM pg_attribute WHERE attrelid = %s::regclass AND attname = %s", (table, column))
+    if cr.fetchone()[0]:
+        cr.execute(f"ALTER TABLE {table} ADD CONSTRAINT {table}_pkey PRIMARY KEY (id, {column})")
+    else:
+        cr.execute(f"ALTER TABLE {table} ADD CONSTRAINT {table}_id_{column}_key UNIQUE (id, {column})")
+        cr.execute(f"CREATE UNIQUE INDEX IF NOT EXISTS {table}_pdefault_id_key ON {table}_pdefault (id)")
+    cr.execute(f"DROP INDEX IF EXISTS {table}_id_index")
+    return True
+
+
+def ensure_partitions(cr, table, column, granularity, until, since=None):
+    """
+    Crée les partitions manquantes, de la plus ancienne date de la table (au plus tôt 'since')
+    jusqu'à la période contenant 'until'
+    Retourne la liste des partitions créées
+    """
+    start = first_period(cr, table, column, granularity, until, since)
+    last = period_start(until, granularity)
+    created = []
+    while start <= last:
+        name = create_partition(cr, table, column, start, granularity)
+        if name:
+            created.append(name)
+        start = next_period(start, granularity)
+    return created
+
+
+def convert_to_partitioned(cr, table, column, granularity, until, since=None):
+    """
+    Transforme une table Odoo en table partitionnée par plage de dates sur 'column' :
+    la table est renommée, recréée partitionnée (colonnes, valeurs par défaut, contraintes CHECK et
+    clés étrangères, index), les partitions sont créées (au plus tôt depuis 'since') puis les données recopiées.
+    La clé primaire sur id devient (id, column) (voir ensure_id_key) ; les id restent fournis par la séquence.
+    Les index uniques ne contenant pas 'column' ne peuvent pas être recréés : ils sont ignorés.
+    À exécuter dans une transaction : la table est verrouillée jusqu'au commit.
+    """
+    old = f"{table}_cegid_unpartitioned"
+    cr.execute(f"LOCK TABLE {table} IN ACCESS EXCLUSIVE MODE")
+    cr.execute("""
+        SELECT conname, pg_get_constraintdef(oid)
+          FROM pg_constraint
+         WHERE conrelid = %s::regclass AND contype = 'f'
+         ORDER BY conname
+    """, (table,))
+    foreign_keys = cr.fetchall()
+    cr.execute("""
+        SELECT c.relname, pg_get_indexdef(i.indexrelid)
+          FROM pg_index i
+          JOIN pg_class c ON c.oid = i.indexrelid
+         WHERE i.indrelid = %s::regclass
+           AND NOT EXISTS (SELECT 1 FROM pg_constraint con WHERE con.conindid = i.indexrelid)
+         ORDER BY c.relname
+    """, (table,))
+    indexes = cr.fetchall()
+    cr.execute("SELECT pg_get_serial_sequence(%s, 'id')", (table,))
+    sequence = cr.fetchone()[0]
+
+    cr.execute(f"ALTER TABLE {table} RENAME TO {old}")
+    cr.execute(f"""
+        CREATE TABLE {table} (LIKE {old} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)
+        PARTITION BY RANGE ({column})
+    """)
+    cr.execute(f"CREATE TABLE {table}_pdefault PARTITION OF {table} DEFAULT")
+    if sequence:
+        # La séquence des id appartient à l'ancienne table : elle serait supprimée avec elle
+        cr.execute(f"ALTER SEQUENCE {sequence} OWNED BY {table}.id")
+    start = first_period(cr, old, column, granularity, until, since)
+    while start <= period_start(until, granularity):
+        create_partition(cr, table, column, start, granularity)
+        start = next_period(start, granularity)
+    cr.execute(f"INSERT INTO {table} SELECT * FROM {old}")
+    copied = cr.rowcount
+    cr.execute(f"DROP TABLE {old}")
+
+    ensure_id_key(cr, table, column)
+    for conname, condef in foreign_keys:
+        cr.execute(f'ALTER TABLE {table} ADD CONSTRAINT "{conname}" {condef}')
+    for indexname, indexdef in indexes:
+        try:
+            with cr.savepoint():
+                cr.execute(indexdef.replace(' ON ONLY ', ' ON ', 1))
+        except Exception as e:
+            _logger.warning(f"     Index {indexname} non recréé sur la table partitionnée {table}: {str(e)}")
+    cr.execute(f"ANALYZE {table}")
+    _logger.info(f"     Table {table} partitionnée par {granularity} sur {column} ({copied} lignes recopiées)")
+    return copied
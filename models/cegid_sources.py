@@ -0,0 +1,280 @@
+# -*- coding: utf-8 -*-
+
+import io
+import os
+import logging
+import tempfile
+import threading
+from datetime import datetime
+
+from .cegid_archive import open_archive, original_name
+
+_logger = logging.getLogger(__name__)
+
+
+class CegidImportSource(object):
+    """
+    Source d'un fichier CSV Cegid à importer : dossier local, blob Azure ou flux quelconque.
+    L'import lit la source en flux (open) ; l'archivage (archive) dépend du type de source.
+    """
+
+    def __init__(self, name, size=None):
+        self.name = name
+        self.size = size
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} {self.name}>"
+
+    @property
+    def version(self):
+        """
+        Version de la source (etag d'un blob, date de modification d'un fichier) : une source déjà traitée
+        pendant une exécution n'est pas réimportée tant que sa version n'a pas changé
+        """
+        return None
+
+    def read_sample(self, size=65536):
+        """
+        Retourne les premiers octets de la source (détection de l'encodage, du délimiteur et des colonnes)
+        """
+        with self.open() as f:
+            return f.read(size)
+
+    def open(self):
+        """
+        Retourne un flux binaire positionné au début de la source
+        """
+        raise NotImplementedError()
+
+    def archive(self, importer, folder_name):
+        """
+        Archive la source après import : folder_name vaut 'archive' (succès) ou 'anomalie' (échec)
+        """
+        raise NotImplementedError()
+
+
+class LocalFileSource(CegidImportSource):
+    """
+    Fichier CSV déposé dans le dossier de la société (transfert-azure-cegid.py)
+    """
+
+    def __init__(self, filepath):
+        super().__init__(os.path.basename(filepath), os.path.getsize(filepath))
+        self.filepath = filepath
+        self.mtime = os.path.getmtime(filepath)
+
+    @property
+    def version(self):
+        return self.mtime
+
+    def open(self):
+        return open(self.filepath, 'rb')
+
+    def archive(self, importer, folder_name):
+        return importer._move_file_to_folder(self.filepath, folder_name)
+
+
+class StreamSource(CegidImportSource):
+    """
+    Flux binaire quelconque (fichier ouvert, réponse HTTP, ...).
+    Un flux non repositionnable ne peut être lu qu'une fois : pas de nouvel essai en latin-1
+    ni de repli sur l'ORM après un échec du chargement par COPY.
+    """
+
+    def __init__(self, fileobj, name, size=None):
+        super().__init__(name, size)
+        self.fileobj = fileobj
+        self._sample = None
+        self._consumed = False
+
+    def read_sample(self, size=65536):
+        if self.fileobj.seekable():
+            return super().read_sample(size)
+        if self._sample is None:
+            self._sample = self.fileobj.read(size)
+        return self._sample
+
+    def open(self):
+        if self.fileobj.seekable():
+            self.fileobj.seek(0)
+            return io.BufferedReader(_PrefixedStream(self.fileobj))
+        if self._consumed:
+            raise IOError(f"Le flux {self.name} a déjà été lu et ne peut pas être relu")
+        self._consumed = True
+        return io.BufferedReader(_PrefixedStream(self.fileobj, prefix=self._sample or b''))
+
+    def archive(self, importer, folder_name):
+        _logger.info(f"     Flux {self.name}: pas d'archivage ({folder_name})")
+        return None
+
+
+class ArchiveSource(CegidImportSource):
+    """
+    Fichier CSV archivé (compressé ou non), relu pour rejouer un import.
+    Le nom de la source est celui du fichier d'origine ; l'archive n'est ni déplacée ni supprimée.
+    """
+
+    def __init__(self, filepath):
+        super().__init__(original_name(filepath), os.path.getsize(filepath))
+        self.filepath = filepath
+
+    def open(self):
+        return open_archive(self.filepath)
+
+    def archive(self, importer, folder_name):
+        _logger.info(f"     Archive {os.path.basename(self.filepath)} conservée ({folder_name})")
+        return self.filepath
+
+
+class BlobSource(CegidImportSource):
+    """
+    Blob d'un conteneur Azure lu directement depuis le réseau.
+    Pendant la lecture, les octets téléchargés sont recopiés dans un fichier local (spool) : après l'import,
+    ce fichier devient la copie d'archive (ou d'anomalie) sans second téléchargement, puis le blob est
+    supprimé du conteneur. Seule la conversion au format d'archivage est faite dans un thread séparé :
+    elle ne retarde pas l'import des fichiers suivants.
+    """
+
+    def __init__(self, container_client, blob, archive_dir):
+        super().__init__(os.path.basename(blob.name), blob.size)
+        self.container_client = container_client
+        self.blob_name = blob.name
+        self.etag = blob.etag
+        self.archive_dir = archive_dir
+        self.archive_thread = None
+        self.archive_writer = None
+        self.spool_path = None
+
+    @property
+    def version(self):
+        return self.etag
+
+    def _blob_client(self):
+        return self.container_client.get_blob_client(self.blob_name)
+
+    def read_sample(self, size=65536):
+        if not self.size:
+            # Une lecture par plage d'un blob vide est refusée par Azure (HTTP 416)
+            return b''
+        return self._blob_client().download_blob(offset=0, length=min(size, self.size)).readall()
+
+    def open(self):
+        # Chaque lecture (nouvel essai en latin-1...) repart du début : le spool est réécrit
+        self._discard_spool()
+        fd, self.spool_path = tempfile.mkstemp(prefix='.cegid-', suffix='.part', dir=self.archive_dir)
+        spool = os.fdopen(fd, 'wb')
+        return io.BufferedReader(_ChunkStream(self._blob_client().download_blob().chunks(), spool=spool))
+
+    def _discard_spool(self):
+        if self.spool_path and os.path.exists(self.spool_path):
+            os.unlink(self.spool_path)
+        self.spool_path = None
+
+    def archive(self, importer, folder_name):
+        """
+        Range la copie locale du blob dans le dossier d'archive (ou d'anomalie), puis supprime le blob
+        du conteneur : un blob archivé n'est plus listé par les vérifications suivantes.
+        La copie est celle lue par l'import si elle est complète, sinon le blob est téléchargé.
+        """
+        # Conversion au format d'archivage préparée ici : elle a besoin de l'environnement Odoo
+        archive_writer = importer._get_archive_writer(self) if folder_name == 'archive' else None
+        dest_dir = os.path.join(self.archive_dir, folder_name)
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        dest_path = os.path.join(dest_dir, f"{timestamp}_{self.name}")
+        os.makedirs(dest_dir, exist_ok=True)
+        if self.spool_path and os.path.exists(self.spool_path) and os.path.getsize(self.spool_path) == self.size:
+            os.replace(self.spool_path, dest_path)
+            self.spool_path = None
+        else:
+            self._discard_spool()
+            temp_path = dest_path + '.part'
+            with open(temp_path, 'wb') as f:
+                for chunk in self._blob_client().download_blob().chunks():
+                    f.write(chunk)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_path, dest_path)
+        self._blob_client().delete_blob()
+        _logger.info(f"     Blob copié et supprimé d'Azure: {self.blob_name} -> {dest_path}")
+        if archive_writer:
+            self.archive_thread = threading.Thread(
+                target=self._convert_archive, args=(archive_writer, dest_path), name=f"cegid-archive-{self.name}")
+            self.archive_thread.start()
+        return dest_path
+
+    def _convert_archive(self, archive_writer, dest_path):
+        """
+        Convertit la copie du blob au format d'archivage configuré (compression, Parquet)
+        """
+        try:
+            archive_path = archive_writer(dest_path, dest_path)
+            os.unlink(dest_path)
+            _logger.info(f"     Blob archivé: {self.blob_name} -> {archive_path}")
+        except Exception as e:
+            _logger.error(f"     ERREUR lors de l'archivage du blob {self.blob_name}: {str(e)}")
+
+
+class _PrefixedStream(io.RawIOBase):
+    """
+    Flux brut sur un flux fourni par l'appelant : restitue d'abord les octets déjà lus pour la détection
+    de l'en-tête, et ne ferme pas le flux d'origine
+    """
+
+    def __init__(self, fileobj, prefix=b''):
+        super().__init__()
+        self.fileobj = fileobj
+        self.prefix = memoryview(prefix)
+
+    def readable(self):
+        return True
+
+    def readinto(self, b):
+        if len(self.prefix):
+            n = min(len(b), len(self.prefix))
+            b[:n] = self.prefix[:n]
+            self.prefix = self.prefix[n:]
+            return n
+        data = self.fileobj.read(len(b))
+        n = len(data)
+        b[:n] = data
+        return n
+
+
+class _ChunkStream(io.RawIOBase):
+    """
+    Flux brut en lecture sur un itérateur de morceaux (téléchargement Azure)
+    """
+
+    def __init__(self, chunks, spool=None):
+        super().__init__()
+        self.chunks = iter(chunks)
+        self.pending = memoryview(b'')
+        self.spool = spool
+
+    def readable(self):
+        return True
+
+    def readinto(self, b):
+        while not len(self.pending):
+            chunk = next(self.chunks, None)
+            if chunk is None:
+                self._close_spool()
+                return 0
+            if self.spool:
+                self.spool.write(chunk)
+            self.pending = memoryview(chunk)
+        n = min(len(b), len(self.pending))
+        b[:n] = self.pending[:n]
+        self.pending = self.pending[n:]
+        return n
+
+    def _close_spool(self):
+        if self.spool:
+            self.spool.flush()
+            os.fsync(self.spool.fileno())
+            self.spool.close()
+            self.spool = None
+
+    def close(self):
+        self._close_spool()
+        super().close()
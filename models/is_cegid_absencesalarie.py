@@ -25,6 +25,7 @@ class IsCegidAbsencesalarie(models.Model):
     pcn_heures = fields.Float(string='Heures', digits=(10, 2))
     pcn_guid = fields.Char(string='GUID')
     source_fichier = fields.Char(string='Fichier source')
+    row_hash = fields.Char(string='Empreinte ligne', readonly=True)
 
     def name_get(self):
         result = []
@@ -21,6 +21,7 @@ class IsCegidAnalytiq(models.Model):
     y_debit = fields.Float(string='Débit', digits=(12, 2))
     y_credit = fields.Float(string='Crédit', digits=(12, 2))
     source_fichier = fields.Char(string='Fichier source')
+    row_hash = fields.Char(string='Empreinte ligne', readonly=True)
 
     def name_get(self):
         result = []
@@ -18,6 +18,7 @@ class IsCegidEcriture(models.Model):
     e_auxiliaire    = fields.Char(string='Auxiliaire', index=True)
     e_reflibre      = fields.Char(string='Réf. Libre')
     source_fichier  = fields.Char(string='Fichier source')
+    row_hash        = fields.Char(string='Empreinte ligne', readonly=True)
 
     def name_get(self):
         result = []
@@ -12,6 +12,7 @@ class IsCegidHistocumsal(models.Model):
     phc_cumulpaie = fields.Char(string='Cumul Paie', required=True, index=True)
     phc_montant = fields.Float(string='Montant', digits=(12, 2))
     source_fichier = fields.Char(string='Fichier source')
+    row_hash = fields.Char(string='Empreinte ligne', readonly=True)
 
     _sql_constraints = [
         ('salarie_cumulpaie_unique', 
@@ -1,28 +1,427 @@
 # -*- coding: utf-8 -*-
 
 import os
+import io
+import re
+import sys
 import csv
+import codecs
 import logging
 import time
-from datetime import datetime
+import json
+import pickle
+import hashlib
+import tempfile
+import resource
+import threading
+import importlib
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from datetime import datetime, date, timedelta
 from subprocess import Popen, PIPE
+from multiprocessing import get_context
 
-from odoo import models, fields, api, _
+from odoo import models, fields, api, tools, _
 from odoo.exceptions import UserError
 
+from .cegid_sources import LocalFileSource, BlobSource, ArchiveSource
+from .cegid_archive import (
+    resolve_archive_format, compress_file, write_parquet, read_parquet_metadata, iter_parquet_records,
+    archive_date, original_name,
+)
+from .cegid_partition import (
+    PARTITION_GRANULARITIES, period_start, next_period, is_partitioned, list_partitions, ensure_partitions,
+    ensure_id_key, convert_to_partitioned,
+)
+
 _logger = logging.getLogger(__name__)
 
+# Verrou consultatif PostgreSQL partagé par les tâches d'import (voir IsCegidImport._run_exclusive_import)
+IMPORT_LOCK = 'is_cegid2odoo.import'
+
+# Définitions des tables Cegid générées par script-externe/cegid-definitions.py
+CEGID_TABLES_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'cegid_tables.json')
+
+
+def _copy_format_value(value):
+    """
+    Formate une valeur Python pour le format texte de COPY PostgreSQL
+    """
+    if value is None or value is False:
+        return '\\N'
+    if value is True:
+        return 't'
+    if isinstance(value, datetime):
+        return value.strftime('%Y-%m-%d %H:%M:%S')
+    if isinstance(value, date):
+        return value.strftime('%Y-%m-%d')
+    if isinstance(value, (int, float)):
+        return repr(value)
+    return (str(value)
+            .replace('\\', '\\\\')
+            .replace('\t', '\\t')
+            .replace('\n', '\\n')
+            .replace('\r', '\\r'))
+
+
+def _iter_batches(iterable, size):
+    """
+    Découpe un itérable en listes de taille fixe (la dernière peut être plus courte)
+    """
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def _row_hash(cells):
+    """
+    Empreinte compacte (64 bits, hexadécimal) des valeurs brutes d'une ligne CSV
+    :param cells: valeurs dans l'ordre alphabétique des champs Odoo (voir _compile_converters) : l'empreinte
+        ne dépend pas de l'ordre des colonnes du fichier, qui peut changer d'une extraction à l'autre
+    Seul le mode 'delta' s'en sert pour ignorer les lignes inchangées ; les autres modes la stockent
+    pour le premier import delta qui suivra.
+    """
+    return hashlib.blake2b('\x1f'.join(cells).encode('utf-8'), digest_size=8).hexdigest()
+
+
+# Formats de date acceptés dans les fichiers Cegid, par ordre de priorité
+DATE_FORMATS = [
+    '%Y-%m-%d %H:%M:%S',      # ISO: 2025-06-30 00:00:00
+    '%Y-%m-%d',                # ISO: 2025-06-30
+    '%m/%d/%Y %H:%M:%S',       # US: 06/30/2025 00:00:00
+    '%m/%d/%Y',                # US: 06/30/2025
+    '%d/%m/%Y %H:%M:%S',       # EU: 30/06/2025 00:00:00
+    '%d/%m/%Y',                # EU: 30/06/2025
+]
+
+
+def _clean_cell(value):
+    """
+    Supprime les espaces et les guillemets entourant une valeur CSV
+    """
+    value = value.strip()
+    if value.startswith('"') and value.endswith('"'):
+        value = value[1:-1].strip()
+    return value
+
+
+def _parse_iso_datetime(value):
+    """
+    Lecture rapide d'une date ISO 'YYYY-MM-DD HH:MM:SS' par découpage, sans strptime
+    """
+    if len(value) != 19 or value[4] != '-' or value[7] != '-' or value[10] != ' ':
+        raise ValueError(value)
+    return datetime(int(value[0:4]), int(value[5:7]), int(value[8:10]),
+                    int(value[11:13]), int(value[14:16]), int(value[17:19]))
+
+
+def _compile_date_converter():
+    """
+    Convertisseur de date : le format est détecté sur la première valeur puis réutilisé
+    pour les suivantes. La recherche parmi tous les formats n'a lieu que si le format change.
+    """
+    state = {'parser': None}
+
+    def detect(value):
+        for fmt in DATE_FORMATS:
+            try:
+                result = datetime.strptime(value, fmt)
+            except ValueError:
+                continue
+            if fmt == '%Y-%m-%d %H:%M:%S':
+                state['parser'] = _parse_iso_datetime
+            elif fmt.startswith('%d/'):
+                # Format européen : pas de mémorisation, une date ambiguë (06/05/2025)
+                # doit rester lue au format US comme dans _convert_value
+                state['parser'] = None
+            else:
+                state['parser'] = lambda v, fmt=fmt: datetime.strptime(v, fmt)
+            return result
+        return False
+
+    def convert(value):
+        if not value:
+            return False
+        value = _clean_cell(value)
+        parser = state['parser']
+        if parser:
+            try:
+                return parser(value)
+            except ValueError:
+                pass
+        return detect(value)
+
+    return convert
+
+
+def _compile_converter(field_type):
+    """
+    Construit une fois pour toutes la fonction de conversion d'une colonne selon le type du champ Odoo.
+    Même comportement que IsCegidImport._convert_value, sans recherche du champ à chaque cellule.
+    """
+    if field_type in ('datetime', 'date'):
+        return _compile_date_converter()
+
+    if field_type == 'float':
+        def convert(value):
+            if not value or value.isspace():
+                return False
+            value = _clean_cell(value)
+            try:
+                return float(value)
+            except ValueError:
+                pass
+            # Séparateur décimal virgule : remplacement uniquement si nécessaire
+            try:
+                return float(value.replace(',', '.'))
+            except ValueError:
+                return 0.0
+        return convert
+
+    if field_type == 'integer':
+        def convert(value):
+            if not value or value.isspace():
+                return False
+            value = _clean_cell(value)
+            try:
+                return int(value)
+            except ValueError:
+                pass
+            try:
+                return int(float(value))
+            except ValueError:
+                return 0
+        return convert
+
+    def convert(value):
+        if not value or value.isspace():
+            return False
+        return _clean_cell(value)
+    return convert
+
+
+def _compile_converters(column_plan):
+    """
+    Construit les convertisseurs d'un fichier à partir de son plan de colonnes
+    :param column_plan: liste de tuples (index de la colonne CSV, champ Odoo, type du champ)
+    Retourne une liste de tuples (index, champ Odoo, convertisseur, garder_false), triée par champ Odoo
+    (ordre des valeurs de l'empreinte _row_hash)
+    """
+    return [
+        (index, odoo_field, _compile_converter(field_type), field_type == 'boolean')
+        for index, odoo_field, field_type in sorted(column_plan, key=lambda plan: plan[1])
+    ]
+
+
+def _iter_csv_records(source, encoding, delimiter, column_plan, timings=None):
+    """
+    Générateur : lit le fichier ligne à ligne et produit les valeurs converties
+    pour chaque enregistrement, sans jamais charger le fichier complet en mémoire.
+    Chaque enregistrement porte l'empreinte (row_hash) des valeurs brutes des colonnes importées.
+    :param source: chemin d'un fichier local ou CegidImportSource (blob Azure, flux...)
+    :param timings: dict optionnel, la durée de conversion des valeurs y est cumulée ('convert')
+    """
+    if isinstance(source, str):
+        source = LocalFileSource(source)
+    filename = source.name
+    converters = _compile_converters(column_plan)
+    with source.open() as raw:
+        f = io.TextIOWrapper(raw, encoding=encoding, newline='')
+        reader = csv.reader(f, delimiter=delimiter)
+        next(reader, None)  # En-tête
+        for row in reader:
+            # Lignes vides (ignorées par csv.DictReader) ou sans aucune valeur (';;;;' en fin de fichier) : ignorées
+            if not row or not any(row):
+                continue
+            if timings is not None:
+                start = time.perf_counter()
+            row_len = len(row)
+            cells = [row[index] if index < row_len else '' for index, odoo_field, convert, keep_false in converters]
+            vals = {'source_fichier': filename, 'row_hash': _row_hash(cells)}
+            for cell, (index, odoo_field, convert, keep_false) in zip(cells, converters):
+                converted_value = convert(cell)
+                if converted_value is not False or keep_false:
+                    vals[odoo_field] = converted_value
+            if timings is not None:
+                timings['convert'] += time.perf_counter() - start
+            yield vals
+
+
+def _timed_iter(iterable, timings, key):
+    """
+    Parcourt un itérateur en cumulant dans timings[key] le temps passé à produire ses éléments
+    """
+    iterator = iter(iterable)
+    while True:
+        start = time.perf_counter()
+        try:
+            item = next(iterator)
+        except StopIteration:
+            timings[key] += time.perf_counter() - start
+            return
+        timings[key] += time.perf_counter() - start
+        yield item
+
+
+def _reset_peak_memory():
+    """
+    Remet le pic de mémoire résidente du processus à sa valeur actuelle (Linux >= 4.0, /proc/self/clear_refs),
+    pour mesurer le pic pendant l'import d'un seul fichier.
+    Retourne False si la remise à zéro n'est pas possible (_peak_memory donne alors le pic depuis le démarrage)
+    """
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+        return True
+    except OSError:
+        return False
+
+
+def _peak_memory():
+    """
+    Pic de mémoire résidente (Mo) du processus courant depuis le dernier _reset_peak_memory,
+    ou depuis son démarrage si /proc n'est pas disponible
+    """
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _spool_csv_records(filepath, encodings, delimiter, column_plan):
+    """
+    Exécuté dans un processus séparé (import parallèle) : lit et convertit le fichier CSV,
+    puis écrit les enregistrements par lots (pickle) dans un fichier temporaire.
+    Aucun accès à la base de données ici.
+    Retourne le chemin du fichier temporaire
+    """
+    for encoding in encodings:
+        fd, spool_path = tempfile.mkstemp(prefix='cegid_', suffix='.spool')
+        try:
+            with os.fdopen(fd, 'wb') as spool:
+                for batch in _iter_batches(_iter_csv_records(filepath, encoding, delimiter, column_plan), 10000):
+                    pickle.dump(batch, spool, pickle.HIGHEST_PROTOCOL)
+            return spool_path
+        except UnicodeDecodeError:
+            os.unlink(spool_path)
+            if encoding == encodings[-1]:
+                raise
+        except Exception:
+            os.unlink(spool_path)
+            raise
+
+
+def _iter_spooled_records(spool_path):
+    """
+    Relit les enregistrements écrits par _spool_csv_records
+    """
+    with open(spool_path, 'rb') as spool:
+        while True:
+            try:
+                batch = pickle.load(spool)
+            except EOFError:
+                return
+            yield from batch
+
+
+def _write_parquet_archive(src_path, dest_path, model_name, encodings, delimiter, column_plan):
+    """
+    Archive un fichier CSV au format Parquet : les valeurs sont converties comme pour l'import,
+    une relecture (replay_archive) n'a donc plus à analyser le texte CSV.
+    Se replie sur une archive gzip si le fichier ne peut pas être converti.
+    Retourne le chemin de l'archive
+    """
+    field_types = list(dict.fromkeys(
+        [(odoo_field, field_type) for index, odoo_field, field_type in column_plan]
+        + [('source_fichier', 'char'), ('row_hash', 'char')]))
+    metadata = {'model': model_name, 'source_fichier': os.path.basename(src_path)}
+    for encoding in encodings:
+        try:
+            return write_parquet(
+                dest_path, _iter_csv_records(src_path, encoding, delimiter, column_plan), field_types, metadata)
+        except UnicodeDecodeError:
+            continue
+        except Exception as e:
+            _logger.warning(f"     Archivage Parquet impossible ({str(e)}), archivage gzip")
+            break
+    return compress_file(src_path, dest_path, 'gzip')
+
+
+def _log_stream(stream, log, label):
+    """
+    Journalise ligne par ligne la sortie d'une commande externe, au fur et à mesure
+    """
+    for line in iter(stream.readline, b''):
+        line = line.decode('utf-8', errors='replace').rstrip()
+        if line:
+            log(f"{label}: {line}")
+    stream.close()
+
+
+def _import_script_externe(module_name):
+    """
+    Importe un module du dossier script-externe (qui contient aussi config.py)
+    """
+    script_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'script-externe')
+    if script_dir not in sys.path:
+        sys.path.append(script_dir)
+    return importlib.import_module(module_name)
+
+
+def _log_transfert_result(result):
+    """
+    Journalise le résultat du transfert d'un blob dès qu'il est traité
+    """
+    if result['success']:
+        _logger.info(f"Transfert Azure: {result['name']} -> {result['action']} "
+                     f"({result['size']} octets, {result['duration']:.2f} s)")
+    else:
+        _logger.error(f"Transfert Azure: {result['name']} -> ERREUR: {result['error']}")
+
 
 class IsCegidImport(models.Model):
     _name = 'is.cegid.import'
     _description = 'Import CSV Cegid'
 
-    # Mapping des colonnes CSV vers les modèles Odoo
-    # Clé = tuple des colonnes triées, Valeur = nom du modèle
+    # Mapping des colonnes CSV vers les modèles Odoo (tables Cegid du module, voir _get_cegid_tables)
+    # Clé = tuple des colonnes obligatoires de l'en-tête, Valeur = définition de la table
+    # 'fields' : colonnes CSV => champs Odoo
+    # 'converters' : type de conversion imposé pour certaines colonnes (ex: {'PHC_SALARIE': 'char'}),
+    #                à la place du type du champ Odoo
+    # 'loader' : 'copy' (COPY PostgreSQL, rapide) ou 'orm' (create Odoo)
+    # 'import_mode' : 'full' (vidage puis rechargement, mode par défaut), 'delta' (mise à jour par clé naturelle ;
+    #                 seul mode où les lignes inchangées, d'empreinte row_hash identique, ne sont pas réécrites)
+    #                 ou 'swap' (chargement d'une table miroir puis échange par renommage)
+    #                 ou 'range' (remplacement des seules périodes de 'period_field' présentes dans le fichier)
+    # 'range_period' : mode 'range', 'exact' (des dates mini à maxi du fichier, par défaut), 'day' (jours entiers)
+    #                  ou 'month' (mois entiers : les lignes du mois absentes du fichier sont supprimées)
+    # 'key' : champs formant la clé naturelle utilisée par le mode 'delta', toujours renseignés et uniques
+    #         (les extractions ECRITURE et ANALYTIQ n'en ont pas : ajouter le numéro de pièce et de ligne
+    #         à la requête Cegid puis renseigner is_cegid2odoo.<modèle>.key pour y utiliser le mode 'delta')
+    # 'period_field' : champ date de la table (mode 'range', synthèses mensuelles, partitionnement)
+    # 'summaries' : tables de synthèse recalculées à la fin de chaque import (mois modifiés en mode 'delta')
+    # 'partition' : 'year' ou 'month' pour partitionner la table par plage de 'period_field'
+    #               (tâche planifiée cron_cegid_partitions ; non partitionnée par défaut)
+    # 'defer_indexes' : mode 'full', index secondaires supprimés pendant le chargement puis reconstruits
+    #                   (inactif par défaut, activable par le paramètre système correspondant = "1") ;
+    #                   la table est alors illisible jusqu'à la fin de l'import : le mode 'swap' charge
+    #                   déjà sans index une table miroir, sans bloquer les lectures
+    # Ces paramètres peuvent être surchargés par les paramètres système
+    # 'is_cegid2odoo.<modèle>.<paramètre>' (ex: is_cegid2odoo.is.cegid.ecriture.key = "e_journal,e_refinterne")
     MODEL_MAPPING = {
         # is.cegid.histocumsal
         ('PHC_CUMULPAIE', 'PHC_MONTANT', 'PHC_SALARIE'): {
             'model': 'is.cegid.histocumsal',
+            'loader': 'copy',
+            'import_mode': 'full',
+            'key': ('phc_salarie', 'phc_cumulpaie'),
             'fields': {
                 'PHC_SALARIE': 'phc_salarie',
                 'PHC_CUMULPAIE': 'phc_cumulpaie',
@@ -32,6 +431,10 @@ class IsCegidImport(models.Model):
         # is.cegid.ecriture
         ('E_AUXILIAIRE', 'E_CREDIT', 'E_DATECOMPTABLE', 'E_DEBIT', 'E_GENERAL', 'E_LIBELLE', 'E_REFLIBRE', 'E_REFINTERNE'): {
             'model': 'is.cegid.ecriture',
+            'loader': 'copy',
+            'import_mode': 'full',
+            'period_field': 'e_datecomptable',
+            'summaries': ('is.cegid.ecriture.solde',),
             'fields': {
                 'E_DATECOMPTABLE': 'e_datecomptable',
                 'E_JOURNAL': 'e_journal',
@@ -48,6 +451,9 @@ class IsCegidImport(models.Model):
         ('PCN_DATEDEBUTABS', 'PCN_DATEFINABS', 'PCN_DEBUTDJ', 'PCN_FINDJ', 'PCN_GUID', 'PCN_HEURES', 'PCN_JOURS', 
          'PCN_LIBELLE', 'PCN_ORDRE', 'PCN_PERIODECP', 'PCN_SALARIE', 'PCN_SENSABS', 'PCN_TYPECONGE', 'PCN_TYPEMVT'): {
             'model': 'is.cegid.absencesalarie',
+            'loader': 'copy',
+            'import_mode': 'full',
+            'key': ('pcn_guid',),
             'fields': {
                 'PCN_TYPEMVT': 'pcn_typemvt',
                 'PCN_SALARIE': 'pcn_salarie',
@@ -71,6 +477,10 @@ class IsCegidImport(models.Model):
         ('Y_AXE', 'Y_CONTREPARTIEAUX', 'Y_CREDIT', 'Y_DATECOMPTABLE', 'Y_DEBIT', 'Y_GENERAL', 'Y_JOURNAL', 
          'Y_LIBELLE', 'Y_NATUREPIECE', 'Y_REFEXTERNE', 'Y_REFINTERNE', 'Y_SECTION'): {
             'model': 'is.cegid.analytiq',
+            'loader': 'copy',
+            'import_mode': 'full',
+            'period_field': 'y_datecomptable',
+            'summaries': ('is.cegid.analytiq.solde',),
             'fields': {
                 'Y_DATECOMPTABLE': 'y_datecomptable',
                 'Y_GENERAL': 'y_general',
@@ -88,21 +498,114 @@ class IsCegidImport(models.Model):
         },
     }
 
+    def _get_cegid_tables(self):
+        """
+        Définitions des tables Cegid importables (dicts au format de MODEL_MAPPING, la clé 'columns'
+        contenant les colonnes obligatoires de l'en-tête). Une définition remplace celle du même modèle.
+        Point d'extension pour ajouter une table Cegid (SALARIES, PAIEENCOURS...) depuis un autre module :
+        
+            class IsCegidImport(models.Model):
+                _inherit = 'is.cegid.import'
+        
+                def _get_cegid_tables(self):
+                    return super()._get_cegid_tables() + [{
+                        'columns': ('PSA_LIBELLE', 'PSA_SALARIE'),
+                        'model': 'is.cegid.salaries',
+                        'loader': 'copy',
+                        'import_mode': 'full',
+                        'fields': {'PSA_SALARIE': 'psa_salarie', 'PSA_LIBELLE': 'psa_libelle'},
+                    }]
+        
+        Les tables générées à partir des requêtes Cegid Data Access (data/cegid_tables.json,
+        voir script-externe/cegid-definitions.py) sont ajoutées à celles de MODEL_MAPPING.
+        """
+        tables = [dict(mapping_info, columns=columns) for columns, mapping_info in self.MODEL_MAPPING.items()]
+        return tables + self._load_generated_tables()
+
+    def _load_generated_tables(self):
+        """
+        Définitions de tables du fichier data/cegid_tables.json (liste de dicts au format de _get_cegid_tables),
+        pour les modèles installés
+        """
+        if not os.path.exists(CEGID_TABLES_FILE):
+            return []
+        try:
+            with open(CEGID_TABLES_FILE, encoding='utf-8') as f:
+                definitions = json.load(f)
+        except (OSError, ValueError) as e:
+            _logger.error(f"Définitions des tables Cegid illisibles ({CEGID_TABLES_FILE}): {str(e)}")
+            return []
+        tables = []
+        for table in definitions:
+            if table.get('model') not in self.env:
+                _logger.warning(f"Table Cegid générée ignorée: modèle {table.get('model')} non installé")
+                continue
+            table = dict(table, columns=tuple(table['columns']))
+            if table.get('key'):
+                table['key'] = tuple(table['key'])
+            tables.append(table)
+        return tables
+
+    @tools.ormcache()
+    def _get_table_index(self):
+        """
+        Index des signatures d'en-tête des tables Cegid, calculé une fois par registre :
+        - 'exact' : colonnes obligatoires, ou toutes les colonnes connues d'une table => définition
+        - 'columns' : colonne => positions des tables qui la connaissent
+        - 'tables' : liste de tuples (définition, colonnes obligatoires, colonnes connues)
+        - 'models' : modèle Odoo => définition
+        """
+        definitions = {}
+        for table in self._get_cegid_tables():
+            definitions[table['model']] = table
+        index = {'exact': {}, 'columns': {}, 'tables': [], 'models': definitions}
+        for position, table in enumerate(definitions.values()):
+            required = frozenset(col.upper() for col in table['columns'])
+            known = required | frozenset(table['fields'])
+            index['tables'].append((table, required, known))
+            for signature in (required, known):
+                other = index['exact'].setdefault(signature, table)
+                if other is not table:
+                    _logger.warning(f"Signature d'en-tête identique pour {other['model']} et {table['model']}")
+            for col in known:
+                index['columns'].setdefault(col, []).append(position)
+        return index
+
+    def _get_cegid_table(self, model_name):
+        """
+        Définition de la table Cegid d'un modèle Odoo, ou None
+        """
+        return self._get_table_index()['models'].get(model_name)
+
     def _detect_model_from_columns(self, columns):
         """
-        Détecte le modèle Odoo correspondant aux colonnes du fichier CSV
+        Détecte la table Cegid correspondant aux colonnes du fichier CSV :
+        - en-tête identique aux colonnes obligatoires ou à toutes les colonnes d'une table ;
+        - sinon, parmi les tables dont l'en-tête contient toutes les colonnes obligatoires, ou dont il ne
+          contient que des colonnes connues (en-tête partiel), celle qui a le meilleur score
+          (colonnes communes / colonnes de l'en-tête et de la table réunies).
+        Retourne None si aucune table ne correspond ou si deux tables ont le même score
         """
-        columns_upper = tuple(sorted([col.upper().strip() for col in columns]))
-        
-        for mapping_columns, mapping_info in self.MODEL_MAPPING.items():
-            # Vérifier si toutes les colonnes du mapping sont présentes dans le fichier
-            if set(mapping_columns).issubset(set(columns_upper)):
-                return mapping_info
-            # Vérifier aussi l'inverse (colonnes du fichier sont un sous-ensemble)
-            if set(columns_upper).issubset(set(mapping_columns)):
-                return mapping_info
+        header = frozenset(col.upper().strip() for col in columns)
+        index = self._get_table_index()
+        table = index['exact'].get(header)
+        if table:
+            return table
         
-        return None
+        best, best_score, tie = None, 0.0, False
+        for position in {position for col in header for position in index['columns'].get(col, ())}:
+            table, required, known = index['tables'][position]
+            if not (required <= header or header <= known):
+                continue
+            score = len(header & known) / len(header | known)
+            if score > best_score:
+                best, best_score, tie = table, score, False
+            elif score == best_score:
+                tie = True
+        if tie:
+            _logger.warning(f"     En-tête ambigu: plusieurs tables Cegid correspondent (score {best_score:.0%})")
+            return None
+        return best
 
     def _convert_value(self, value, field_name, model_obj):
         """
@@ -136,15 +639,7 @@ class IsCegidImport(models.Model):
         elif field.type in ('datetime', 'date'):
             try:
                 # Essayer différents formats de date
-                date_formats = [
-                    '%Y-%m-%d %H:%M:%S',      # ISO: 2025-06-30 00:00:00
-                    '%Y-%m-%d',                # ISO: 2025-06-30
-                    '%m/%d/%Y %H:%M:%S',       # US: 06/30/2025 00:00:00
-                    '%m/%d/%Y',                # US: 06/30/2025
-                    '%d/%m/%Y %H:%M:%S',       # EU: 30/06/2025 00:00:00
-                    '%d/%m/%Y',                # EU: 30/06/2025
-                ]
-                for fmt in date_formats:
+                for fmt in DATE_FORMATS:
                     try:
                         return datetime.strptime(value, fmt)
                     except ValueError:
@@ -157,160 +652,864 @@ class IsCegidImport(models.Model):
 
     def _transfert_azure_cegid(self):
         """
-        Exécute le script de transfert des fichiers depuis Azure vers le dossier local
-        Le script est configuré dans le modèle 'is.commande.externe' avec le nom 'transfert-azure-cegid'
+        Transfère les fichiers depuis Azure vers le dossier local
+        Par défaut, le module script-externe/cegid_transfert.py est appelé directement, dans le processus Odoo
+        (pas de démarrage d'interpréteur, cache partagé du jeton et de l'URL SAS). Si le module ne peut pas être
+        chargé (config.py ou SDK Azure absent), ou si le paramètre système 'is_cegid2odoo.transfert_mode' vaut
+        'commande', le script configuré dans 'is.commande.externe' avec le nom 'transfert-azure-cegid' est exécuté.
+        Retourne la liste des résultats par blob (dicts name, path, size, action, success, error, duration),
+        ou un booléen pour la commande externe
+        """
+        transfert_mode = self.env['ir.config_parameter'].sudo().get_param('is_cegid2odoo.transfert_mode', 'module')
+        if transfert_mode != 'commande':
+            try:
+                cegid_transfert = _import_script_externe('cegid_transfert')
+                _logger.info("Transfert Azure -> local...")
+                results = cegid_transfert.transfer_all(on_result=_log_transfert_result)
+            except ImportError as e:
+                _logger.warning(f"Transfert Azure: module indisponible ({str(e)}), utilisation de la commande externe")
+            except Exception as e:
+                _logger.error(f"Erreur lors du transfert Azure: {str(e)}")
+                return []
+            else:
+                nb_errors = len([r for r in results if not r['success']])
+                _logger.info(f"Transfert Azure terminé: {len(results) - nb_errors} fichier(s) transféré(s), "
+                             f"{nb_errors} en erreur")
+                return results
+        return self._run_commande_externe('transfert-azure-cegid', "Transfert Azure")
+
+    def _declencher_requetes_cegid(self):
+        """
+        Déclenche l'exécution des requêtes planifiées Cegid (cegid-requetes.py --force)
+        Le script est configuré dans le modèle 'is.commande.externe' avec le nom 'cegid-requetes'
+        """
+        return self._run_commande_externe('cegid-requetes', "Déclenchement des requêtes Cegid")
+
+    def _run_commande_externe(self, name, label):
+        """
+        Exécute les commandes du modèle 'is.commande.externe' portant le nom indiqué
+        Retourne False si la commande est absente ou en erreur
         """
-        name = 'transfert-azure-cegid'
         cdes = self.env['is.commande.externe'].search([('name', '=', name)])
         
         if not cdes:
             _logger.warning(f"Commande externe '{name}' non trouvée")
             return False
         
-        _logger.info("Exécution du transfert Azure -> local...")
+        _logger.info(f"{label}: exécution...")
         
         for cde in cdes:
             cmd = cde.commande
             _logger.info(f"Exécution de la commande: {cmd}")
             
             try:
+                # Sorties journalisées au fil de l'eau ; l'échec est donné par le code retour
+                # (un avertissement sur la sortie d'erreur n'est pas un échec)
                 p = Popen(cmd, shell=True, stdout=PIPE, stderr=PIPE)
-                stdout, stderr = p.communicate()
-                
-                output = stdout.decode("utf-8").strip()
-                if output:
-                    _logger.info(f"Transfert Azure: {output}")
+                stderr_thread = threading.Thread(
+                    target=_log_stream, args=(p.stderr, _logger.warning, f"{label} (stderr)"))
+                stderr_thread.start()
+                _log_stream(p.stdout, _logger.info, label)
+                stderr_thread.join()
+                returncode = p.wait()
                 
-                if stderr:
-                    error_msg = stderr.decode("utf-8").strip()
-                    if error_msg:
-                        _logger.error(f"Erreur transfert Azure: {error_msg}")
-                        return False
+                if returncode != 0:
+                    _logger.error(f"Erreur {label}: la commande s'est terminée avec le code {returncode}")
+                    return False
                 
             except Exception as e:
-                _logger.error(f"Erreur lors de l'exécution du transfert Azure: {str(e)}")
+                _logger.error(f"Erreur lors de l'exécution de la commande {name}: {str(e)}")
                 return False
         
-        _logger.info("Transfert Azure terminé avec succès")
+        _logger.info(f"{label}: terminé avec succès")
         return True
 
-    def _import_csv_file(self, filepath):
+    def _detect_csv_format(self, source):
         """
-        Importe un fichier CSV dans le modèle Odoo correspondant
-        Retourne un dict: {'success': bool, 'records': int, 'table': str, 'error': str}
+        Détecte l'encodage, le délimiteur et les colonnes du fichier CSV à partir de son début
+        Retourne un tuple (encodage, délimiteur, colonnes)
         """
-        filename = os.path.basename(filepath)
-        filesize = os.path.getsize(filepath)
+        sample = source.read_sample()
+        for encoding in ('utf-8-sig', 'latin-1'):
+            try:
+                # Décodeur incrémental : un caractère coupé en fin d'échantillon n'est pas une erreur
+                text = codecs.getincrementaldecoder(encoding)().decode(sample)
+            except UnicodeDecodeError:
+                continue
+            delimiter = ';' if ';' in text[:1024] else ','
+            columns = next(csv.reader(io.StringIO(text, newline=''), delimiter=delimiter), None)
+            return encoding, delimiter, columns
+        return None, None, None
+
+    def _get_column_plan(self, columns, file_column_mapping, model_obj, converters=None):
+        """
+        Prépare, une seule fois par fichier, la liste des colonnes à lire avec le type du champ Odoo cible
+        :param converters: type de conversion imposé par colonne CSV ('converters' de la table)
+        Retourne une liste de tuples (index de la colonne CSV, champ Odoo, type du champ)
+        """
+        converters = converters or {}
+        column_plan = []
+        for index, csv_col in enumerate(columns):
+            odoo_field = file_column_mapping.get(csv_col)
+            if not odoo_field:
+                continue
+            field = model_obj._fields.get(odoo_field)
+            field_type = converters.get(csv_col.upper().strip()) or (field.type if field else 'char')
+            column_plan.append((index, odoo_field, field_type))
+        return column_plan
+
+    def _as_source(self, source):
+        """
+        Retourne une CegidImportSource (un chemin de fichier local est converti en LocalFileSource)
+        """
+        if isinstance(source, str):
+            return LocalFileSource(source)
+        return source
+
+    def _prepare_csv_import(self, source):
+        """
+        Analyse l'en-tête du fichier CSV et détermine le modèle, les colonnes et le mode d'import
+        Retourne un tuple (plan, result) : plan vaut None si le fichier ne peut pas être importé,
+        result contient alors l'erreur
+        """
+        source = self._as_source(source)
+        filename = source.name
+        filesize = source.size if source.size is not None else '?'
         _logger.info(f"     Lecture du fichier: {filename} ({filesize} octets)")
         
         result = {'success': False, 'records': 0, 'table': '', 'error': ''}
         
-        try:
-            # Détecter l'encodage et le délimiteur
-            with open(filepath, 'r', encoding='utf-8-sig') as f:
-                sample = f.read(1024)
-                f.seek(0)
-                
-                # Détecter le délimiteur
-                delimiter = ';' if ';' in sample else ','
-                
-                reader = csv.DictReader(f, delimiter=delimiter)
-                columns = reader.fieldnames
-                
-                if not columns:
-                    _logger.warning(f"     ERREUR: Aucune colonne trouvée dans le fichier {filename}")
-                    result['error'] = "Aucune colonne trouvée"
-                    return result
-                
-                _logger.info(f"     Colonnes détectées: {', '.join(columns)}")
-                
-                # Détecter le modèle
-                mapping_info = self._detect_model_from_columns(columns)
-                if not mapping_info:
-                    _logger.warning(f"     ERREUR: Impossible de détecter le modèle Odoo pour ces colonnes")
-                    _logger.warning(f"     Colonnes attendues: PHC_* (histocumsal), E_* (ecriture), PCN_* (absencesalarie), Y_* (analytiq)")
-                    result['error'] = "Modèle Odoo non reconnu"
-                    return result
-                
-                model_name = mapping_info['model']
-                field_mapping = mapping_info['fields']
-                
-                _logger.info(f"     Modèle Odoo détecté: {model_name}")
-                
-                # Obtenir le modèle
-                model_obj = self.env[model_name]
-                
-                # Vider la table (utiliser SQL pour plus de rapidité)
-                self.env.cr.execute(f"SELECT COUNT(*) FROM {model_obj._table}")
-                count_before = self.env.cr.fetchone()[0]
-                self.env.cr.execute(f"DELETE FROM {model_obj._table}")
-                _logger.info(f"     Table {model_obj._table} vidée ({count_before} enregistrements supprimés)")
-                
-                # Lire toutes les lignes
-                rows = list(reader)
-                
-        except UnicodeDecodeError:
-            # Essayer avec un autre encodage
-            with open(filepath, 'r', encoding='latin-1') as f:
-                delimiter = ';'
-                reader = csv.DictReader(f, delimiter=delimiter)
-                columns = reader.fieldnames
-                
-                mapping_info = self._detect_model_from_columns(columns)
-                if not mapping_info:
-                    _logger.warning(f"Fichier {filename}: Impossible de détecter le modèle pour les colonnes {columns}")
-                    result['error'] = "Modèle Odoo non reconnu"
-                    return result
-                
-                model_name = mapping_info['model']
-                field_mapping = mapping_info['fields']
-                model_obj = self.env[model_name]
-                
-                self.env.cr.execute(f"DELETE FROM {model_obj._table}")
-                rows = list(reader)
+        encoding, delimiter, columns = self._detect_csv_format(source)
+        if not columns:
+            _logger.warning(f"     ERREUR: Aucune colonne trouvée dans le fichier {filename}")
+            result['error'] = "Aucune colonne trouvée"
+            return None, result
+        
+        _logger.info(f"     Colonnes détectées: {', '.join(columns)}")
+        
+        # Détecter le modèle
+        mapping_info = self._detect_model_from_columns(columns)
+        if not mapping_info:
+            _logger.warning(f"     ERREUR: Impossible de détecter le modèle Odoo pour ces colonnes")
+            expected = ', '.join(f"{sorted(table['columns'])[0].split('_')[0]}_* ({table['model']})"
+                                 for table, required, known in self._get_table_index()['tables'])
+            _logger.warning(f"     Colonnes attendues: {expected}")
+            result['error'] = "Modèle Odoo non reconnu"
+            return None, result
+        
+        model_name = mapping_info['model']
+        field_mapping = mapping_info['fields']
+        
+        _logger.info(f"     Modèle Odoo détecté: {model_name}")
+        
+        # Obtenir le modèle
+        model_obj = self.env[model_name]
         
         # Créer le mapping des colonnes du fichier vers les champs Odoo
+        file_column_mapping = self._get_file_column_mapping(columns, field_mapping)
+        import_mode, key_fields = self._get_import_mode(mapping_info)
+        
+        plan = {
+            'source': source,
+            'filename': filename,
+            'encoding': encoding,
+            'delimiter': delimiter,
+            'mapping_info': mapping_info,
+            'model': model_name,
+            'columns': list(dict.fromkeys(file_column_mapping.values())) + ['source_fichier', 'row_hash'],
+            'column_plan': self._get_column_plan(columns, file_column_mapping, model_obj,
+                                                 mapping_info.get('converters')),
+            'import_mode': import_mode,
+            'key_fields': key_fields,
+            'timings': {'read': 0.0, 'convert': 0.0},
+        }
+        return plan, result
+
+    def _get_file_column_mapping(self, columns, field_mapping):
+        """
+        Mapping des colonnes du fichier (telles qu'écrites dans l'en-tête) vers les champs Odoo
+        """
         file_column_mapping = {}
         for csv_col in columns:
             csv_col_upper = csv_col.upper().strip()
             if csv_col_upper in field_mapping:
                 file_column_mapping[csv_col] = field_mapping[csv_col_upper]
+        return file_column_mapping
+
+    def _get_import_mode(self, mapping_info):
+        """
+        Mode d'import et champs de la clé naturelle d'une table
+        Retourne un tuple (mode, clé)
+        """
+        import_mode = self._get_table_param(mapping_info, 'import_mode', 'full')
+        key_fields = self._get_table_param(mapping_info, 'key') or ()
+        if isinstance(key_fields, str):
+            key_fields = tuple(f.strip() for f in key_fields.split(',') if f.strip())
+        if import_mode == 'delta' and not key_fields:
+            _logger.warning(f"     Mode delta demandé sans clé pour {mapping_info['model']}, import complet")
+            import_mode = 'full'
+        if import_mode == 'range' and not mapping_info.get('period_field'):
+            _logger.warning(f"     Mode range demandé sans champ date pour {mapping_info['model']}, import complet")
+            import_mode = 'full'
+        return import_mode, key_fields
+
+    def _import_csv_file(self, filepath, spool_path=None):
+        """
+        Importe un fichier CSV dans le modèle Odoo correspondant
+        Le fichier est lu en flux et inséré par lots : la mémoire utilisée ne dépend pas de sa taille
+        :param filepath: chemin d'un fichier local ou CegidImportSource (blob Azure, flux...)
+        :param spool_path: enregistrements déjà lus et convertis par un processus de l'import parallèle
+        Retourne un dict: {'success': bool, 'records': int, 'table': str, 'error': str}
+        """
+        plan, result = self._prepare_csv_import(filepath)
+        if not plan:
+            return result
         
-        # Préparer les données pour insertion
-        records_to_create = []
-        for row in rows:
-            vals = {'source_fichier': filename}
-            for csv_col, odoo_field in file_column_mapping.items():
-                value = row.get(csv_col, '')
-                converted_value = self._convert_value(value, odoo_field, model_obj)
-                if converted_value is not False or model_obj._fields[odoo_field].type in ('boolean',):
-                    vals[odoo_field] = converted_value
-            
-            if vals:
-                records_to_create.append(vals)
+        if spool_path:
+            return self._load_csv_import(plan, result, lambda: _iter_spooled_records(spool_path))
+        
+        # L'encodage n'est détecté que sur l'en-tête : si une ligne plus loin n'est pas en UTF-8,
+        # l'import est annulé (savepoint) puis relancé en latin-1
+        encodings = self._get_encodings(plan['encoding'])
+        for encoding in encodings:
+            try:
+                return self._load_csv_import(plan, result, lambda: _iter_csv_records(
+                    plan['source'], encoding, plan['delimiter'], plan['column_plan'], plan['timings']))
+            except UnicodeDecodeError:
+                if encoding == encodings[-1]:
+                    raise
+                _logger.warning(f"     Fichier {plan['filename']} non UTF-8, nouvel essai en latin-1")
+
+    def _get_encodings(self, encoding):
+        """
+        Encodages à essayer successivement pour lire un fichier dont l'en-tête a été lu avec 'encoding'
+        """
+        return [encoding] if encoding == 'latin-1' else [encoding, 'latin-1']
+
+    def _load_csv_import(self, plan, result, records_factory):
+        """
+        Charge les enregistrements d'un fichier selon le mode d'import de la table
+        :param records_factory: fonction sans argument qui retourne un nouvel itérateur d'enregistrements
+        """
+        model_obj = self.env[plan['model']]
+        mapping_info = plan['mapping_info']
+        columns = plan['columns']
+        # Temps de lecture du fichier (analyse CSV et conversion), mesuré pendant le chargement
+        timings = plan.setdefault('timings', {'read': 0.0, 'convert': 0.0})
+        factory = records_factory
+        records_factory = lambda: _timed_iter(factory(), timings, 'read')
+        start = time.perf_counter()
+        with self.env.cr.savepoint():
+            stats = None
+            if plan['import_mode'] == 'delta':
+                stats = self._import_delta(mapping_info, model_obj, columns, plan['key_fields'], records_factory)
+            elif plan['import_mode'] == 'swap':
+                stats = self._import_swap(mapping_info, model_obj, columns, records_factory)
+            elif plan['import_mode'] == 'range':
+                stats = self._import_range(mapping_info, model_obj, columns, records_factory)
+            if stats is None:
+                stats = self._import_full(mapping_info, model_obj, columns, records_factory)
+            periods = stats.pop('periods', None)
+            summary_time = 0.0
+            if self.env.context.get('cegid_defer_summaries'):
+                # Recalcul fait par l'appelant après le commit de l'import (_import_and_archive_file)
+                if mapping_info.get('summaries'):
+                    result['pending_summaries'] = (mapping_info, periods)
+            else:
+                summary_start = time.perf_counter()
+                self._refresh_summaries(mapping_info, periods)
+                summary_time = time.perf_counter() - summary_start
+        load_time = time.perf_counter() - start
+        delete_time = stats.pop('delete_time', 0.0)
+        
+        _logger.info(f"     Import terminé ({stats['mode']}): {stats['inserted']} créés, {stats['updated']} modifiés, "
+                     f"{stats['deleted']} supprimés, {stats['unchanged']} inchangés "
+                     f"({stats['hit_ratio']:.0%}) dans {plan['model']}")
+        result.update(stats)
+        result['success'] = True
+        result['records'] = stats['inserted'] + stats['updated']
+        result['table'] = model_obj._table
+        result['model'] = plan['model']
+        result['size'] = plan['source'].size
+        result['timings'] = {
+            'parse': max(timings['read'] - timings['convert'], 0.0),
+            'convert': timings['convert'],
+            'delete': delete_time,
+            'insert': max(load_time - timings['read'] - delete_time - summary_time, 0.0),
+            'summary': summary_time,
+        }
+        return result
+
+    def _refresh_summaries(self, mapping_info, periods=None):
+        """
+        Recalcule les tables de synthèse d'une table Cegid après son chargement
+        :param periods: mois modifiés par l'import ; None (mode 'full' ou 'swap') pour tout recalculer
+        """
+        for summary in mapping_info.get('summaries', ()):
+            self.env[summary].refresh_summary(periods)
+
+    def _refresh_committed_summaries(self, result, mapping_info, periods):
+        """
+        Recalcule les synthèses d'un import déjà validé, dans une transaction séparée : un échec est
+        journalisé sans annuler l'import (synthèses recalculables par l'action 'Recalculer les soldes')
+        """
+        start = time.perf_counter()
+        try:
+            self._refresh_summaries(mapping_info, periods)
+            self.env.cr.commit()
+        except Exception as e:
+            self.env.cr.rollback()
+            _logger.error(f"  -> ERREUR lors du recalcul des synthèses de {result['table']}: {str(e)}")
+        result.setdefault('timings', {})['summary'] = time.perf_counter() - start
+
+    def _get_table_param(self, mapping_info, param, default=None):
+        """
+        Retourne un paramètre d'import d'une table Cegid :
+        paramètre système 'is_cegid2odoo.<modèle>.<paramètre>' s'il existe, sinon valeur de la définition de la table
+        """
+        value = self.env['ir.config_parameter'].sudo().get_param(f"is_cegid2odoo.{mapping_info['model']}.{param}")
+        if value:
+            return value.strip()
+        return mapping_info.get(param, default)
+
+    def _import_full(self, mapping_info, model_obj, columns, records_factory):
+        """
+        Mode 'full' : vide la table puis recharge tout le fichier
+        Les index secondaires peuvent être supprimés avant le chargement puis reconstruits en une fois
+        (paramètre 'defer_indexes' de la table, inactif par défaut : DROP INDEX verrouille la table,
+        lectures comprises, jusqu'au commit du fichier)
+        """
+        # Vider la table (utiliser SQL pour plus de rapidité)
+        model_obj.flush_model()
+        self.env.cr.execute(f"SELECT COUNT(*) FROM {model_obj._table}")
+        count_before = self.env.cr.fetchone()[0]
+        defer_indexes = str(self._get_table_param(mapping_info, 'defer_indexes', False)).lower() in ('1', 'true')
+        indexes = self._drop_secondary_indexes(model_obj._table) if defer_indexes else []
+        start = time.perf_counter()
+        if is_partitioned(self.env.cr, model_obj._table):
+            # Table partitionnée : vidage de toutes les partitions, sans lignes mortes à nettoyer ensuite
+            self.env.cr.execute(f"TRUNCATE {model_obj._table}")
+        else:
+            self.env.cr.execute(f"DELETE FROM {model_obj._table}")
+        delete_time = time.perf_counter() - start
+        _logger.info(f"     Table {model_obj._table} vidée ({count_before} enregistrements supprimés)")
+        
+        total_created = self._load_records(mapping_info, model_obj, columns, records_factory)
+        if defer_indexes:
+            self._rebuild_indexes(model_obj._table, indexes)
+        return {'mode': 'full', 'inserted': total_created, 'updated': 0, 'deleted': count_before,
+                'unchanged': 0, 'hit_ratio': 0.0, 'delete_time': delete_time}
+
+    def _drop_secondary_indexes(self, table):
+        """
+        Supprime les index secondaires d'une table avant un chargement massif : chaque ligne insérée
+        n'a plus à mettre à jour tous les B-trees (index=True des champs Odoo).
+        Les index uniques et ceux des contraintes (clé primaire, clé naturelle) sont conservés.
+        La suppression verrouille la table jusqu'au commit du fichier (lectures comprises).
+        Retourne la liste des tuples (nom, définition) des index supprimés, pour _rebuild_indexes
+        """
+        cr = self.env.cr
+        cr.execute("""
+            SELECT c.relname, pg_get_indexdef(i.indexrelid)
+              FROM pg_index i
+              JOIN pg_class c ON c.oid = i.indexrelid
+             WHERE i.indrelid = %s::regclass
+               AND NOT i.indisunique AND NOT i.indisprimary
+               AND NOT EXISTS (SELECT 1 FROM pg_constraint con WHERE con.conindid = i.indexrelid)
+             ORDER BY c.relname
+        """, (table,))
+        indexes = cr.fetchall()
+        for indexname, indexdef in indexes:
+            cr.execute(f'DROP INDEX "{indexname}"')
+        if indexes:
+            _logger.info(f"     {len(indexes)} index secondaires supprimés pendant le chargement de {table}")
+        return indexes
+
+    def _rebuild_indexes(self, table, indexes):
+        """
+        Recrée les index supprimés par _drop_secondary_indexes, puis met à jour les statistiques (ANALYZE).
+        CREATE INDEX CONCURRENTLY n'est pas utilisable dans la transaction de l'import ; la construction
+        de chaque index peut en revanche être répartie sur plusieurs processus PostgreSQL (paramètres
+        système 'is_cegid2odoo.index_parallel_workers' et 'is_cegid2odoo.index_maintenance_work_mem').
+        """
+        cr = self.env.cr
+        start = time.perf_counter()
+        if indexes:
+            params = self.env['ir.config_parameter'].sudo()
+            workers = params.get_param('is_cegid2odoo.index_parallel_workers')
+            work_mem = params.get_param('is_cegid2odoo.index_maintenance_work_mem', '256MB')
+            if workers:
+                cr.execute("SELECT set_config('max_parallel_maintenance_workers', %s, true)", (workers.strip(),))
+            if work_mem:
+                cr.execute("SELECT set_config('maintenance_work_mem', %s, true)", (work_mem.strip(),))
+            for indexname, indexdef in indexes:
+                # Index d'une table partitionnée : 'ON ONLY' ne créerait pas les index des partitions
+                cr.execute(indexdef.replace(' ON ONLY ', ' ON ', 1))
+            if workers:
+                cr.execute("RESET max_parallel_maintenance_workers")
+            if work_mem:
+                cr.execute("RESET maintenance_work_mem")
+        cr.execute(f"ANALYZE {table}")
+        _logger.info(f"     {len(indexes)} index reconstruits et statistiques mises à jour sur {table} "
+                     f"({time.perf_counter() - start:.2f} s)")
+
+    def _ensure_key_index(self, model_obj, key_fields):
+        """
+        Crée si besoin un index (non unique) sur la clé naturelle, utilisé par les jointures du mode delta.
+        L'unicité de la clé est contrôlée à chaque import delta (_load_hash_index et table de travail) :
+        un index unique empêcherait les modes 'full', 'swap' et 'range' de charger des fichiers
+        contenant des doublons sur cette clé.
+        """
+        table = model_obj._table
+        key_hash = hashlib.md5(','.join(key_fields).encode()).hexdigest()[:8]
+        index_name = f"{table}_cegid_key_{key_hash}"
+        self.env.cr.execute("""
+            SELECT i.indisunique
+              FROM pg_index i
+              JOIN pg_class c ON c.oid = i.indexrelid
+             WHERE c.relname = %s
+        """, (index_name,))
+        row = self.env.cr.fetchone()
+        if row and not row[0]:
+            return
+        if row:
+            # Index unique créé par une version précédente du module
+            self.env.cr.execute(f"DROP INDEX {index_name}")
+            _logger.info(f"     Index unique {index_name} remplacé par un index non unique")
+        self.env.cr.execute(f"CREATE INDEX {index_name} ON {table} ({', '.join(key_fields)})")
+        _logger.info(f"     Index {index_name} créé sur ({', '.join(key_fields)})")
+
+    def _load_hash_index(self, model_obj, key_fields):
+        """
+        Charge en une seule requête l'index {clé naturelle: empreinte} des lignes déjà présentes
+        Les lignes dont la clé est incomplète ne sont pas chargées (elles sont supprimées par le mode delta).
+        Retourne un tuple (index, nombre de clés en double)
+        """
+        keys_not_null = ' AND '.join(f"{f} IS NOT NULL" for f in key_fields)
+        self.env.cr.execute(f"SELECT {', '.join(key_fields)}, row_hash FROM {model_obj._table} WHERE {keys_not_null}")
+        hash_index = {}
+        duplicates = 0
+        while True:
+            rows = self.env.cr.fetchmany(10000)
+            if not rows:
+                break
+            for row in rows:
+                if row[:-1] in hash_index:
+                    duplicates += 1
+                hash_index[row[:-1]] = row[-1]
+        return hash_index, duplicates
+
+    def _import_delta(self, mapping_info, model_obj, columns, key_fields, records_factory):
+        """
+        Mode 'delta' : compare l'empreinte de chaque ligne du fichier avec celle de la ligne de même clé
+        déjà en base. Seules les lignes nouvelles ou modifiées sont chargées dans une table temporaire puis
+        - mises à jour (UPDATE) ou insérées (INSERT) dans la table
+        - les lignes absentes du fichier et les lignes sans clé complète sont supprimées
+        Une ligne du fichier dont la clé est incomplète (colonne vide) annule l'import (UserError).
+        Retourne None si le mode delta n'est pas applicable (le mode 'full' est alors utilisé) :
+        colonnes de clé absentes du fichier ou doublons sur la clé dans la table ou dans le fichier
+        """
+        table = model_obj._table
+        missing = [f for f in key_fields if f not in columns]
+        if missing:
+            _logger.warning(f"     Mode delta impossible: colonnes de clé absentes du fichier ({', '.join(missing)})")
+            return None
+        
+        model_obj.flush_model()
+        hash_index, duplicates = self._load_hash_index(model_obj, key_fields)
+        if duplicates:
+            _logger.warning(f"     Mode delta impossible sur {table}: {duplicates} doublons sur la clé en base, import complet")
+            return None
+        self._ensure_key_index(model_obj, key_fields)
+        _logger.info(f"     Index des empreintes chargé ({len(hash_index)} lignes en base)")
+        counters = {'total': 0, 'unchanged': 0, 'null_keys': 0, 'duplicates': 0}
+        seen = set()
+        
+        def changed_records():
+            for vals in records_factory():
+                counters['total'] += 1
+                key = tuple(vals.get(f) for f in key_fields)
+                if None in key:
+                    # Ligne comptée puis refusée après le chargement de la table de travail
+                    counters['null_keys'] += 1
+                    continue
+                if key in seen:
+                    counters['duplicates'] += 1
+                    continue
+                seen.add(key)
+                # pop : les clés restantes à la fin sont celles absentes du fichier
+                if hash_index.pop(key, None) == vals['row_hash']:
+                    counters['unchanged'] += 1
+                    continue
+                yield vals
+        
+        # Table temporaire de travail contenant uniquement les lignes nouvelles ou modifiées
+        staging = f"{table}_cegid_delta"
+        self.env.cr.execute(f"DROP TABLE IF EXISTS {staging}")
+        self.env.cr.execute(f"CREATE TEMP TABLE {staging} ON COMMIT DROP AS SELECT {', '.join(columns)} FROM {table} WITH NO DATA")
+        staged = self._copy_records(staging, columns, changed_records())
+        _logger.info(f"     {counters['unchanged']}/{counters['total']} lignes inchangées, "
+                     f"{staged} lignes chargées dans la table de travail {staging}")
+        if counters['null_keys']:
+            raise UserError(_("Import delta de %(table)s refusé : %(count)s lignes du fichier ont une clé incomplète "
+                              "(%(key)s). Corrigez la clé de la table (paramètre is_cegid2odoo.%(model)s.key) "
+                              "ou utilisez le mode 'full'.") % {
+                'table': table, 'count': counters['null_keys'], 'key': ', '.join(key_fields), 'model': model_obj._name})
+        
+        seen.clear()
+        if counters['duplicates']:
+            self.env.cr.execute(f"DROP TABLE {staging}")
+            _logger.warning(f"     Mode delta impossible sur {table}: {counters['duplicates']} clés en double "
+                            f"dans le fichier, import complet")
+            return None
+        
+        keys_sql = ', '.join(key_fields)
+        
+        # Mois modifiés (anciennes et nouvelles valeurs), pour le recalcul des synthèses
+        period_field = mapping_info.get('period_field') if mapping_info.get('summaries') else None
+        if period_field not in columns:
+            period_field = None
+        periods = None
+        staging_join = ' AND '.join(f"s.{f} = t.{f}" for f in key_fields)
+        if period_field:
+            self.env.cr.execute(f"""
+                SELECT date_trunc('month', {period_field})::date FROM {staging} WHERE {period_field} IS NOT NULL
+                 UNION
+                SELECT date_trunc('month', t.{period_field})::date
+                  FROM {table} t JOIN {staging} s ON {staging_join}
+                 WHERE t.{period_field} IS NOT NULL
+            """)
+            periods = {row[0] for row in self.env.cr.fetchall()}
+        
+        # Clé contrôlée unique et non vide des deux côtés : jointure simple sur la clé
+        update_columns = [c for c in columns if c not in key_fields]
+        set_sql = ', '.join(f"{c} = s.{c}" for c in update_columns)
+        params = {'uid': self.env.uid, 'now': fields.Datetime.now()}
+        self.env.cr.execute(f"""
+            UPDATE {table} t
+               SET {set_sql}, write_uid = %(uid)s, write_date = %(now)s
+              FROM {staging} s
+             WHERE {staging_join}
+               AND t.row_hash IS DISTINCT FROM s.row_hash
+        """, params)
+        updated = self.env.cr.rowcount
+        self.env.cr.execute(f"""
+            INSERT INTO {table} ({', '.join(columns)}, create_uid, create_date, write_uid, write_date)
+            SELECT {', '.join(f's.{c}' for c in columns)}, %(uid)s, %(now)s, %(uid)s, %(now)s
+              FROM {staging} s
+             WHERE NOT EXISTS (SELECT 1 FROM {table} t WHERE {staging_join})
+        """, params)
+        inserted = self.env.cr.rowcount
+        self.env.cr.execute(f"DROP TABLE {staging}")
+        
+        # Suppression des lignes absentes du fichier (clés restantes dans l'index) et des lignes sans clé
+        start = time.perf_counter()
+        deleted_table = f"{table}_cegid_deleted"
+        self.env.cr.execute(f"DROP TABLE IF EXISTS {deleted_table}")
+        self.env.cr.execute(f"CREATE TEMP TABLE {deleted_table} ON COMMIT DROP AS SELECT {keys_sql} FROM {table} WITH NO DATA")
+        self._copy_records(deleted_table, key_fields, (dict(zip(key_fields, key)) for key in hash_index))
+        key_join = ' AND '.join(f"d.{f} = t.{f}" for f in key_fields)
+        returning = f" RETURNING date_trunc('month', t.{period_field})::date" if period_field else ''
+        self.env.cr.execute(f"DELETE FROM {table} t USING {deleted_table} d WHERE {key_join}{returning}")
+        deleted = self.env.cr.rowcount
+        if period_field:
+            periods.update(row[0] for row in self.env.cr.fetchall() if row[0])
+        keys_null = ' OR '.join(f"t.{f} IS NULL" for f in key_fields)
+        self.env.cr.execute(f"DELETE FROM {table} t WHERE {keys_null}{returning}")
+        if self.env.cr.rowcount:
+            _logger.warning(f"     {self.env.cr.rowcount} lignes sans clé complète supprimées de {table}")
+        deleted += self.env.cr.rowcount
+        if period_field:
+            periods.update(row[0] for row in self.env.cr.fetchall() if row[0])
+        self.env.cr.execute(f"DROP TABLE {deleted_table}")
+        hash_index.clear()
+        delete_time = time.perf_counter() - start
+        
+        model_obj.invalidate_model()
+        return {
+            'mode': 'delta',
+            'inserted': inserted,
+            'updated': updated,
+            'deleted': deleted,
+            'unchanged': counters['unchanged'],
+            'hit_ratio': counters['unchanged'] / counters['total'] if counters['total'] else 0.0,
+            'delete_time': delete_time,
+            'periods': periods,
+        }
+
+    def _import_range(self, mapping_info, model_obj, columns, records_factory):
+        """
+        Mode 'range' : remplace uniquement la plage de dates présente dans le fichier (extraction de la
+        période ouverte par exemple) ; l'historique hors de cette plage est conservé.
+        Le fichier est chargé dans une table temporaire pour en connaître les dates mini et maxi, la plage
+        est vidée (partitions entières vidées par TRUNCATE si la table est partitionnée) puis rechargée.
+        Les lignes sans date ne sont remplacées que si le fichier en contient.
+        Retourne None si le mode range n'est pas applicable (le mode 'full' est alors utilisé)
+        """
+        cr = self.env.cr
+        table = model_obj._table
+        period_field = mapping_info['period_field']
+        if period_field not in columns:
+            _logger.warning(f"     Mode range impossible: colonne {period_field} absente du fichier")
+            return None
+        
+        model_obj.flush_model()
+        staging = f"{table}_cegid_range"
+        cr.execute(f"DROP TABLE IF EXISTS {staging}")
+        cr.execute(f"CREATE TEMP TABLE {staging} ON COMMIT DROP AS SELECT {', '.join(columns)} FROM {table} WITH NO DATA")
+        staged = self._copy_records(staging, columns, records_factory())
+        cr.execute(f"SELECT MIN({period_field}), MAX({period_field}), "
+                   f"COUNT(*) FILTER (WHERE {period_field} IS NULL) FROM {staging}")
+        date_min, date_max, without_date = cr.fetchone()
+        
+        start = time.perf_counter()
+        deleted = 0
+        periods = set()
+        if date_min:
+            date_from, date_to = self._get_range_bounds(mapping_info, date_min, date_max)
+            _logger.info(f"     {staged} lignes du {date_min} au {date_max}: remplacement de la plage "
+                         f"[{date_from}, {date_to}[ de {table}")
+            deleted = self._clear_period(table, period_field, date_from, date_to)
+            month = period_start(date_min, 'month')
+            while month <= period_start(date_max, 'month'):
+                periods.add(month)
+                month = next_period(month, 'month')
+        if without_date:
+            cr.execute(f"DELETE FROM {table} WHERE {period_field} IS NULL")
+            deleted += cr.rowcount
+        delete_time = time.perf_counter() - start
         
-        # Créer les enregistrements par lots pour de meilleures performances
+        cr.execute(f"""
+            INSERT INTO {table} ({', '.join(columns)}, create_uid, create_date, write_uid, write_date)
+            SELECT {', '.join(columns)}, %(uid)s, %(now)s, %(uid)s, %(now)s FROM {staging}
+        """, {'uid': self.env.uid, 'now': fields.Datetime.now()})
+        inserted = cr.rowcount
+        cr.execute(f"DROP TABLE {staging}")
+        
+        model_obj.invalidate_model()
+        return {'mode': 'range', 'inserted': inserted, 'updated': 0, 'deleted': deleted,
+                'unchanged': 0, 'hit_ratio': 0.0, 'delete_time': delete_time, 'periods': periods}
+
+    def _get_range_bounds(self, mapping_info, date_min, date_max):
+        """
+        Plage [début, fin[ remplacée par le mode 'range' pour les dates mini et maxi d'un fichier :
+        exactement du mini au maxi par défaut, sinon jours entiers ('range_period' = 'day')
+        ou mois entiers ('range_period' = 'month')
+        """
+        range_period = self._get_table_param(mapping_info, 'range_period', 'exact')
+        if range_period == 'month':
+            return period_start(date_min, 'month'), next_period(period_start(date_max, 'month'), 'month')
+        if range_period == 'day' or not isinstance(date_max, datetime):
+            date_min = date_min.date() if isinstance(date_min, datetime) else date_min
+            date_max = date_max.date() if isinstance(date_max, datetime) else date_max
+            return date_min, date_max + timedelta(days=1)
+        # Précision des dates PostgreSQL : la microseconde
+        return date_min, date_max + timedelta(microseconds=1)
+
+    def _clear_period(self, table, column, date_from, date_to):
+        """
+        Supprime les lignes dont 'column' est dans [date_from, date_to[.
+        Si la table est partitionnée, les partitions entièrement comprises dans la plage sont vidées
+        par TRUNCATE ; seules les partitions en bordure de plage sont traitées par DELETE.
+        Retourne le nombre de lignes supprimées
+        """
+        cr = self.env.cr
+        deleted = 0
+        if is_partitioned(cr, table):
+            # Bornes des partitions : dates ; bornes de la plage : dates ou dates et heures (range_period 'exact')
+            def as_datetime(value):
+                return value if isinstance(value, datetime) else datetime.combine(value, datetime.min.time())
+            date_from, date_to = as_datetime(date_from), as_datetime(date_to)
+            for name, p_start, p_end in list_partitions(cr, table):
+                if p_start and as_datetime(p_start) >= date_from and as_datetime(p_end) <= date_to:
+                    cr.execute(f"SELECT COUNT(*) FROM {name}")
+                    deleted += cr.fetchone()[0]
+                    cr.execute(f"TRUNCATE {name}")
+                    _logger.info(f"     Partition {name} vidée")
+        cr.execute(f"DELETE FROM {table} WHERE {column} >= %s AND {column} < %s", (date_from, date_to))
+        return deleted + cr.rowcount
+
+    def _import_swap(self, mapping_info, model_obj, columns, records_factory):
+        """
+        Mode 'swap' : charge le fichier dans une table miroir sans index, crée les index et contraintes
+        une fois le chargement terminé, puis remplace la table par renommage.
+        Pendant le chargement, la table reste lisible avec ses anciennes données et aucune ligne n'est verrouillée ;
+        le verrou exclusif n'est pris que pour les renommages, jusqu'au commit du fichier.
+        Retourne None si le mode swap n'est pas applicable (le mode 'full' est alors utilisé)
+        """
+        cr = self.env.cr
+        table = model_obj._table
+        shadow = f"{table}_cegid_shadow"
+        old = f"{table}_cegid_old"
+        prefix = f"cegid_sw_{hashlib.md5(table.encode()).hexdigest()[:8]}"
+        
+        # La table miroir ne serait pas partitionnée : le mode 'full' vide les partitions
+        if is_partitioned(cr, table):
+            _logger.warning(f"     Mode swap impossible: la table {table} est partitionnée")
+            return None
+        
+        # Une table référencée par une clé étrangère ne peut pas être remplacée
+        cr.execute("SELECT COUNT(*) FROM pg_constraint WHERE confrelid = %s::regclass", (table,))
+        if cr.fetchone()[0]:
+            _logger.warning(f"     Mode swap impossible: la table {table} est référencée par une clé étrangère")
+            return None
+        
+        model_obj.flush_model()
+        cr.execute(f"SELECT COUNT(*) FROM {table}")
+        count_before = cr.fetchone()[0]
+        
+        # Table miroir : même structure (colonnes, valeurs par défaut, NOT NULL, CHECK) mais sans index
+        cr.execute(f"DROP TABLE IF EXISTS {shadow}")
+        cr.execute(f"CREATE TABLE {shadow} (LIKE {table} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)")
+        now = fields.Datetime.now()
+        total_created = self._copy_records(shadow, columns, records_factory(), {
+            'create_uid': self.env.uid,
+            'create_date': now,
+            'write_uid': self.env.uid,
+            'write_date': now,
+        })
+        _logger.info(f"     {total_created} enregistrements chargés dans la table miroir {shadow}")
+        
+        # Recréer contraintes et index après le chargement, sous des noms temporaires
+        renames = []  # [(type, nom temporaire, nom d'origine), ...]
+        cr.execute("""
+            SELECT conname, pg_get_constraintdef(oid)
+              FROM pg_constraint
+             WHERE conrelid = %s::regclass AND contype IN ('p', 'u', 'f', 'x')
+             ORDER BY contype = 'f', conname
+        """, (table,))
+        for idx, (conname, condef) in enumerate(cr.fetchall()):
+            tmp_name = f"{prefix}_c{idx}"
+            cr.execute(f'ALTER TABLE {shadow} ADD CONSTRAINT {tmp_name} {condef}')
+            renames.append(('constraint', tmp_name, conname))
+        cr.execute("""
+            SELECT c.relname, pg_get_indexdef(i.indexrelid)
+              FROM pg_index i
+              JOIN pg_class c ON c.oid = i.indexrelid
+             WHERE i.indrelid = %s::regclass
+               AND NOT EXISTS (SELECT 1 FROM pg_constraint con WHERE con.conindid = i.indexrelid)
+             ORDER BY c.relname
+        """, (table,))
+        for idx, (indexname, indexdef) in enumerate(cr.fetchall()):
+            match = re.match(r'^CREATE (UNIQUE )?INDEX \S+ ON (?:ONLY )?\S+ (USING .*)$', indexdef)
+            if not match:
+                _logger.warning(f"     Index {indexname} non reproductible, ignoré: {indexdef}")
+                continue
+            tmp_name = f"{prefix}_i{idx}"
+            cr.execute(f"CREATE {match.group(1) or ''}INDEX {tmp_name} ON {shadow} {match.group(2)}")
+            renames.append(('index', tmp_name, indexname))
+        _logger.info(f"     {len(renames)} index/contraintes créés sur {shadow}")
+        
+        # Échange : verrou court, le temps des renommages
+        cr.execute("SET LOCAL lock_timeout = '60s'")
+        cr.execute(f"LOCK TABLE {table} IN ACCESS EXCLUSIVE MODE")
+        cr.execute("SELECT pg_get_serial_sequence(%s, 'id')", (table,))
+        sequence = cr.fetchone()[0]
+        if sequence:
+            # La séquence des id appartient à l'ancienne table : elle serait supprimée avec elle
+            cr.execute(f"ALTER SEQUENCE {sequence} OWNED BY {shadow}.id")
+        cr.execute(f"ALTER TABLE {table} RENAME TO {old}")
+        cr.execute(f"ALTER TABLE {shadow} RENAME TO {table}")
+        cr.execute(f"DROP TABLE {old}")
+        for kind, tmp_name, orig_name in renames:
+            if kind == 'constraint':
+                cr.execute(f'ALTER TABLE {table} RENAME CONSTRAINT {tmp_name} TO "{orig_name}"')
+            else:
+                cr.execute(f'ALTER INDEX {tmp_name} RENAME TO "{orig_name}"')
+        cr.execute("SET LOCAL lock_timeout TO DEFAULT")
+        cr.execute(f"ANALYZE {table}")
+        _logger.info(f"     Table {table} remplacée par {shadow} ({count_before} anciens enregistrements)")
+        
+        model_obj.invalidate_model()
+        return {'mode': 'swap', 'inserted': total_created, 'updated': 0, 'deleted': count_before,
+                'unchanged': 0, 'hit_ratio': 0.0}
+
+    def _load_records(self, mapping_info, model_obj, columns, records_factory):
+        """
+        Insère les enregistrements selon le chargeur configuré pour ce modèle
+        :param records_factory: fonction sans argument qui retourne un nouvel itérateur
+                                d'enregistrements (permet de relire le fichier en cas de repli sur l'ORM)
+        """
+        if mapping_info.get('loader') == 'copy':
+            try:
+                with self.env.cr.savepoint():
+                    return self._load_records_copy(model_obj, columns, records_factory())
+            except UnicodeDecodeError:
+                raise
+            except Exception as e:
+                _logger.warning(f"     COPY impossible ({str(e)}), repli sur l'ORM")
+        return self._load_records_orm(model_obj, records_factory())
+
+    def _load_records_orm(self, model_obj, records):
+        """
+        Crée les enregistrements via l'ORM par lots de 1000
+        Retourne le nombre d'enregistrements créés
+        """
         batch_size = 1000
         total_created = 0
-        total_records = len(records_to_create)
-        _logger.info(f"     Début de l'insertion de {total_records} enregistrements...")
+        _logger.info(f"     Début de l'insertion (ORM)...")
         
-        for i in range(0, total_records, batch_size):
-            batch = records_to_create[i:i + batch_size]
+        for batch in _iter_batches(records, batch_size):
             model_obj.create(batch)
             total_created += len(batch)
-            if total_records > batch_size:
-                _logger.info(f"     Progression: {total_created}/{total_records} enregistrements créés ({int(total_created/total_records*100)}%)")
+            if total_created % (batch_size * 100) == 0:
+                _logger.info(f"     Progression: {total_created} enregistrements créés")
+        return total_created
+
+    def _load_records_copy(self, model_obj, columns, records):
+        """
+        Insère les enregistrements directement dans la table avec COPY ... FROM STDIN
+        Les colonnes techniques (create_uid, create_date, write_uid, write_date) sont renseignées ici
+        car l'ORM n'intervient pas.
+        Retourne le nombre d'enregistrements insérés
+        """
+        _logger.info(f"     Début de l'insertion (COPY)...")
         
-        _logger.info(f"     Import terminé: {total_created} enregistrements créés dans {model_name}")
-        result['success'] = True
-        result['records'] = total_created
-        result['table'] = model_obj._table
-        return result
+        # Les modifications en attente doivent être écrites avant d'accéder directement à la table
+        model_obj.flush_model()
+        
+        now = fields.Datetime.now()
+        technical_values = {
+            'create_uid': self.env.uid,
+            'create_date': now,
+            'write_uid': self.env.uid,
+            'write_date': now,
+        }
+        total_created = self._copy_records(model_obj._table, columns, records, technical_values)
+        
+        # Le cache de l'ORM ne connaît pas les lignes insérées par COPY
+        model_obj.invalidate_model()
+        return total_created
+
+    def _copy_records(self, table, columns, records, constant_values=None):
+        """
+        Envoie des enregistrements (dict) dans une table PostgreSQL avec COPY ... FROM STDIN, par lots de 10000
+        :param constant_values: dict {colonne: valeur} identique pour toutes les lignes
+        Retourne le nombre de lignes copiées
+        """
+        batch_size = 10000
+        total_copied = 0
+        constant_values = constant_values or {}
+        all_columns = list(columns) + list(constant_values)
+        constant_part = ''.join(f"\t{_copy_format_value(v)}" for v in constant_values.values())
+        sql = f'COPY {table} ({", ".join(all_columns)}) FROM STDIN'
+        
+        for batch in _iter_batches(records, batch_size):
+            buffer = io.StringIO()
+            for vals in batch:
+                line = '\t'.join(_copy_format_value(vals.get(col)) for col in columns)
+                buffer.write(f"{line}{constant_part}\n")
+            buffer.seek(0)
+            self.env.cr.copy_expert(sql, buffer)
+            total_copied += len(batch)
+            if total_copied % (batch_size * 10) == 0:
+                _logger.info(f"     Progression: {total_copied} lignes copiées dans {table}")
+        return total_copied
 
     def _move_file_to_folder(self, filepath, folder_name):
         """
         Déplace un fichier dans un sous-dossier avec la date/heure au début du nom
+        Dans le dossier 'archive', le fichier est écrit au format d'archivage configuré (compressé ou Parquet)
         :param filepath: chemin complet du fichier à déplacer
         :param folder_name: nom du sous-dossier de destination ('archive' ou 'anomalie')
         """
@@ -328,15 +1527,377 @@ class IsCegidImport(models.Model):
         new_filename = f"{timestamp}_{filename}"
         new_filepath = os.path.join(dest_dir, new_filename)
         
-        os.rename(filepath, new_filepath)
-        _logger.info(f"     Fichier déplacé: {filename} -> {folder_name}/{new_filename}")
+        writer = self._get_archive_writer(LocalFileSource(filepath)) if folder_name == 'archive' else None
+        if writer:
+            new_filepath = writer(filepath, new_filepath)
+            os.unlink(filepath)
+        else:
+            os.rename(filepath, new_filepath)
+        _logger.info(f"     Fichier déplacé: {filename} -> {folder_name}/{os.path.basename(new_filepath)}")
         return new_filepath
 
+    def _get_archive_format(self):
+        """
+        Format d'archivage des fichiers importés (paramètre système 'is_cegid2odoo.archive_format') :
+        'gzip' (par défaut), 'zstd', 'parquet' ou 'csv' (fichier d'origine non compressé)
+        """
+        value = self.env['ir.config_parameter'].sudo().get_param('is_cegid2odoo.archive_format', 'gzip')
+        return resolve_archive_format((value or 'gzip').strip().lower())
+
+    def _get_archive_writer(self, source):
+        """
+        Prépare l'écriture d'une source importée au format d'archivage configuré
+        Retourne None (fichier conservé tel quel) ou une fonction writer(chemin du CSV, chemin de destination)
+        qui retourne le chemin de l'archive ; elle n'accède pas à la base (utilisable dans un thread)
+        """
+        archive_format = self._get_archive_format()
+        if archive_format == 'csv':
+            return None
+        if archive_format == 'parquet':
+            encoding, delimiter, columns = self._detect_csv_format(source)
+            mapping_info = self._detect_model_from_columns(columns) if columns else None
+            if mapping_info:
+                model_name = mapping_info['model']
+                file_column_mapping = self._get_file_column_mapping(columns, mapping_info['fields'])
+                column_plan = self._get_column_plan(columns, file_column_mapping, self.env[model_name])
+                encodings = self._get_encodings(encoding)
+                return lambda src_path, dest_path: _write_parquet_archive(
+                    src_path, dest_path, model_name, encodings, delimiter, column_plan)
+            archive_format = 'gzip'
+        return lambda src_path, dest_path: compress_file(src_path, dest_path, archive_format)
+
+    def _get_archive_model(self, path):
+        """
+        Modèle Odoo d'un fichier archivé (métadonnées Parquet, ou en-tête du CSV), ou None
+        """
+        if path.endswith('.parquet'):
+            return read_parquet_metadata(path)[0].get('model')
+        encoding, delimiter, columns = self._detect_csv_format(ArchiveSource(path))
+        mapping_info = self._detect_model_from_columns(columns) if columns else None
+        return mapping_info and mapping_info['model']
+
+    def _apply_archive_retention(self, archive_dir):
+        """
+        Supprime les archives trop anciennes du dossier indiqué :
+        - paramètre système 'is_cegid2odoo.archive_retention_days' : nombre de jours conservés
+        - paramètre système 'is_cegid2odoo.archive_retention_versions' : nombre d'archives conservées par table
+        Sans paramètre (ou 0), les archives sont conservées indéfiniment.
+        Retourne le nombre d'archives supprimées
+        """
+        params = self.env['ir.config_parameter'].sudo()
+        try:
+            days = int(params.get_param('is_cegid2odoo.archive_retention_days') or 0)
+            versions = int(params.get_param('is_cegid2odoo.archive_retention_versions') or 0)
+        except ValueError:
+            _logger.warning("  -> Paramètres de rétention des archives invalides, aucune archive supprimée")
+            return 0
+        if not (days or versions) or not os.path.isdir(archive_dir):
+            return 0
+        
+        archives = []
+        for name in os.listdir(archive_dir):
+            path = os.path.join(archive_dir, name)
+            if os.path.isfile(path) and not name.endswith('.part') and not name.startswith('.'):
+                archives.append((archive_date(path), path))
+        
+        expired = set()
+        if days:
+            limit = datetime.now() - timedelta(days=days)
+            expired.update(path for archived_at, path in archives if archived_at < limit)
+        if versions:
+            # Archives regroupées par table (ou par nom de fichier d'origine si la table n'est pas reconnue)
+            by_table = {}
+            for archived_at, path in archives:
+                try:
+                    group = self._get_archive_model(path) or original_name(path)
+                except Exception:
+                    group = original_name(path)
+                by_table.setdefault(group, []).append((archived_at, path))
+            for table_archives in by_table.values():
+                table_archives.sort(reverse=True)
+                expired.update(path for archived_at, path in table_archives[versions:])
+        
+        for path in expired:
+            os.unlink(path)
+            _logger.info(f"  -> Archive supprimée (rétention): {os.path.basename(path)}")
+        return len(expired)
+
+    def _find_archive(self, archive):
+        """
+        Chemin complet d'une archive : chemin donné, ou nom de fichier cherché dans les dossiers
+        'archive' des sociétés
+        """
+        if os.path.isfile(archive):
+            return archive
+        for company in self.env['res.company'].search([('is_cegid_csv_path', '!=', False)]):
+            path = os.path.join(company.is_cegid_csv_path, 'archive', archive)
+            if os.path.isfile(path):
+                return path
+        raise UserError(_("Archive Cegid introuvable : %s") % archive)
+
+    @api.model
+    def replay_archive(self, archive):
+        """
+        Recharge une archive (CSV, CSV compressé ou Parquet) dans la table is.cegid.* correspondante,
+        avec le mode d'import et le chargeur rapide habituels. L'archive n'est ni déplacée ni supprimée.
+        Exemple (odoo shell) : env['is.cegid.import'].replay_archive('20250630_120000_ECRITURE.csv.gz')
+        puis env.cr.commit()
+        :param archive: chemin complet, ou nom du fichier dans le dossier 'archive' d'une société
+        Retourne le dict résultat de l'import
+        """
+        path = self._find_archive(archive)
+        _logger.info(f"CEGID - Relecture de l'archive: {path}")
+        if not path.endswith('.parquet'):
+            return self._import_csv_file(ArchiveSource(path))
+        
+        # Archive Parquet : valeurs déjà converties, pas d'analyse du CSV
+        metadata, names = read_parquet_metadata(path)
+        mapping_info = self._get_cegid_table(metadata.get('model'))
+        if not mapping_info:
+            raise UserError(_("Modèle de l'archive Cegid non reconnu : %s") % metadata.get('model'))
+        model_obj = self.env[mapping_info['model']]
+        import_mode, key_fields = self._get_import_mode(mapping_info)
+        plan = {
+            'source': ArchiveSource(path),
+            'filename': metadata.get('source_fichier') or original_name(path),
+            'mapping_info': mapping_info,
+            'model': mapping_info['model'],
+            'columns': [name for name in names if name in model_obj._fields],
+            'import_mode': import_mode,
+            'key_fields': key_fields,
+        }
+        result = {'success': False, 'records': 0, 'table': '', 'error': ''}
+        return self._load_csv_import(plan, result, lambda: iter_parquet_records(path))
+
+    def _import_and_archive_file(self, filepath, spool_path=None):
+        """
+        Importe un fichier puis l'archive (succès, avec commit) ou le déplace en anomalie (échec, avec rollback)
+        L'import est validé avant le recalcul des synthèses et l'archivage (compression, Parquet) : le verrou
+        exclusif pris par le mode 'swap' (ou par TRUNCATE) est libéré dès la fin du chargement.
+        :param filepath: chemin d'un fichier local ou CegidImportSource (blob Azure, flux...)
+        Retourne le dict résultat de _import_csv_file, complété de la durée totale ('duration'),
+        du temps d'archivage (timings['archive']) et du pic de mémoire du processus pendant l'import
+        du fichier ('memory', en Mo)
+        """
+        source = self._as_source(filepath)
+        csv_file = source.name
+        _reset_peak_memory()
+        start = time.perf_counter()
+        try:
+            # Importer le fichier
+            result = self.with_context(cegid_defer_summaries=True)._import_csv_file(source, spool_path=spool_path)
+            pending_summaries = result.pop('pending_summaries', None)
+            if result['success']:
+                self.env.cr.commit()
+        
+        except Exception as e:
+            error_msg = str(e)
+            _logger.error(f"  -> ERREUR lors de l'import du fichier {csv_file}: {error_msg}")
+            self.env.cr.rollback()
+            # Déplacer le fichier en anomalie
+            try:
+                source.archive(self, 'anomalie')
+                _logger.warning(f"  -> Fichier déplacé en anomalie: {csv_file}")
+            except Exception as move_error:
+                _logger.error(f"  -> ERREUR lors du déplacement en anomalie: {str(move_error)}")
+            result = {'success': False, 'records': 0, 'table': '', 'error': error_msg}
+        
+        else:
+            if pending_summaries and result['success']:
+                self._refresh_committed_summaries(result, *pending_summaries)
+            archive_start = time.perf_counter()
+            try:
+                if result['success']:
+                    # Archiver le fichier
+                    source.archive(self, 'archive')
+                    _logger.info(f"  -> SUCCÈS: Fichier importé et archivé: {csv_file}")
+                else:
+                    # Déplacer le fichier en anomalie
+                    source.archive(self, 'anomalie')
+                    _logger.warning(f"  -> ÉCHEC: L'import du fichier a échoué, déplacé en anomalie: {csv_file}")
+            except Exception as e:
+                # Import déjà validé : le fichier resté en place sera réimporté à la prochaine exécution
+                _logger.error(f"  -> ERREUR lors de l'archivage du fichier {csv_file}: {str(e)}")
+            result.setdefault('timings', {})['archive'] = time.perf_counter() - archive_start
+        
+        result.setdefault('size', source.size)
+        result['duration'] = time.perf_counter() - start
+        result['memory'] = _peak_memory()
+        return result
+
+    def _get_blob_sources(self, company):
+        """
+        Liste les fichiers CSV du conteneur Azure de la société, à importer directement depuis le réseau
+        L'URL SAS est celle de la société, sinon celle fournie par l'API Cegid Data Access (cache partagé
+        des jetons de script-externe/cegid_common.py)
+        Retourne une liste de BlobSource
+        """
+        try:
+            from azure.storage.blob import ContainerClient
+        except ImportError:
+            _logger.error("  -> ERREUR: le paquet Python azure-storage-blob n'est pas installé")
+            return []
+        container_url = company.sudo().is_cegid_blob_url
+        if not container_url:
+            container_url = _import_script_externe('cegid_common').get_sas_url_from_api()
+        container_client = ContainerClient.from_container_url(container_url)
+        return [
+            BlobSource(container_client, blob, company.is_cegid_csv_path)
+            for blob in container_client.list_blobs()
+            if blob.name.lower().endswith('.csv')
+        ]
+
+    def _get_import_workers(self):
+        """
+        Nombre de processus pour l'import parallèle (paramètre système 'is_cegid2odoo.import_workers')
+        '0' ou 'auto' : un processus par CPU ; '1' ou absent : import séquentiel
+        """
+        value = self.env['ir.config_parameter'].sudo().get_param('is_cegid2odoo.import_workers', '1')
+        value = (value or '1').strip().lower()
+        if value in ('0', 'auto'):
+            return os.cpu_count() or 1
+        try:
+            return max(int(value), 1)
+        except ValueError:
+            _logger.warning(f"  -> Paramètre is_cegid2odoo.import_workers invalide: {value}")
+            return 1
+
+    def _import_files_parallel(self, filepaths, workers):
+        """
+        Import parallèle de plusieurs fichiers :
+        - lecture et conversion de chaque fichier dans un processus séparé (sans accès à la base)
+        - chargement en base dans un thread par modèle, chacun avec son propre curseur : deux fichiers
+          d'un même modèle ne sont jamais chargés en même temps (ils sont traités l'un après l'autre,
+          dans l'ordre du dossier, et protégés par un verrou consultatif PostgreSQL)
+        - archivage ou mise en anomalie de chaque fichier selon son propre résultat
+        Retourne une liste de tuples (chemin du fichier, résultat) dans l'ordre de filepaths
+        """
+        _logger.info(f"  -> Import parallèle de {len(filepaths)} fichier(s) sur {workers} processus")
+        results = {}
+        files_by_model = {}
+        
+        # Analyse des en-têtes : rapide, dans le processus principal
+        plans = {}
+        for filepath in filepaths:
+            try:
+                plan, result = self._prepare_csv_import(filepath)
+            except Exception:
+                plan = None
+            if not plan:
+                # Fichier non reconnu : traité (et mis en anomalie) comme en import séquentiel
+                results[filepath] = self._import_and_archive_file(filepath)
+                continue
+            plans[filepath] = plan
+            files_by_model.setdefault(plan['model'], []).append(filepath)
+        
+        def load_model_files(model_name, model_filepaths, futures):
+            """Charge les fichiers d'un modèle, dans l'ordre, sur un curseur dédié"""
+            threading.current_thread().dbname = self.env.cr.dbname
+            with self.pool.cursor() as cr:
+                env = self.env(cr=cr)
+                importer = env['is.cegid.import']
+                table = env[model_name]._table
+                for filepath in model_filepaths:
+                    _logger.info(f"  -> Traitement du fichier: {os.path.basename(filepath)}")
+                    try:
+                        spool_path = futures[filepath].result()
+                    except Exception as e:
+                        # Relecture dans ce thread : l'erreur est enregistrée et le fichier mis en anomalie
+                        _logger.error(f"  -> ERREUR lors de la lecture du fichier {os.path.basename(filepath)}: {str(e)}")
+                        results[filepath] = importer._import_and_archive_file(filepath)
+                        continue
+                    try:
+                        cr.execute("SELECT pg_advisory_xact_lock(hashtext(%s))", (table,))
+                        results[filepath] = importer._import_and_archive_file(filepath, spool_path=spool_path)
+                    finally:
+                        os.unlink(spool_path)
+        
+        with ProcessPoolExecutor(max_workers=workers, mp_context=get_context('fork')) as executor:
+            futures = {
+                filepath: executor.submit(
+                    _spool_csv_records, filepath, self._get_encodings(plan['encoding']),
+                    plan['delimiter'], plan['column_plan'])
+                for filepath, plan in plans.items()
+            }
+            threads = [
+                threading.Thread(target=load_model_files, args=(model_name, model_filepaths, futures),
+                                 name=f"cegid-import-{model_name}")
+                for model_name, model_filepaths in files_by_model.items()
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        
+        return [(filepath, results.get(filepath) or {
+            'success': False, 'records': 0, 'table': '', 'error': "Import interrompu"}) for filepath in filepaths]
+
+    def _import_folder(self, csv_path):
+        """
+        Importe les fichiers CSV d'un dossier local
+        Retourne une liste de tuples (nom du fichier, résultat), ou None si le dossier ne peut pas être lu
+        """
+        # Lister les fichiers CSV du dossier
+        try:
+            all_files = os.listdir(csv_path)
+            csv_files = [f for f in all_files 
+                        if f.lower().endswith('.csv') and not f.endswith('.archive')]
+        except PermissionError:
+            _logger.error(f"  -> ERREUR: Permission refusée pour accéder au dossier: {csv_path}")
+            return None
+        except Exception as e:
+            _logger.error(f"  -> ERREUR: Impossible de lister le dossier: {str(e)}")
+            return None
+        
+        if not csv_files:
+            _logger.info(f"  -> Aucun fichier CSV à importer dans ce dossier")
+            archived_files = [f for f in all_files if f.endswith('.archive')]
+            if archived_files:
+                _logger.info(f"  -> {len(archived_files)} fichier(s) déjà archivé(s) dans ce dossier")
+            return None
+        
+        _logger.info(f"  -> {len(csv_files)} fichier(s) CSV trouvé(s): {', '.join(csv_files)}")
+        
+        filepaths = [os.path.join(csv_path, csv_file) for csv_file in csv_files]
+        workers = self._get_import_workers()
+        if workers > 1 and len(filepaths) > 1:
+            results = self._import_files_parallel(filepaths, workers)
+        else:
+            results = []
+            for csv_file_idx, filepath in enumerate(filepaths, 1):
+                _logger.info(f"  -> Traitement du fichier ({csv_file_idx}/{len(filepaths)}): {os.path.basename(filepath)}")
+                results.append((filepath, self._import_and_archive_file(filepath)))
+        return [(os.path.basename(filepath), result) for filepath, result in results]
+
+    def _run_exclusive_import(self, label, method):
+        """
+        Exécute une tâche d'import sous le verrou consultatif IMPORT_LOCK : verrou de session, conservé
+        malgré les commit et rollback de chaque fichier. cron_import_csv_files et cron_cegid_pipeline ne
+        s'exécutent ainsi jamais en même temps ; la tâche est reportée si l'autre est en cours.
+        """
+        self.env.cr.execute("SELECT pg_try_advisory_lock(hashtext(%s))", (IMPORT_LOCK,))
+        if not self.env.cr.fetchone()[0]:
+            _logger.warning(f"{label} - Une autre tâche d'import Cegid est en cours, traitement reporté")
+            return False
+        try:
+            return method()
+        except Exception:
+            self.env.cr.rollback()
+            raise
+        finally:
+            self.env.cr.execute("SELECT pg_advisory_unlock(hashtext(%s))", (IMPORT_LOCK,))
+
     @api.model
     def cron_import_csv_files(self):
         """
         Tâche planifiée pour importer les fichiers CSV du dossier configuré
         """
+        return self._run_exclusive_import("CEGID IMPORT CSV", self._import_csv_files)
+
+    def _import_csv_files(self):
+        """
+        Transfert Azure puis import des fichiers CSV de chaque société (voir cron_import_csv_files)
+        """
         start_time = time.time()
         
         _logger.info("="*60)
@@ -358,11 +1919,16 @@ class IsCegidImport(models.Model):
             _logger.info("="*60)
             return True
         
+        # Historique de l'exécution (validé tout de suite : chaque fichier est validé ou annulé séparément)
+        run = self.env['is.cegid.import.run'].create({'name': f"Import du {fields.Datetime.now()}", 'origine': 'cron'})
+        self.env.cr.commit()
+        
         total_files_imported = 0
         total_files_error = 0
         # Listes pour le récapitulatif
-        imported_files = []  # [(filename, records, table), ...]
+        imported_files = []  # [(filename, records, table, detail), ...]
         error_files = []     # [(filename, error_message), ...]
+        archive_threads = []  # Archivages des blobs Azure en cours
         
         for company in companies:
             csv_path = company.is_cegid_csv_path
@@ -379,68 +1945,55 @@ class IsCegidImport(models.Model):
                 _logger.error(f"  -> ERREUR: Le dossier n'existe pas ou n'est pas accessible: {csv_path}")
                 continue
             
-            _logger.info(f"  -> Début de l'import depuis: {csv_path}")
-            
-            # Lister les fichiers CSV du dossier
-            try:
-                all_files = os.listdir(csv_path)
-                csv_files = [f for f in all_files 
-                            if f.lower().endswith('.csv') and not f.endswith('.archive')]
-            except PermissionError:
-                _logger.error(f"  -> ERREUR: Permission refusée pour accéder au dossier: {csv_path}")
-                continue
-            except Exception as e:
-                _logger.error(f"  -> ERREUR: Impossible de lister le dossier: {str(e)}")
-                continue
-            
-            if not csv_files:
-                _logger.info(f"  -> Aucun fichier CSV à importer dans ce dossier")
-                archived_files = [f for f in all_files if f.endswith('.archive')]
-                if archived_files:
-                    _logger.info(f"  -> {len(archived_files)} fichier(s) déjà archivé(s) dans ce dossier")
-                continue
-            
-            _logger.info(f"  -> {len(csv_files)} fichier(s) CSV trouvé(s): {', '.join(csv_files)}")
-            
-            for csv_file_idx, csv_file in enumerate(csv_files, 1):
-                filepath = os.path.join(csv_path, csv_file)
-                _logger.info(f"  -> Traitement du fichier ({csv_file_idx}/{len(csv_files)}): {csv_file}")
-                
+            if company.is_cegid_source == 'blob':
+                # Import direct depuis le conteneur Azure, sans fichier intermédiaire
+                _logger.info(f"  -> Début de l'import depuis le conteneur Azure")
                 try:
-                    # Importer le fichier
-                    result = self._import_csv_file(filepath)
-                    
-                    if result['success']:
-                        # Archiver le fichier
-                        self._move_file_to_folder(filepath, 'archive')
-                        self.env.cr.commit()
-                        _logger.info(f"  -> SUCCÈS: Fichier importé et archivé: {csv_file}")
-                        total_files_imported += 1
-                        imported_files.append((csv_file, result['records'], result['table']))
-                    else:
-                        # Déplacer le fichier en anomalie
-                        self._move_file_to_folder(filepath, 'anomalie')
-                        _logger.warning(f"  -> ÉCHEC: L'import du fichier a échoué, déplacé en anomalie: {csv_file}")
-                        total_files_error += 1
-                        error_files.append((csv_file, result['error']))
-                        
+                    sources = self._get_blob_sources(company)
                 except Exception as e:
-                    error_msg = str(e)
-                    _logger.error(f"  -> ERREUR lors de l'import du fichier {csv_file}: {error_msg}")
-                    self.env.cr.rollback()
-                    # Déplacer le fichier en anomalie
-                    try:
-                        self._move_file_to_folder(filepath, 'anomalie')
-                        _logger.warning(f"  -> Fichier déplacé en anomalie: {csv_file}")
-                    except Exception as move_error:
-                        _logger.error(f"  -> ERREUR lors du déplacement en anomalie: {str(move_error)}")
-                    total_files_error += 1
-                    error_files.append((csv_file, error_msg))
+                    _logger.error(f"  -> ERREUR: Impossible de lister le conteneur Azure: {str(e)}")
                     continue
+                if not sources:
+                    _logger.info(f"  -> Aucun fichier CSV à importer dans ce conteneur")
+                    continue
+                _logger.info(f"  -> {len(sources)} fichier(s) CSV trouvé(s): {', '.join(s.name for s in sources)}")
+                results = []
+                for source_idx, source in enumerate(sources, 1):
+                    _logger.info(f"  -> Traitement du fichier ({source_idx}/{len(sources)}): {source.name}")
+                    results.append((source.name, self._import_and_archive_file(source)))
+                    if source.archive_thread:
+                        archive_threads.append(source.archive_thread)
+            else:
+                _logger.info(f"  -> Début de l'import depuis: {csv_path}")
+                results = self._import_folder(csv_path)
+                if results is None:
+                    continue
+            
+            for csv_file, result in results:
+                run.add_result(csv_file, result)
+                if result['success']:
+                    total_files_imported += 1
+                    detail = (f"{result['mode']} +{result['inserted']} ~{result['updated']} -{result['deleted']} "
+                              f"={result['unchanged']} ({result['hit_ratio']:.0%})")
+                    imported_files.append((csv_file, result['records'], result['table'], detail))
+                else:
+                    total_files_error += 1
+                    error_files.append((csv_file, result['error']))
+            self.env.cr.commit()
             
             _logger.info(f"  -> Import terminé pour la société {company.name}")
         
+        # Attendre la fin des archivages asynchrones des blobs Azure
+        for thread in archive_threads:
+            thread.join()
+        
+        # Politique de rétention des archives
+        for company in companies:
+            if company.is_cegid_csv_path:
+                self._apply_archive_retention(os.path.join(company.is_cegid_csv_path, 'archive'))
+        
         elapsed_time = time.time() - start_time
+        run.close(elapsed_time)
         # Formater la durée de manière lisible
         if elapsed_time >= 60:
             minutes = int(elapsed_time // 60)
@@ -458,12 +2011,12 @@ class IsCegidImport(models.Model):
             _logger.info("")
             _logger.info("FICHIERS IMPORTÉS AVEC SUCCÈS:")
             _logger.info("-"*80)
-            _logger.info(f"{'Fichier':<50} {'Enregistrements':>15} {'Table Odoo':<20}")
+            _logger.info(f"{'Fichier':<50} {'Enregistrements':>15} {'Table Odoo':<25} {'Détail':<30}")
             _logger.info("-"*80)
-            for filename, records, table in imported_files:
+            for filename, records, table, detail in imported_files:
                 # Tronquer le nom du fichier si trop long
                 display_name = filename[:47] + '...' if len(filename) > 50 else filename
-                _logger.info(f"{display_name:<50} {records:>15} {table:<20}")
+                _logger.info(f"{display_name:<50} {records:>15} {table:<25} {detail:<30}")
             _logger.info("-"*80)
         
         # Afficher les fichiers en anomalie
@@ -487,3 +2040,271 @@ class IsCegidImport(models.Model):
         _logger.info("="*80)
         
         return True
+
+    def _get_pipeline_param(self, param, default):
+        """
+        Paramètre numérique de la chaîne export / import ('is_cegid2odoo.pipeline_<param>')
+        """
+        value = self.env['ir.config_parameter'].sudo().get_param(f'is_cegid2odoo.pipeline_{param}')
+        try:
+            return float(value) if value else default
+        except ValueError:
+            _logger.warning(f"  -> Paramètre is_cegid2odoo.pipeline_{param} invalide: {value}")
+            return default
+
+    def _list_pending_sources(self, company):
+        """
+        Liste les fichiers CSV en attente d'import pour une société (conteneur Azure ou dossier local)
+        Retourne une liste de CegidImportSource
+        """
+        if company.is_cegid_source == 'blob':
+            return self._get_blob_sources(company)
+        csv_path = company.is_cegid_csv_path
+        return [
+            LocalFileSource(os.path.join(csv_path, f))
+            for f in sorted(os.listdir(csv_path))
+            if f.lower().endswith('.csv') and not f.endswith('.archive')
+        ]
+
+    @api.model
+    def cron_cegid_pipeline(self):
+        """
+        Chaîne complète export Cegid -> import Odoo :
+        - déclenchement des requêtes planifiées Cegid (commande externe 'cegid-requetes')
+        - attente des extractions : le conteneur Azure (ou le dossier, après transfert) est interrogé
+          à intervalle croissant (de pipeline_poll_min à pipeline_poll_max secondes, remis au minimum
+          dès qu'un fichier arrive), jusqu'à ce que chaque modèle attendu soit importé ou jusqu'à
+          pipeline_timeout secondes
+        - chaque fichier est importé et archivé dès son arrivée, sans attendre les autres
+        Cette tâche déclenche les requêtes et fait la première vérification ; les suivantes sont des exécutions
+        distinctes de la tâche cron_cegid_pipeline_poll, programmées à la fin de chaque vérification :
+        aucune exécution n'attend, la durée maximale des tâches planifiées (limit_time_real) ne limite que
+        l'import des fichiers arrivés. L'état de l'attente est conservé dans l'exécution (is.cegid.import.run).
+        La durée de chaque étape (déclenchement, attente, transfert, import) est enregistrée dans le journal.
+        Paramètres système 'is_cegid2odoo.pipeline_timeout' (3600), 'is_cegid2odoo.pipeline_poll_min' (30),
+        'is_cegid2odoo.pipeline_poll_max' (300) et 'is_cegid2odoo.pipeline_models' (modèles attendus,
+        séparés par des virgules, par défaut tous les modèles des tables Cegid).
+        """
+        return self._run_exclusive_import("CEGID CHAÎNE EXPORT / IMPORT", self._start_cegid_pipeline)
+
+    @api.model
+    def cron_cegid_pipeline_poll(self):
+        """
+        Vérification suivante de la chaîne export / import en cours (voir cron_cegid_pipeline).
+        Sans chaîne en cours, la tâche ne fait rien ; si une autre tâche d'import est en cours,
+        la vérification est reportée de pipeline_poll_min secondes
+        """
+        if self._run_exclusive_import("CEGID CHAÎNE EXPORT / IMPORT", self._poll_cegid_pipeline) is False:
+            self._schedule_pipeline_poll(self._get_pipeline_param('poll_min', 30))
+        return True
+
+    def _schedule_pipeline_poll(self, delay):
+        """
+        Programme l'exécution de la tâche cron_cegid_pipeline_poll dans 'delay' secondes
+        """
+        cron = self.env.ref('is_cegid2odoo.ir_cron_cegid_pipeline_poll', raise_if_not_found=False)
+        if not cron:
+            _logger.error("Tâche planifiée de vérification de la chaîne export / import introuvable")
+            return
+        cron.sudo()._trigger(fields.Datetime.now() + timedelta(seconds=delay))
+
+    def _start_cegid_pipeline(self):
+        """
+        Déclenchement des requêtes et création de l'exécution en attente des fichiers (voir cron_cegid_pipeline)
+        """
+        Run = self.env['is.cegid.import.run']
+        for previous in Run.search([('origine', '=', 'pipeline'), ('state', '=', 'en_cours')]):
+            _logger.warning(f"Chaîne export / import précédente non terminée ({previous.name}), arrêtée")
+            self._close_cegid_pipeline(previous)
+        self.env.cr.commit()
+        
+        timeout = self._get_pipeline_param('timeout', 3600)
+        models_param = self.env['ir.config_parameter'].sudo().get_param('is_cegid2odoo.pipeline_models')
+        if models_param:
+            expected = {m.strip() for m in models_param.split(',') if m.strip()}
+        else:
+            expected = {mapping_info['model'] for mapping_info in self._get_cegid_tables()}
+        expected = sorted(model for model in expected if model in self.env)
+        
+        _logger.info("="*60)
+        _logger.info("CEGID CHAÎNE EXPORT / IMPORT - DÉBUT DU TRAITEMENT")
+        _logger.info(f"  Modèles attendus: {', '.join(expected)}")
+        _logger.info("="*60)
+        
+        # Étape 1 : déclenchement des requêtes Cegid
+        stage_start = time.time()
+        self._declencher_requetes_cegid()
+        trigger_duration = time.time() - stage_start
+        
+        companies = self.env['res.company'].search([('is_cegid_csv_path', '!=', False)])
+        if not companies.filtered(lambda c: os.path.isdir(c.is_cegid_csv_path)):
+            _logger.warning("Aucune société n'a de dossier CSV Cegid accessible")
+            return True
+        
+        now = fields.Datetime.now()
+        run = Run.create({
+            'name': f"Chaîne export / import du {now}",
+            'origine': 'pipeline',
+            'pipeline_attendus': ','.join(expected),
+            'pipeline_traites': '[]',
+            'pipeline_declenchement': now,
+            'pipeline_limite': now + timedelta(seconds=timeout),
+            'pipeline_intervalle': self._get_pipeline_param('poll_min', 30),
+            'duree_declenchement': trigger_duration,
+        })
+        self.env.cr.commit()
+        
+        # Étape 2 : première vérification, les suivantes sont programmées par _poll_cegid_pipeline
+        return self._poll_cegid_pipeline(run)
+
+    def _poll_cegid_pipeline(self, run=None):
+        """
+        Une vérification de la chaîne export / import en cours : transfert, import et archivage des fichiers
+        arrivés depuis la vérification précédente, puis programmation de la suivante, ou fin de la chaîne
+        quand tous les modèles attendus sont importés ou que le délai est dépassé
+        """
+        run = run or self.env['is.cegid.import.run'].search(
+            [('origine', '=', 'pipeline'), ('state', '=', 'en_cours')], order='date_debut desc', limit=1)
+        if not run:
+            return True
+        poll_min = self._get_pipeline_param('poll_min', 30)
+        poll_max = self._get_pipeline_param('poll_max', 300)
+        expected_tables = {self.env[model]._table: model
+                           for model in (run.pipeline_attendus or '').split(',') if model in self.env}
+        # (nom, version) des fichiers déjà traités : jamais réimportés pendant la chaîne
+        processed = {tuple(item) for item in json.loads(run.pipeline_traites or '[]')}
+        companies = self.env['res.company'].search([('is_cegid_csv_path', '!=', False)])
+        companies = companies.filtered(lambda c: os.path.isdir(c.is_cegid_csv_path))
+        
+        transfer_duration = 0.0
+        if companies.filtered(lambda c: c.is_cegid_source != 'blob'):
+            stage_start = time.time()
+            self._transfert_azure_cegid()
+            transfer_duration = time.time() - stage_start
+        
+        landed = False
+        archive_threads = []
+        for company in companies:
+            try:
+                sources = self._list_pending_sources(company)
+            except Exception as e:
+                _logger.error(f"  -> ERREUR: Impossible de lister les fichiers de {company.name}: {str(e)}")
+                continue
+            for source in sources:
+                if (source.name, source.version) in processed:
+                    continue
+                processed.add((source.name, source.version))
+                landed = True
+                waited = (fields.Datetime.now() - run.pipeline_declenchement).total_seconds()
+                _logger.info(f"  -> Fichier arrivé après {waited:.0f} s: {source.name}")
+                result = self._import_and_archive_file(source)
+                if getattr(source, 'archive_thread', None):
+                    archive_threads.append(source.archive_thread)
+                run.add_result(source.name, result)
+                if result['success']:
+                    expected_tables.pop(result['table'], None)
+                # État enregistré après chaque fichier : un fichier importé n'est jamais réimporté
+                run.write({
+                    'pipeline_attendus': ','.join(sorted(expected_tables.values())),
+                    'pipeline_traites': json.dumps(sorted(processed, key=str)),
+                })
+                self.env.cr.commit()
+        
+        for thread in archive_threads:
+            thread.join()
+        run.write({
+            'nb_verifications': run.nb_verifications + 1,
+            'duree_transfert': run.duree_transfert + transfer_duration,
+        })
+        
+        remaining = (run.pipeline_limite - fields.Datetime.now()).total_seconds()
+        if not expected_tables or remaining <= 0:
+            self._close_cegid_pipeline(run)
+            return True
+        
+        # Intervalle adaptatif : court quand les fichiers arrivent, de plus en plus long sinon
+        interval = poll_min if landed else min(run.pipeline_intervalle * 1.5, poll_max)
+        run.pipeline_intervalle = interval
+        self.env.cr.commit()
+        _logger.info(f"  -> En attente de: {', '.join(sorted(expected_tables.values()))} "
+                     f"(prochaine vérification dans {min(interval, remaining):.0f} s)")
+        self._schedule_pipeline_poll(min(interval, remaining))
+        return True
+
+    def _close_cegid_pipeline(self, run):
+        """
+        Termine une chaîne export / import et affiche son récapitulatif
+        """
+        run.close((fields.Datetime.now() - run.date_debut).total_seconds())
+        
+        _logger.info("="*80)
+        _logger.info("CEGID CHAÎNE EXPORT / IMPORT - RÉCAPITULATIF")
+        _logger.info("="*80)
+        _logger.info(f"Déclenchement des requêtes: {run.duree_declenchement:.2f} s")
+        _logger.info(f"Transferts Azure -> dossier: {run.duree_transfert:.2f} s")
+        _logger.info(f"Vérifications: {run.nb_verifications}")
+        if run.line_ids:
+            _logger.info("-"*80)
+            _logger.info(f"{'Fichier':<40} {'Table Odoo':<25} {'Import':>10} {'Enregistrements':>15}")
+            _logger.info("-"*80)
+            for line in run.line_ids.sorted('id'):
+                display_name = line.fichier[:37] + '...' if len(line.fichier) > 40 else line.fichier
+                status = '' if line.success else ' ERREUR'
+                _logger.info(f"{display_name:<40} {line.table or '':<25} {line.duree:>9.2f}s "
+                             f"{line.nb_lignes:>15}{status}")
+            _logger.info("-"*80)
+        if run.pipeline_attendus:
+            _logger.warning(f"Fichiers non reçus avant le {run.pipeline_limite}: "
+                            f"{', '.join(run.pipeline_attendus.split(','))}")
+        _logger.info(f"Durée totale: {run.duree:.2f} secondes")
+        _logger.info("="*80)
+        return True
+
+    def _get_partition_granularity(self, mapping_info):
+        """
+        Découpage ('year' ou 'month') demandé pour une table, ou None si elle ne doit pas être partitionnée
+        """
+        granularity = self._get_table_param(mapping_info, 'partition')
+        if not granularity or granularity in ('0', 'none'):
+            return None
+        if granularity not in PARTITION_GRANULARITIES or not mapping_info.get('period_field'):
+            _logger.warning(f"Partitionnement '{granularity}' impossible pour {mapping_info['model']}")
+            return None
+        return granularity
+
+    def cron_cegid_partitions(self):
+        """
+        Tâche planifiée de gestion des tables partitionnées (paramètre 'partition' des tables) :
+        - transforme en table partitionnée une table qui ne l'est pas encore (verrou exclusif pendant la copie)
+        - crée les partitions manquantes jusqu'à la période en cours, plus 'is_cegid2odoo.partition_ahead'
+          périodes à venir (1 par défaut), et y déplace les lignes rangées dans la partition par défaut
+        - les partitions ne remontent pas plus de 'is_cegid2odoo.partition_years' années en arrière (20 par défaut) :
+          les lignes plus anciennes (dates aberrantes) restent dans la partition par défaut
+        """
+        ahead = int(self.env['ir.config_parameter'].sudo().get_param('is_cegid2odoo.partition_ahead', 1))
+        years = int(self.env['ir.config_parameter'].sudo().get_param('is_cegid2odoo.partition_years', 20))
+        since = date(fields.Date.today().year - years, 1, 1)
+        for mapping_info in self._get_cegid_tables():
+            granularity = self._get_partition_granularity(mapping_info)
+            if not granularity:
+                continue
+            model_obj = self.env[mapping_info['model']]
+            table = model_obj._table
+            column = mapping_info['period_field']
+            until = next_period(period_start(fields.Date.today(), granularity), granularity, ahead)
+            try:
+                model_obj.flush_model()
+                if is_partitioned(self.env.cr, table):
+                    if ensure_id_key(self.env.cr, table, column):
+                        _logger.info(f"CEGID - {table}: contrainte d'unicité des id créée")
+                    created = ensure_partitions(self.env.cr, table, column, granularity, until, since)
+                    _logger.info(f"CEGID - {table}: {len(created)} partitions créées")
+                else:
+                    _logger.info(f"CEGID - Partitionnement de {table} par {granularity} sur {column}")
+                    convert_to_partitioned(self.env.cr, table, column, granularity, until, since)
+                self.env.cr.commit()
+            except Exception as e:
+                self.env.cr.rollback()
+                _logger.error(f"CEGID - ERREUR lors du partitionnement de {table}: {str(e)}")
+            model_obj.invalidate_model()
+        return True
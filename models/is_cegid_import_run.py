@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+
+from odoo import models, fields, api
+
+
+class IsCegidImportRun(models.Model):
+    _name = 'is.cegid.import.run'
+    _description = 'Cegid - Exécution des imports'
+    _order = 'date_debut desc'
+
+    name = fields.Char(string='Exécution', required=True)
+    origine = fields.Selection([
+        ('cron', 'Import CSV'),
+        ('pipeline', 'Chaîne export / import'),
+    ], string='Origine', default='cron', required=True)
+    state = fields.Selection([
+        ('en_cours', 'En cours'),
+        ('termine', 'Terminé'),
+        ('anomalie', 'Terminé avec anomalies'),
+    ], string='État', default='en_cours', required=True)
+    date_debut = fields.Datetime(string='Début', default=fields.Datetime.now, required=True)
+    date_fin = fields.Datetime(string='Fin')
+    duree = fields.Float(string='Durée (s)', digits=(12, 2))
+    line_ids = fields.One2many('is.cegid.import.run.line', 'run_id', string='Fichiers')
+    nb_fichiers = fields.Integer(string='Fichiers', compute='_compute_totaux', store=True)
+    nb_erreurs = fields.Integer(string='Fichiers en anomalie', compute='_compute_totaux', store=True)
+    nb_lignes = fields.Integer(string='Lignes', compute='_compute_totaux', store=True)
+    taille = fields.Float(string='Taille (Mo)', digits=(12, 2), compute='_compute_totaux', store=True)
+    # Chaîne export / import : état de l'attente des fichiers, conservé d'une vérification à l'autre
+    # (IsCegidImport.cron_cegid_pipeline_poll)
+    pipeline_attendus = fields.Char(string='Modèles attendus', help="Modèles dont le fichier n'est pas encore importé")
+    pipeline_traites = fields.Text(string='Fichiers traités', help="Nom et version des fichiers déjà traités (JSON)")
+    pipeline_declenchement = fields.Datetime(string='Déclenchement des requêtes')
+    pipeline_limite = fields.Datetime(string="Fin de l'attente")
+    pipeline_intervalle = fields.Float(string='Intervalle de vérification (s)', digits=(12, 0))
+    duree_declenchement = fields.Float(string='Déclenchement (s)', digits=(12, 2))
+    duree_transfert = fields.Float(string='Transferts (s)', digits=(12, 2))
+    nb_verifications = fields.Integer(string='Vérifications')
+
+    @api.depends('line_ids.success', 'line_ids.nb_lignes', 'line_ids.taille')
+    def _compute_totaux(self):
+        for run in self:
+            run.nb_fichiers = len(run.line_ids)
+            run.nb_erreurs = len(run.line_ids.filtered(lambda l: not l.success))
+            run.nb_lignes = sum(run.line_ids.mapped('nb_lignes'))
+            run.taille = sum(run.line_ids.mapped('taille'))
+
+    def add_result(self, filename, result):
+        """
+        Enregistre le résultat de l'import d'un fichier (dict retourné par _import_and_archive_file)
+        """
+        self.ensure_one()
+        timings = result.get('timings') or {}
+        return self.env['is.cegid.import.run.line'].create({
+            'run_id': self.id,
+            'fichier': filename,
+            'modele': result.get('model') or False,
+            'table': result.get('table') or False,
+            'mode': result.get('mode') or False,
+            'success': result.get('success', False),
+            'erreur': result.get('error') or False,
+            'taille': (result.get('size') or 0) / (1024 * 1024),
+            'nb_lignes': (result.get('inserted', 0) + result.get('updated', 0) + result.get('unchanged', 0)),
+            'nb_crees': result.get('inserted', 0),
+            'nb_modifies': result.get('updated', 0),
+            'nb_supprimes': result.get('deleted', 0),
+            'nb_inchanges': result.get('unchanged', 0),
+            'duree_lecture': timings.get('parse', 0.0),
+            'duree_conversion': timings.get('convert', 0.0),
+            'duree_suppression': timings.get('delete', 0.0),
+            'duree_insertion': timings.get('insert', 0.0),
+            'duree_synthese': timings.get('summary', 0.0),
+            'duree_archivage': timings.get('archive', 0.0),
+            'duree': result.get('duration', 0.0),
+            'memoire_max': result.get('memory', 0.0),
+        })
+
+    def close(self, duree):
+        """
+        Termine l'exécution
+        """
+        for run in self:
+            run.write({
+                'date_fin': fields.Datetime.now(),
+                'duree': duree,
+                'state': 'anomalie' if run.nb_erreurs else 'termine',
+            })
+
+
+class IsCegidImportRunLine(models.Model):
+    _name = 'is.cegid.import.run.line'
+    _description = "Cegid - Import d'un fichier"
+    _order = 'date desc, id'
+
+    run_id = fields.Many2one('is.cegid.import.run', string='Exécution', required=True, ondelete='cascade', index=True)
+    date = fields.Datetime(string='Date', related='run_id.date_debut', store=True)
+    fichier = fields.Char(string='Fichier', required=True)
+    modele = fields.Char(string='Modèle Odoo')
+    table = fields.Char(string='Table')
+    mode = fields.Char(string="Mode d'import")
+    success = fields.Boolean(string='Succès')
+    erreur = fields.Text(string='Erreur')
+    taille = fields.Float(string='Taille (Mo)', digits=(12, 2), group_operator='sum')
+    nb_lignes = fields.Integer(string='Lignes')
+    nb_crees = fields.Integer(string='Créées')
+    nb_modifies = fields.Integer(string='Modifiées')
+    nb_supprimes = fields.Integer(string='Supprimées')
+    nb_inchanges = fields.Integer(string='Inchangées')
+    duree_lecture = fields.Float(string='Lecture CSV (s)', digits=(12, 2))
+    duree_conversion = fields.Float(string='Conversion (s)', digits=(12, 2))
+    duree_suppression = fields.Float(string='Suppression (s)', digits=(12, 2))
+    duree_insertion = fields.Float(string='Insertion (s)', digits=(12, 2))
+    duree_synthese = fields.Float(string='Synthèses (s)', digits=(12, 2))
+    duree_archivage = fields.Float(string='Archivage (s)', digits=(12, 2))
+    duree = fields.Float(string='Durée totale (s)', digits=(12, 2))
+    lignes_par_seconde = fields.Float(string='Lignes / s', digits=(12, 0), compute='_compute_lignes_par_seconde',
+                                      store=True, group_operator='avg')
+    memoire_max = fields.Float(string='Mémoire max (Mo)', digits=(12, 1), group_operator='max',
+                               help="Pic de mémoire résidente du processus Odoo pendant l'import du fichier "
+                                    "(Linux ; ailleurs, pic depuis le démarrage du processus). En import parallèle, "
+                                    "pic commun aux fichiers chargés en même temps")
+
+    @api.depends('nb_lignes', 'duree')
+    def _compute_lignes_par_seconde(self):
+        for line in self:
+            line.lignes_par_seconde = line.nb_lignes / line.duree if line.duree else 0.0
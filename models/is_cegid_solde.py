@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+
+import logging
+
+from odoo import models, fields, api
+
+from .cegid_partition import next_period
+
+_logger = logging.getLogger(__name__)
+
+
+class IsCegidSoldeMixin(models.AbstractModel):
+    """
+    Table de synthèse mensuelle d'une table Cegid (débit, crédit, solde et nombre de lignes par mois),
+    recalculée par l'import à la fin du chargement de la table source
+    """
+    _name = 'is.cegid.solde.mixin'
+    _description = 'Cegid - Synthèse mensuelle'
+    _order = 'mois desc'
+
+    # Modèle source, champ date, champs de regroupement (champ de synthèse => champ source) et montants
+    _source_model = None
+    _date_field = None
+    _group_fields = {}
+    _debit_field = None
+    _credit_field = None
+
+    mois = fields.Date(string='Mois', index=True, readonly=True)
+    debit = fields.Float(string='Débit', digits=(16, 2), readonly=True)
+    credit = fields.Float(string='Crédit', digits=(16, 2), readonly=True)
+    solde = fields.Float(string='Solde', digits=(16, 2), readonly=True)
+    nb_lignes = fields.Integer(string='Lignes', readonly=True)
+
+    def init(self):
+        # Premier calcul à l'installation du module, si la table source contient déjà des données
+        if not self._source_model:
+            return
+        self.env.cr.execute(f"SELECT 1 FROM {self._table} LIMIT 1")
+        if not self.env.cr.fetchone():
+            self.refresh_summary()
+
+    @api.model
+    def refresh_summary(self, periods=None):
+        """
+        Recalcule la synthèse à partir de la table source
+        :param periods: mois (date du 1er jour) à recalculer ; None pour tout recalculer
+        Les lignes sans date ne sont pas reprises.
+        Retourne le nombre de lignes de synthèse écrites
+        """
+        cr = self.env.cr
+        source = self.env[self._source_model]
+        source.flush_model()
+        date_field = self._date_field
+        summary_fields = list(self._group_fields)
+        source_fields = [self._group_fields[f] for f in summary_fields]
+        params = {'uid': self.env.uid, 'now': fields.Datetime.now(), 'periods': sorted(periods or [])}
+        period_sql = ''
+        if periods is not None:
+            if not periods:
+                return 0
+            # Une plage [début, fin[ par suite de mois consécutifs : la condition utilise l'index du champ date
+            ranges = []
+            for month in params['periods']:
+                if ranges and ranges[-1][1] == month:
+                    ranges[-1][1] = next_period(month, 'month')
+                else:
+                    ranges.append([month, next_period(month, 'month')])
+            conditions = []
+            for i, (date_from, date_to) in enumerate(ranges):
+                params.update({f'from_{i}': date_from, f'to_{i}': date_to})
+                conditions.append(f"({date_field} >= %(from_{i})s AND {date_field} < %(to_{i})s)")
+            period_sql = f"AND ({' OR '.join(conditions)})"
+            cr.execute(f"DELETE FROM {self._table} WHERE mois = ANY(%(periods)s::date[])", params)
+        else:
+            cr.execute(f"DELETE FROM {self._table}")
+        cr.execute(f"""
+            INSERT INTO {self._table} (mois, {', '.join(summary_fields)}, debit, credit, solde, nb_lignes,
+                                       create_uid, create_date, write_uid, write_date)
+            SELECT date_trunc('month', {date_field})::date, {', '.join(source_fields)},
+                   COALESCE(SUM({self._debit_field}), 0), COALESCE(SUM({self._credit_field}), 0),
+                   COALESCE(SUM({self._debit_field}), 0) - COALESCE(SUM({self._credit_field}), 0), COUNT(*),
+                   %(uid)s, %(now)s, %(uid)s, %(now)s
+              FROM {source._table}
+             WHERE {date_field} IS NOT NULL {period_sql}
+             GROUP BY 1, {', '.join(source_fields)}
+        """, params)
+        count = cr.rowcount
+        self.invalidate_model()
+        _logger.info(f"     Synthèse {self._name} recalculée "
+                     f"({'tous les mois' if periods is None else f'{len(periods)} mois'}, {count} lignes)")
+        return count
+
+
+class IsCegidEcritureSolde(models.Model):
+    _name = 'is.cegid.ecriture.solde'
+    _inherit = 'is.cegid.solde.mixin'
+    _description = 'Cegid - Soldes comptables mensuels'
+    _order = 'mois desc, e_general, e_journal'
+
+    _source_model = 'is.cegid.ecriture'
+    _date_field = 'e_datecomptable'
+    _group_fields = {'e_general': 'e_general', 'e_journal': 'e_journal'}
+    _debit_field = 'e_debit'
+    _credit_field = 'e_credit'
+
+    e_general = fields.Char(string='Général', index=True, readonly=True)
+    e_journal = fields.Char(string='Journal', index=True, readonly=True)
+
+
+class IsCegidAnalytiqSolde(models.Model):
+    _name = 'is.cegid.analytiq.solde'
+    _inherit = 'is.cegid.solde.mixin'
+    _description = 'Cegid - Soldes analytiques mensuels'
+    _order = 'mois desc, y_axe, y_section'
+
+    _source_model = 'is.cegid.analytiq'
+    _date_field = 'y_datecomptable'
+    _group_fields = {'y_axe': 'y_axe', 'y_section': 'y_section'}
+    _debit_field = 'y_debit'
+    _credit_field = 'y_credit'
+
+    y_axe = fields.Char(string='Axe', index=True, readonly=True)
+    y_section = fields.Char(string='Section', index=True, readonly=True)
@@ -10,3 +10,17 @@ class ResCompany(models.Model):
         string='Chemin dossier CSV Cegid',
         help="Chemin absolu vers le dossier contenant les fichiers CSV Cegid à importer"
     )
+    is_cegid_source = fields.Selection([
+        ('folder', 'Dossier local'),
+        ('blob', 'Conteneur Azure (import direct)'),
+    ], string='Source des fichiers Cegid', default='folder', required=True,
+        help="Dossier local : fichiers déposés par transfert-azure-cegid.py.\n"
+             "Conteneur Azure : les fichiers sont lus directement depuis Azure, sans copie locale préalable ; "
+             "le dossier CSV sert alors uniquement aux archives.")
+    is_cegid_blob_url = fields.Char(
+        string='URL SAS du conteneur Azure',
+        groups='base.group_system',
+        help="URL SAS du conteneur Azure Blob Storage contenant les exports Cegid (source 'Conteneur Azure').\n"
+             "Vide : l'URL est obtenue via l'API Cegid Data Access (config.py de script-externe), "
+             "avec le cache partagé des jetons."
+    )
@@ -0,0 +1,485 @@
+#!/usr/bin/env python3
+"""
+Génération des définitions Odoo des tables Cegid à partir des requêtes planifiées Cegid Data Access.
+
+Pour chaque requête (SELECT colonnes FROM TABLE), le script déduit les colonnes et leur type
+(CAST / CONVERT de la requête, sinon nom de la colonne Cegid) et produit dans le module :
+- models/is_cegid_<table>.py        modèle Odoo (champs typés, index sur les dates et les codes)
+- views/is_cegid_<table>_views.xml  vues tree / form / search, action et menu
+- security/ir.model.access.csv     droits d'accès
+- models/__init__.py et __manifest__.py
+- data/cegid_tables.json           définition de la table pour l'import (colonnes CSV => champs Odoo)
+
+Les tables écrites à la main (modèle existant absent de data/cegid_tables.json) ne sont jamais modifiées ;
+les tables déjà générées sont mises à jour avec --overwrite.
+
+Usage :
+    python cegid-definitions.py --dry-run                 Afficher les tables et champs déduits des requêtes
+    python cegid-definitions.py --name 'CEGID_SAL*'       Générer les définitions des requêtes correspondantes
+    python cegid-definitions.py --json planifications.json  Utiliser une liste de planifications enregistrée
+    python cegid-definitions.py --overwrite               Régénérer les tables déjà générées
+"""
+
+import os
+import re
+import sys
+import json
+import keyword
+import fnmatch
+import argparse
+import importlib
+from xml.sax.saxutils import escape
+
+# Dossier du module Odoo (parent de script-externe)
+dossier_module = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Type Odoo déduit du type SQL d'un CAST / CONVERT
+TYPES_SQL = {
+    'int': 'integer', 'integer': 'integer', 'smallint': 'integer', 'tinyint': 'integer', 'bigint': 'integer',
+    'decimal': 'float', 'numeric': 'float', 'float': 'float', 'real': 'float', 'money': 'float',
+    'date': 'datetime', 'datetime': 'datetime', 'datetime2': 'datetime', 'smalldatetime': 'datetime',
+    'bit': 'boolean',
+    'char': 'char', 'varchar': 'char', 'nchar': 'char', 'nvarchar': 'char', 'text': 'char', 'ntext': 'char',
+}
+
+# Type Odoo déduit du nom de la colonne Cegid (partie après le préfixe de table, ex: E_DEBIT => DEBIT)
+SUFFIXES_FLOAT = ('DEBIT', 'CREDIT', 'MONTANT', 'SOLDE', 'HEURES', 'JOURS', 'QTE', 'QUANTITE', 'TAUX', 'BASE',
+                  'COEFF', 'PRIX', 'TOTAL', 'COUVERTURE')
+SUFFIXES_INTEGER = ('ORDRE', 'NUMLIGNE', 'NUMECHE', 'NUMEROPIECE', 'ANNEE', 'PERIODECP', 'NBRE', 'NOMBRE')
+# Codes sur lesquels les écrans filtrent et regroupent : colonnes indexées
+SUFFIXES_INDEX = ('JOURNAL', 'GENERAL', 'AUXILIAIRE', 'AXE', 'SECTION', 'SALARIE', 'ETABLISSEMENT', 'TIERS',
+                  'TYPEMVT', 'TYPECONGE', 'CUMULPAIE', 'RUBRIQUE')
+
+IDENTIFIANT = r'[\w\[\]"\.]+'
+
+# Noms réservés par Odoo (champs automatiques, attributs des modèles) et par les tables Cegid du module :
+# un alias de colonne portant l'un de ces noms est préfixé par PREFIXE_RESERVE
+CHAMPS_RESERVES = {
+    'id', 'display_name', 'create_uid', 'create_date', 'write_uid', 'write_date', '__last_update',
+    'ids', 'env', 'pool', 'context', 'source_fichier', 'row_hash',
+}
+PREFIXE_RESERVE = 'cegid_'
+
+
+def _masquer(sql):
+    """
+    Copie de la requête où le contenu des parenthèses et des chaînes est remplacé par des espaces :
+    les mots-clés et virgules restants sont ceux du premier niveau
+    """
+    masque = []
+    profondeur = 0
+    guillemet = None
+    for c in sql:
+        if guillemet:
+            masque.append(' ')
+            if c == guillemet:
+                guillemet = None
+        elif c in "'\"":
+            guillemet = c
+            masque.append(' ')
+        elif c == '(':
+            profondeur += 1
+            masque.append(c if profondeur == 1 else ' ')
+        elif c == ')':
+            profondeur -= 1
+            masque.append(c if profondeur == 0 else ' ')
+        else:
+            masque.append(c if profondeur == 0 else ' ')
+    return ''.join(masque)
+
+
+def _nom(identifiant):
+    """Nom Cegid d'un identifiant SQL (sans préfixe de table ou de schéma, crochets ni guillemets)."""
+    return identifiant.split('.')[-1].strip('[]"').upper()
+
+
+def parse_query(sql):
+    """
+    Analyse une requête SELECT Cegid Data Access.
+    Retourne un tuple (table, colonnes) : colonnes est une liste de tuples (nom, type SQL du CAST ou None).
+    Lève ValueError si la requête n'est pas un SELECT de colonnes nommées, ou si elle est composée
+    (UNION, INTERSECT, EXCEPT : seules les colonnes de la première requête seraient connues).
+    """
+    masque = _masquer(sql)
+    compose = re.search(r'\b(UNION|INTERSECT|EXCEPT)\b', masque, re.IGNORECASE)
+    if compose:
+        raise ValueError(f"requête composée ({compose.group(1).upper()}) non prise en charge")
+    match = re.search(rf'\bSELECT\b(.*?)\bFROM\s+({IDENTIFIANT})', masque, re.IGNORECASE | re.DOTALL)
+    if not match:
+        raise ValueError("requête SELECT ... FROM non reconnue")
+    table = _nom(sql[match.start(2):match.end(2)])
+    debut, fin = match.span(1)
+
+    colonnes = []
+    position = debut
+    for morceau in masque[debut:fin].split(','):
+        expression = sql[position:position + len(morceau)]
+        masque_expression = morceau
+        position += len(morceau) + 1
+        # DISTINCT, ALL ou TOP n devant la première colonne
+        prefixe = re.match(r'\s*(?:(?:DISTINCT|ALL)\s+)?(?:TOP\s+\d+\s+)?', masque_expression, re.IGNORECASE)
+        expression = expression[prefixe.end():].strip()
+        masque_expression = masque_expression[prefixe.end():].strip()
+        if masque_expression == '*' or masque_expression.endswith('.*'):
+            raise ValueError("SELECT * : les colonnes doivent être nommées dans la requête")
+        alias = re.search(rf'(?:\bAS\s+|\s)({IDENTIFIANT})$', masque_expression, re.IGNORECASE)
+        if alias:
+            nom = _nom(alias.group(1))
+        elif re.fullmatch(IDENTIFIANT, masque_expression):
+            nom = _nom(masque_expression)
+        else:
+            print(f"ATTENTION: expression sans nom ignorée : {expression}")
+            continue
+        cast = re.match(r'(?:TRY_)?CAST\s*\(.*\bAS\s+(\w+)', expression, re.IGNORECASE | re.DOTALL) or \
+            re.match(r'(?:TRY_)?CONVERT\s*\(\s*(\w+)', expression, re.IGNORECASE)
+        colonnes.append((nom, cast.group(1).lower() if cast else None))
+    if not colonnes:
+        raise ValueError("aucune colonne trouvée")
+    return table, colonnes
+
+
+def infer_field(colonne, type_sql=None):
+    """
+    Champ Odoo d'une colonne Cegid : dict {'name', 'column', 'type', 'index'}
+    """
+    suffixe = colonne.split('_', 1)[-1]
+    field_type = TYPES_SQL.get(type_sql or '')
+    if not field_type:
+        if 'DATE' in suffixe:
+            field_type = 'datetime'
+        elif suffixe.endswith(SUFFIXES_FLOAT):
+            field_type = 'float'
+        elif suffixe.endswith(SUFFIXES_INTEGER):
+            field_type = 'integer'
+        else:
+            field_type = 'char'
+    index = field_type == 'char' and suffixe.endswith(SUFFIXES_INDEX)
+    return {'name': _nom_champ(colonne), 'column': colonne, 'type': field_type, 'index': index}
+
+
+def _nom_champ(colonne):
+    """
+    Nom du champ Odoo d'une colonne : nom de la colonne en minuscules, préfixé par PREFIXE_RESERVE
+    s'il est réservé par Odoo, commence par '_' ou un chiffre, ou est un mot-clé Python
+    """
+    nom = colonne.lower()
+    if nom in CHAMPS_RESERVES or nom[0] in '_0123456789' or keyword.iskeyword(nom):
+        nom = PREFIXE_RESERVE + nom.lstrip('_')
+        print(f"ATTENTION: colonne {colonne} : nom réservé, champ Odoo {nom}")
+    return nom
+
+
+def build_definition(query_name, sql):
+    """
+    Définition complète d'une table Cegid à partir de sa requête :
+    modèle, champs typés et entrée de data/cegid_tables.json
+    """
+    table, colonnes = parse_query(sql)
+    fields = [infer_field(nom, type_sql) for nom, type_sql in dict(colonnes).items()]
+    noms = [f['name'] for f in fields]
+    doublons = sorted({nom for nom in noms if noms.count(nom) > 1})
+    if doublons:
+        raise ValueError(f"champs en double après préfixage des noms réservés : {', '.join(doublons)}")
+    dates = [f for f in fields if f['type'] == 'datetime']
+    # Première date indexée (tri et filtres des vues) ; DATECOMPTABLE sert de période pour l'import 'range'
+    if dates:
+        dates[0]['index'] = True
+    period = next((f['name'] for f in dates if f['column'].endswith('DATECOMPTABLE')), None)
+    table_lower = re.sub(r'\W', '', table.lower())
+    definition = {
+        'query': query_name,
+        'table': table,
+        'model': f"is.cegid.{table_lower}",
+        'module_file': f"is_cegid_{table_lower}",
+        'class_name': 'IsCegid' + table_lower.capitalize(),
+        'fields': fields,
+        'order': f"{dates[0]['name']} desc" if dates else fields[0]['name'],
+        'mapping': {
+            'columns': sorted(f['column'] for f in fields),
+            'model': f"is.cegid.{table_lower}",
+            'loader': 'copy',
+            'import_mode': 'full',
+            'fields': {f['column']: f['name'] for f in fields},
+        },
+    }
+    if period:
+        definition['mapping']['period_field'] = period
+    return definition
+
+
+def render_model(definition):
+    """Source Python du modèle Odoo."""
+    declarations = {
+        'char': "fields.Char(string='{string}'{index})",
+        'integer': "fields.Integer(string='{string}'{index})",
+        'float': "fields.Float(string='{string}', digits=(12, 2){index})",
+        'datetime': "fields.Datetime(string='{string}'{index})",
+        'boolean': "fields.Boolean(string='{string}'{index})",
+    }
+    lines = [
+        "# -*- coding: utf-8 -*-",
+        f"# Généré par script-externe/cegid-definitions.py depuis la requête Cegid {definition['query']}",
+        "",
+        "from odoo import models, fields",
+        "",
+        "",
+        f"class {definition['class_name']}(models.Model):",
+        f"    _name = '{definition['model']}'",
+        f"    _description = 'Cegid - {definition['table']}'",
+        f"    _order = '{definition['order']}'",
+        "",
+    ]
+    for field in definition['fields']:
+        declaration = declarations[field['type']].format(
+            string=field['column'], index=', index=True' if field['index'] else '')
+        lines.append(f"    {field['name']} = {declaration}")
+    lines += [
+        "    source_fichier = fields.Char(string='Fichier source')",
+        "    row_hash = fields.Char(string='Empreinte ligne', readonly=True)",
+        "",
+    ]
+    return '\n'.join(lines)
+
+
+def render_views(definition, sequence):
+    """Vues XML (tree, form, search), action et menu de la table."""
+    xml_id = definition['module_file']
+    model = definition['model']
+    table = escape(definition['table'])
+    fields = definition['fields']
+    tree = '\n'.join(
+        f'                <field name="{f["name"]}"' + (' sum="Total"' if f['type'] == 'float' else '') + '/>'
+        for f in fields)
+    half = (len(fields) + 1) // 2
+    form_left = '\n'.join(f'                            <field name="{f["name"]}"/>' for f in fields[:half])
+    form_right = '\n'.join(f'                            <field name="{f["name"]}"/>' for f in fields[half:])
+    search = '\n'.join(f'                <field name="{f["name"]}"/>' for f in fields if f['index'] and f['type'] == 'char')
+    group_by = '\n'.join(
+        f'                    <filter string="{f["column"]}" name="group_{f["name"]}" '
+        f'context="{{\'group_by\': \'{f["name"]}' + (':month' if f['type'] == 'datetime' else '') + '\'}"/>'
+        for f in fields if f['index'])
+    return f"""<?xml version="1.0" encoding="utf-8"?>
+<odoo>
+    <!-- Généré par script-externe/cegid-definitions.py depuis la requête Cegid {escape(definition['query'])} -->
+
+    <!-- Vue Tree -->
+    <record id="{xml_id}_tree_view" model="ir.ui.view">
+        <field name="name">{model}.tree</field>
+        <field name="model">{model}</field>
+        <field name="arch" type="xml">
+            <tree string="{table}">
+{tree}
+                <field name="source_fichier" optional="hide"/>
+                <field name="create_date" optional="hide"/>
+                <field name="write_date" optional="hide"/>
+            </tree>
+        </field>
+    </record>
+
+    <!-- Vue Form -->
+    <record id="{xml_id}_form_view" model="ir.ui.view">
+        <field name="name">{model}.form</field>
+        <field name="model">{model}</field>
+        <field name="arch" type="xml">
+            <form string="{table}">
+                <sheet>
+                    <group>
+                        <group>
+{form_left}
+                        </group>
+                        <group>
+{form_right}
+                        </group>
+                    </group>
+                </sheet>
+            </form>
+        </field>
+    </record>
+
+    <!-- Vue Search -->
+    <record id="{xml_id}_search_view" model="ir.ui.view">
+        <field name="name">{model}.search</field>
+        <field name="model">{model}</field>
+        <field name="arch" type="xml">
+            <search string="Recherche {table}">
+{search}
+                <separator/>
+                <group expand="0" string="Grouper par">
+{group_by}
+                </group>
+            </search>
+        </field>
+    </record>
+
+    <!-- Action -->
+    <record id="{xml_id}_action" model="ir.actions.act_window">
+        <field name="name">{table}</field>
+        <field name="res_model">{model}</field>
+        <field name="view_mode">tree,form</field>
+        <field name="search_view_id" ref="{xml_id}_search_view"/>
+        <field name="help" type="html">
+            <p class="o_view_nocontent_smiling_face">
+                Aucun enregistrement trouvé
+            </p>
+            <p>
+                Cette table contient la table {table} importée depuis Cegid.
+            </p>
+        </field>
+    </record>
+
+    <!-- Menu -->
+    <menuitem id="menu_{xml_id}"
+              name="{table}"
+              parent="menu_cegid_tables"
+              action="{xml_id}_action"
+              sequence="{sequence}"/>
+
+</odoo>
+"""
+
+
+def _lire(chemin):
+    with open(chemin, encoding='utf-8') as f:
+        return f.read()
+
+
+def _ecrire(chemin, contenu, dry_run, module_dir):
+    print(f"  {'(dry-run) ' if dry_run else ''}écriture de {os.path.relpath(chemin, module_dir)}")
+    if not dry_run:
+        with open(chemin, 'w', encoding='utf-8') as f:
+            f.write(contenu)
+
+
+def write_definitions(definitions, module_dir=dossier_module, overwrite=False, dry_run=False):
+    """
+    Écrit ou met à jour les fichiers du module pour chaque définition.
+    Retourne la liste des modèles écrits.
+    """
+    tables_path = os.path.join(module_dir, 'data', 'cegid_tables.json')
+    tables = json.loads(_lire(tables_path)) if os.path.exists(tables_path) else []
+    generated = {table['model'] for table in tables}
+    init_path = os.path.join(module_dir, 'models', '__init__.py')
+    manifest_path = os.path.join(module_dir, '__manifest__.py')
+    acl_path = os.path.join(module_dir, 'security', 'ir.model.access.csv')
+    init, manifest, acl = _lire(init_path), _lire(manifest_path), _lire(acl_path)
+
+    written = []
+    for definition in definitions:
+        model = definition['model']
+        module_file = definition['module_file']
+        model_path = os.path.join(module_dir, 'models', f"{module_file}.py")
+        if os.path.exists(model_path) and model not in generated:
+            print(f"{definition['table']} : modèle {model} écrit à la main, ignoré")
+            continue
+        if model in generated and not overwrite:
+            print(f"{definition['table']} : modèle {model} déjà généré, ignoré (--overwrite pour le régénérer)")
+            continue
+        print(f"{definition['table']} : modèle {model} ({len(definition['fields'])} champs)")
+        _ecrire(model_path, render_model(definition), dry_run, module_dir)
+        view_file = f"views/{module_file}_views.xml"
+        _ecrire(os.path.join(module_dir, view_file), render_views(definition, 100 + 10 * len(generated)),
+                dry_run, module_dir)
+
+        if f"from . import {module_file}\n" not in init:
+            init = init.rstrip('\n') + f"\nfrom . import {module_file}\n"
+        if f"'{view_file}'" not in manifest:
+            # Après le fichier des menus : le menu de la table est rattaché à menu_cegid_tables
+            manifest = manifest.replace("'views/is_cegid_menus.xml',\n",
+                                        f"'views/is_cegid_menus.xml',\n        '{view_file}',\n", 1)
+        model_id = 'model_' + model.replace('.', '_')
+        if f",{model_id}," not in acl:
+            acl = acl.rstrip('\n') + (f"\naccess_{model.replace('.', '_')}_user,{model}.user,{model_id},"
+                                      f"group_cegid_user,1,1,1,1\n")
+        tables = [table for table in tables if table['model'] != model] + [definition['mapping']]
+        generated.add(model)
+        written.append(model)
+
+    if written:
+        _ecrire(init_path, init, dry_run, module_dir)
+        _ecrire(manifest_path, manifest, dry_run, module_dir)
+        _ecrire(acl_path, acl, dry_run, module_dir)
+        _ecrire(tables_path, json.dumps(tables, indent=4, ensure_ascii=False) + '\n', dry_run, module_dir)
+    return written
+
+
+def load_queries(json_path=None):
+    """
+    Planifications Cegid Data Access : fichier JSON enregistré (liste renvoyée par l'API),
+    sinon appel de l'API avec la configuration de cegid-requetes.py
+    """
+    if json_path:
+        return json.loads(_lire(json_path))
+    requetes = importlib.import_module('cegid-requetes')
+    provider_id = requetes.cegid_provider_id or requetes.load_discovery_cache().get('provider_id')
+    if not provider_id:
+        print("ERREUR: cegid_provider_id non configuré dans config.py")
+        print("Lancez d'abord : python cegid-requetes.py --discover")
+        sys.exit(1)
+    try:
+        token = requetes.get_cegid_token()
+        return requetes.fetch_schedulers(token, provider_id)
+    except requetes.CegidApiError as e:
+        print(f"ERREUR: {e}")
+        sys.exit(1)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Génération des modèles, vues, droits et définitions d'import des tables Cegid"
+    )
+    parser.add_argument(
+        "--name", type=str, default=None,
+        help="Filtrer par nom de requête (recherche partielle, ou motif avec * et ?)"
+    )
+    parser.add_argument(
+        "--json", type=str, default=None,
+        help="Fichier JSON de planifications (liste renvoyée par l'API) au lieu de l'appel à l'API"
+    )
+    parser.add_argument(
+        "--module", type=str, default=dossier_module,
+        help="Dossier du module Odoo à mettre à jour (par défaut, le parent de script-externe)"
+    )
+    parser.add_argument(
+        "--overwrite", action="store_true",
+        help="Régénérer les tables déjà générées"
+    )
+    parser.add_argument(
+        "--dry-run", action="store_true",
+        help="Afficher les tables et champs déduits sans rien écrire"
+    )
+    args = parser.parse_args()
+
+    definitions = []
+    for q in load_queries(args.json):
+        query = q.get("query", {})
+        name = query.get("name", q.get("name", "?"))
+        if args.name:
+            if any(c in args.name for c in "*?"):
+                if not fnmatch.fnmatchcase(name.upper(), args.name.upper()):
+                    continue
+            elif args.name.upper() not in name.upper():
+                continue
+        sql = query.get("content", "")
+        try:
+            definition = build_definition(name, sql)
+        except ValueError as e:
+            print(f"ATTENTION: requête {name} ignorée : {e}")
+            continue
+        definitions.append(definition)
+        if args.dry_run:
+            print(f"{name} => {definition['model']}")
+            for field in definition['fields']:
+                print(f"     {field['column']:<30} {field['type']:<10} {'index' if field['index'] else ''}")
+
+    if not definitions:
+        print("Aucune requête à traiter.")
+        return
+    written = write_definitions(definitions, args.module, overwrite=args.overwrite, dry_run=args.dry_run)
+    print("=" * 80)
+    print(f"{len(written)} table(s) générée(s){' (dry-run, aucune écriture)' if args.dry_run else ''}.")
+    if written and not args.dry_run:
+        print("Mettre à jour le module Odoo (-u is_cegid2odoo) pour créer les tables.")
+
+
+if __name__ == "__main__":
+    main()
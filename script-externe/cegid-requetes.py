@@ -3,31 +3,144 @@
 Script de gestion des requêtes planifiées Cegid Data Access.
 
 Usage :
-    python cegid-requetes.py --discover          Découvrir le provider ID
+    python cegid-requetes.py --discover          Découvrir le provider ID (mis en cache)
+    python cegid-requetes.py --discover --refresh  Relancer la découverte sans utiliser le cache
     python cegid-requetes.py --list              Lister les requêtes planifiées
     python cegid-requetes.py --force             Forcer l'exécution de toutes les requêtes
     python cegid-requetes.py --force --name NOM  Forcer une requête spécifique par nom
     python cegid-requetes.py --force --time 14:30  Forcer à une heure précise
+    python cegid-requetes.py --disable --id ID1 ID2  Désactiver plusieurs planifications
+    python cegid-requetes.py --enable --name 'CEGID_*'  Réactiver les planifications dont le nom correspond
+    python cegid-requetes.py --force --dry-run   Afficher les modifications sans les appliquer
 """
 
+import os
 import sys
+import json
+import time
+import fnmatch
+import atexit
 import argparse
-import requests
+from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError as FuturesTimeoutError
 from datetime import datetime, timedelta, timezone
+import config
 from config import (
     cegid_api_base_url,
     cegid_tenant_id,
     cegid_provider_id,
     cegid_force_time,
 )
-from cegid_common import get_cegid_token, get_auth_headers
+from cegid_common import get_cegid_token, get_auth_headers, cegid_http, CegidApiError
 
+# Cache local du provider ID découvert (--discover)
+fichier_cache_decouverte = getattr(config, "fichier_cache_decouverte", "") or os.path.expanduser(
+    "~/.cache/cegid-decouverte.json")
+# Délai maximum de la découverte du provider ID, en secondes
+delai_decouverte = getattr(config, "delai_decouverte", 30)
+# Nombre maximum d'appels simultanés à l'API lors des opérations groupées
+parallelisme_api = getattr(config, "parallelisme_api", 4)
 
-def discover_provider_id(token):
+
+def _probe_provider(headers, method, pid, expires=None):
+    """
+    Tester un provider ID sur une famille de points d'accès.
+    :param expires: échéance de la découverte (time.monotonic()) : délais de connexion et de lecture
+        limités au temps restant, sans nouvelle tentative
+    Retourne un tuple (provider ID confirmé ou None, liste des éléments trouvés, message d'état).
+    """
+    kwargs = {}
+    if expires is not None:
+        remaining = expires - time.monotonic()
+        if remaining <= 0:
+            return None, [], "délai dépassé, non testé"
+        kwargs = {"retries": 0, "total_timeout": remaining,
+                  "timeout": (min(cegid_http.timeout[0], remaining), remaining)}
+    if method == 1:
+        url = f"{cegid_api_base_url}/datasource/api/V2/datasources/tenant/{pid}"
+        endpoint = "datasources/tenant/{pid}"
+    elif method == 2:
+        url = f"{cegid_api_base_url}/datasource/api/V1/foldersCollections/tenant/{pid}"
+        endpoint = "foldersCollections/tenant/{pid}"
+    else:
+        url = f"{cegid_api_base_url}/query/api/V1/schedulers/tenant/provider/{pid}"
+        endpoint = "schedulers/tenant/provider/{pid}"
+    response = cegid_http.get(url, headers=headers, endpoint=endpoint, **kwargs)
+    status = f"HTTP {response.status_code}"
+    if response.status_code != 200:
+        try:
+            return None, [], f"{status} : {response.json().get('errorMessage', response.text[:100])}"
+        except Exception:
+            return None, [], f"{status} : {response.text[:100]}"
+
+    data = response.json()
+    if method == 1:
+        items = data.get("data") or []
+        if not items:
+            return None, [], f"{status} (réponse vide)"
+        names = [f"{ds.get('name', '?')} (providerId: {ds.get('providerId', pid)})" for ds in items]
+        return items[0].get("providerId", pid), names, f"{status} => {len(items)} datasource(s) trouvée(s) !"
+    if not data:
+        return None, [], f"{status} (réponse vide)"
+    if method == 2:
+        names = [f"{col.get('name', '?')} (providerId: {col.get('providerId', pid)})" for col in data]
+        return data[0].get("providerId", pid), names, f"{status} => {len(data)} collection(s) trouvée(s) !"
+    names = [q.get("query", {}).get("name", q.get("name", "?")) for q in data]
+    return pid, names, f"{status} => {len(data)} requête(s) trouvée(s) !"
+
+
+def load_discovery_cache():
+    """Provider ID et datasources découverts lors d'une exécution précédente (ou {} si absents)."""
+    if not os.path.exists(fichier_cache_decouverte):
+        return {}
+    try:
+        with open(fichier_cache_decouverte, "r", encoding="utf-8") as f:
+            return json.load(f).get(cegid_tenant_id, {})
+    except (OSError, ValueError):
+        return {}
+
+
+def save_discovery_cache(provider_id, datasources):
+    """Enregistrer le provider ID découvert pour que les exécutions suivantes évitent la découverte."""
+    data = {}
+    if os.path.exists(fichier_cache_decouverte):
+        try:
+            with open(fichier_cache_decouverte, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            data = {}
+    data[cegid_tenant_id] = {
+        "provider_id": provider_id,
+        "datasources": datasources,
+        "date": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+    }
+    os.makedirs(os.path.dirname(fichier_cache_decouverte) or ".", exist_ok=True)
+    temp_path = fichier_cache_decouverte + ".tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+    os.replace(temp_path, fichier_cache_decouverte)
+
+
+def discover_provider_id(token, deadline=None, refresh=False):
     """
     Tenter de découvrir le provider ID en testant plusieurs endpoints et IDs.
+    Les tests sont lancés en parallèle, chacun limité au temps restant avant l'expiration du délai global
+    (deadline, en secondes) et sans nouvelle tentative. Le provider ID retenu est celui du premier test
+    confirmé dans l'ordre de priorité (famille de points d'accès, puis ID connu), et non le plus rapide :
+    la découverte s'arrête dès que tous les tests prioritaires sur lui ont échoué, ou à l'expiration
+    du délai (meilleur test confirmé à ce moment). Le résultat est mis en cache.
     """
+    if not refresh:
+        cached = load_discovery_cache()
+        if cached.get("provider_id"):
+            print(f"Provider ID trouvé dans le cache ({fichier_cache_decouverte}, {cached.get('date', '?')}) :")
+            for name in cached.get("datasources", []):
+                print(f"    - {name}")
+            print(f'   cegid_provider_id = "{cached["provider_id"]}"')
+            print("(utilisez --refresh pour relancer la découverte)")
+            return cached["provider_id"]
+
     headers = get_auth_headers(token)
+    deadline = deadline or delai_decouverte
 
     # Liste élargie de provider IDs connus pour Cegid XRP / HR Sprint
     known_providers = [
@@ -39,84 +152,65 @@ def discover_provider_id(token):
         "cegid-hr",
         "paie",
     ]
+    method_names = {
+        1: "datasources",
+        2: "collections",
+        3: "requêtes planifiées",
+    }
 
-    print("Tentative de découverte du provider ID...")
+    print(f"Tentative de découverte du provider ID (délai maximum : {deadline} s)...")
     print("=" * 80)
 
-    # Méthode 1 : via l'endpoint datasources
-    print("\n--- Méthode 1 : recherche via les datasources ---")
-    for pid in known_providers:
-        url = f"{cegid_api_base_url}/datasource/api/V2/datasources/tenant/{pid}"
-        response = requests.get(url, headers=headers)
-        print(f"  Test '{pid}' => HTTP {response.status_code}", end="")
-        if response.status_code == 200:
-            data = response.json()
-            if data.get("data"):
-                print(f" => {len(data['data'])} datasource(s) trouvée(s) !")
-                for ds in data["data"]:
-                    real_pid = ds.get("providerId", pid)
-                    print(f"    - {ds.get('name', '?')} (providerId: {real_pid})")
-                final_pid = data["data"][0].get("providerId", pid)
-                print(f"\n=> Ajoutez dans config.py :")
-                print(f'   cegid_provider_id = "{final_pid}"')
-                return final_pid
-            else:
-                print(" (réponse vide)")
-        else:
-            try:
-                print(f" : {response.json().get('errorMessage', response.text[:100])}")
-            except Exception:
-                print(f" : {response.text[:100]}")
-
-    # Méthode 2 : via l'endpoint collections
-    print("\n--- Méthode 2 : recherche via les collections ---")
-    for pid in known_providers:
-        url = f"{cegid_api_base_url}/datasource/api/V1/foldersCollections/tenant/{pid}"
-        response = requests.get(url, headers=headers)
-        print(f"  Test '{pid}' => HTTP {response.status_code}", end="")
-        if response.status_code == 200:
-            data = response.json()
-            if data:
-                print(f" => {len(data)} collection(s) trouvée(s) !")
-                for col in data:
-                    real_pid = col.get("providerId", pid)
-                    print(f"    - {col.get('name', '?')} (providerId: {real_pid})")
-                final_pid = data[0].get("providerId", pid)
-                print(f"\n=> Ajoutez dans config.py :")
-                print(f'   cegid_provider_id = "{final_pid}"')
-                return final_pid
-            else:
-                print(" (réponse vide)")
-        else:
-            try:
-                print(f" : {response.json().get('errorMessage', response.text[:100])}")
-            except Exception:
-                print(f" : {response.text[:100]}")
-
-    # Méthode 3 : via l'endpoint schedulers
-    print("\n--- Méthode 3 : recherche via les requêtes planifiées ---")
-    for pid in known_providers:
-        url = f"{cegid_api_base_url}/query/api/V1/schedulers/tenant/provider/{pid}"
-        response = requests.get(url, headers=headers)
-        print(f"  Test '{pid}' => HTTP {response.status_code}", end="")
-        if response.status_code == 200:
-            data = response.json()
-            if data:
-                print(f" => {len(data)} requête(s) trouvée(s) !")
-                for q in data:
-                    name = q.get("query", {}).get("name", q.get("name", "?"))
-                    print(f"    - {name}")
-                print(f"\n=> Le provider ID est probablement : {pid}")
-                print(f"   Ajoutez dans config.py :")
-                print(f'   cegid_provider_id = "{pid}"')
-                return pid
-            else:
-                print(" (réponse vide)")
-        else:
+    # Tests dans l'ordre de priorité
+    probes = [(method, pid) for method in method_names for pid in known_providers]
+    results = {}  # (méthode, ID) => (provider ID confirmé ou None, éléments trouvés)
+
+    def best_result(complete):
+        """Premier test confirmé par ordre de priorité ; complete : tous les tests prioritaires sont terminés"""
+        for probe in probes:
+            if probe not in results:
+                if complete:
+                    return None
+                continue
+            if results[probe][0]:
+                return results[probe]
+        return None
+
+    expires = time.monotonic() + deadline
+    executor = ThreadPoolExecutor(max_workers=len(probes))
+    futures = {executor.submit(_probe_provider, headers, method, pid, expires): (method, pid)
+               for method, pid in probes}
+    found = None
+    try:
+        for future in as_completed(futures, timeout=deadline):
+            method, pid = futures[future]
             try:
-                print(f" : {response.json().get('errorMessage', response.text[:100])}")
-            except Exception:
-                print(f" : {response.text[:100]}")
+                provider_id, names, message = future.result()
+            except Exception as e:
+                provider_id, names, message = None, [], f"ERREUR : {e}"
+            results[(method, pid)] = (provider_id, names)
+            print(f"  Test '{pid}' via les {method_names[method]} => {message}")
+            for name in names:
+                print(f"    - {name}")
+            found = best_result(complete=True)
+            if found:
+                break
+    except FuturesTimeoutError:
+        print(f"\nDélai de {deadline} s dépassé, tests restants abandonnés.")
+        found = best_result(complete=False)
+    finally:
+        # Abandonner les tests non encore démarrés ; ceux en cours s'arrêtent d'eux-mêmes à l'échéance
+        for future in futures:
+            future.cancel()
+        executor.shutdown(wait=False)
+
+    if found:
+        provider_id, names = found
+        save_discovery_cache(provider_id, names)
+        print(f"\n=> Ajoutez dans config.py :")
+        print(f'   cegid_provider_id = "{provider_id}"')
+        print(f"   (enregistré dans le cache {fichier_cache_decouverte})")
+        return provider_id
 
     # Si rien trouvé
     print("\n" + "=" * 80)
@@ -146,18 +240,104 @@ def _format_date(date_str):
         return date_str
 
 
-def list_queries(token, provider_id, show_sql=False):
-    """Lister les requêtes planifiées."""
+def fetch_schedulers(token, provider_id):
+    """Récupérer en un seul appel la liste complète des planifications."""
     headers = get_auth_headers(token)
     url = f"{cegid_api_base_url}/query/api/V1/schedulers/tenant/provider/{provider_id}"
-    response = requests.get(url, headers=headers)
+    response = cegid_http.get(url, headers=headers, endpoint="schedulers/tenant/provider/{pid}")
 
     if response.status_code != 200:
-        print(f"ERREUR: Impossible de récupérer les requêtes (HTTP {response.status_code})")
-        print(f"Réponse : {response.text}")
-        sys.exit(1)
+        raise CegidApiError("Impossible de récupérer les requêtes", response.status_code, response.text)
+
+    return response.json() or []
+
+
+def _query_name(q):
+    return q.get("query", {}).get("name", q.get("name", "?"))
+
+
+def select_schedulers(queries, scheduler_ids=None, name_filter=None):
+    """
+    Sélectionner les planifications par ID (liste) et/ou par nom.
+    Le filtre de nom est une recherche partielle, ou un motif de type NOM_* s'il contient * ou ?.
+    Sans critère, toutes les planifications sont retenues.
+    """
+    ids = set()
+    for value in scheduler_ids or []:
+        ids.update(i.strip() for i in value.split(",") if i.strip())
+
+    selected = []
+    for q in queries:
+        if ids and q.get("id") not in ids:
+            continue
+        if name_filter:
+            name = _query_name(q).upper()
+            if any(c in name_filter for c in "*?"):
+                if not fnmatch.fnmatchcase(name, name_filter.upper()):
+                    continue
+            elif name_filter.upper() not in name:
+                continue
+        selected.append(q)
+
+    unknown = ids - {q.get("id") for q in queries}
+    for scheduler_id in sorted(unknown):
+        print(f"ATTENTION: Planification '{scheduler_id}' non trouvée")
+    return selected
+
+
+def apply_scheduler_changes(token, changes, dry_run=False):
+    """
+    Envoyer les planifications modifiées à l'API (PUT) en parallèle, puis afficher un récapitulatif.
+    changes : liste de tuples (planification modifiée, libellé de l'ancienne valeur, libellé de la nouvelle).
+    En mode dry_run, rien n'est envoyé : seul le récapitulatif des modifications prévues est affiché.
+    Retourne le nombre de planifications mises à jour (ou à mettre à jour en dry_run).
+    """
+    headers = get_auth_headers(token)
+    url = f"{cegid_api_base_url}/query/api/V1/schedulers"
+
+    def put(q):
+        response = cegid_http.put(url, headers=headers, json=q, endpoint="schedulers (PUT)")
+        if response.status_code == 200:
+            return "OK"
+        return f"ERREUR (HTTP {response.status_code}) {response.text[:60]}"
+
+    results = {}
+    if dry_run:
+        for q, before, after in changes:
+            results[id(q)] = "à faire (dry-run)" if before != after else "inchangée"
+    else:
+        todo = [q for q, before, after in changes if before != after]
+        for q, before, after in changes:
+            if before == after:
+                results[id(q)] = "inchangée"
+        if todo:
+            with ThreadPoolExecutor(max_workers=min(parallelisme_api, len(todo))) as executor:
+                futures = {executor.submit(put, q): q for q in todo}
+                for future in as_completed(futures):
+                    q = futures[future]
+                    try:
+                        results[id(q)] = future.result()
+                    except Exception as e:
+                        results[id(q)] = f"ERREUR {e}"
+
+    print(f"{'Nom':<30} {'Avant':<22} {'Après':<22} {'Résultat':<30} {'ID scheduler'}")
+    print("-" * 140)
+    for q, before, after in changes:
+        print(f"{_query_name(q):<30} {before:<22} {after:<22} {results[id(q)]:<30} {q.get('id', '?')}")
+    print("-" * 140)
+
+    ok = sum(1 for r in results.values() if r in ("OK", "à faire (dry-run)"))
+    errors = sum(1 for r in results.values() if r.startswith("ERREUR"))
+    if dry_run:
+        print(f"Dry-run : {ok} planification(s) seraient modifiée(s), aucune écriture effectuée.")
+    else:
+        print(f"{ok} planification(s) modifiée(s), {errors} erreur(s), {len(changes) - ok - errors} inchangée(s).")
+    return ok
+
 
-    queries = response.json()
+def list_queries(token, provider_id, show_sql=False):
+    """Lister les requêtes planifiées."""
+    queries = fetch_schedulers(token, provider_id)
 
     if not queries:
         print("Aucune requête planifiée trouvée.")
@@ -216,94 +396,62 @@ def compute_next_execution(force_time_str=None):
         return target
 
 
-def force_execution(token, provider_id, queries, name_filter=None, force_time_str=None):
+def force_execution(token, provider_id, queries, name_filter=None, force_time_str=None,
+                    scheduler_ids=None, dry_run=False):
     """
     Forcer l'exécution des requêtes en modifiant nextExecution.
     Le cron (planification quotidienne) reste inchangé.
     """
-    headers = get_auth_headers(token)
     target_time = compute_next_execution(force_time_str)
+    next_execution = target_time.strftime("%Y-%m-%dT%H:%M:%S.000Z")
 
     print(f"\nProchaine exécution forcée à : {target_time.strftime('%Y-%m-%d %H:%M:%S')} UTC")
-    print("-" * 120)
-
-    count = 0
-    for q in queries:
-        query_name = q.get("query", {}).get("name", q.get("name", "?"))
-
-        # Filtrer par nom si demandé
-        if name_filter and name_filter.upper() not in query_name.upper():
-            continue
+    print("-" * 140)
 
+    changes = []
+    for q in select_schedulers(queries, scheduler_ids, name_filter):
         if not q.get("enable"):
-            print(f"  {query_name:<40} => Ignorée (désactivée)")
+            print(f"  {_query_name(q):<40} => Ignorée (désactivée)")
             continue
 
         # Conserver le cron original, modifier uniquement nextExecution
-        original_cron = q.get("cron", "")
         original_next = q.get("nextExecution", "")
+        q["nextExecution"] = next_execution
+        changes.append((q, _format_date(original_next), _format_date(next_execution)))
 
-        q["nextExecution"] = target_time.strftime("%Y-%m-%dT%H:%M:%S.000Z")
-
-        # PUT pour mettre à jour
-        url = f"{cegid_api_base_url}/query/api/V1/schedulers"
-        response = requests.put(url, headers=headers, json=q)
-
-        if response.status_code == 200:
-            print(f"  {query_name:<40} => OK (était: {original_next})")
-            count += 1
-        else:
-            print(f"  {query_name:<40} => ERREUR (HTTP {response.status_code})")
-            print(f"    Réponse : {response.text}")
-
-    print("-" * 120)
-    if count > 0:
-        print(f"{count} requête(s) reprogrammée(s) à {target_time.strftime('%H:%M')} UTC")
-        print(f"Le cron de planification quotidienne n'a PAS été modifié.")
-    else:
+    if not changes:
         if name_filter:
             print(f"Aucune requête trouvée contenant '{name_filter}'")
         else:
             print("Aucune requête à reprogrammer.")
+        return 0
 
+    count = apply_scheduler_changes(token, changes, dry_run=dry_run)
+    if count > 0 and not dry_run:
+        print(f"{count} requête(s) reprogrammée(s) à {target_time.strftime('%H:%M')} UTC")
+        print(f"Le cron de planification quotidienne n'a PAS été modifié.")
+    return count
 
-def toggle_scheduler(token, provider_id, scheduler_id, enable=False):
-    """Activer ou désactiver une planification par son ID."""
-    headers = get_auth_headers(token)
-
-    # Récupérer toutes les planifications pour trouver celle avec cet ID
-    url = f"{cegid_api_base_url}/query/api/V1/schedulers/tenant/provider/{provider_id}"
-    response = requests.get(url, headers=headers)
-
-    if response.status_code != 200:
-        print(f"ERREUR: Impossible de récupérer les requêtes (HTTP {response.status_code})")
-        sys.exit(1)
-
-    queries = response.json()
-    target = None
-    for q in queries:
-        if q.get("id") == scheduler_id:
-            target = q
-            break
 
-    if not target:
-        print(f"ERREUR: Planification '{scheduler_id}' non trouvée")
+def toggle_scheduler(token, provider_id, queries, scheduler_ids=None, name_filter=None, enable=False,
+                     dry_run=False):
+    """Activer ou désactiver des planifications par ID (une ou plusieurs) et/ou par nom."""
+    selected = select_schedulers(queries, scheduler_ids, name_filter)
+    if not selected:
+        print("ERREUR: Aucune planification ne correspond aux critères")
         sys.exit(1)
 
-    name = target.get("query", {}).get("name", target.get("name", "?"))
     action = "Activation" if enable else "Désactivation"
+    print(f"{action} de {len(selected)} planification(s)")
+    print("-" * 140)
 
-    target["enable"] = enable
+    changes = []
+    for q in selected:
+        before = "activée" if q.get("enable") else "désactivée"
+        q["enable"] = enable
+        changes.append((q, before, "activée" if enable else "désactivée"))
 
-    url = f"{cegid_api_base_url}/query/api/V1/schedulers"
-    response = requests.put(url, headers=headers, json=target)
-
-    if response.status_code == 200:
-        etat = "activée" if enable else "désactivée"
-        print(f"{action} OK : {name} (ID: {scheduler_id}) => {etat}")
-    else:
-        print(f"ERREUR: {action} échouée (HTTP {response.status_code})")
-        print(f"Réponse : {response.text}")
+    return apply_scheduler_changes(token, changes, dry_run=dry_run)
 
 
 def main():
@@ -324,15 +472,19 @@ def main():
     )
     parser.add_argument(
         "--disable", action="store_true",
-        help="Désactiver une planification par son ID"
+        help="Désactiver des planifications (par --id et/ou --name)"
     )
     parser.add_argument(
         "--enable", action="store_true",
-        help="Réactiver une planification par son ID"
+        help="Réactiver des planifications (par --id et/ou --name)"
     )
     parser.add_argument(
-        "--id", type=str, default=None,
-        help="ID du scheduler (GUID) pour --disable ou --enable"
+        "--id", type=str, nargs="+", default=None,
+        help="ID(s) de scheduler (GUID, séparés par des espaces ou des virgules)"
+    )
+    parser.add_argument(
+        "--dry-run", action="store_true",
+        help="Afficher les modifications prévues sans rien écrire (avec --force, --enable ou --disable)"
     )
     parser.add_argument(
         "--sql", action="store_true",
@@ -340,15 +492,30 @@ def main():
     )
     parser.add_argument(
         "--name", type=str, default=None,
-        help="Filtrer par nom de requête (recherche partielle)"
+        help="Filtrer par nom de requête (recherche partielle, ou motif avec * et ?)"
     )
     parser.add_argument(
         "--time", type=str, default=None,
         help="Heure de forçage (HH:MM en UTC). Si omis, dans les 15 prochaines minutes"
     )
+    parser.add_argument(
+        "--refresh", action="store_true",
+        help="Avec --discover : ignorer le cache et relancer la découverte"
+    )
+    parser.add_argument(
+        "--deadline", type=float, default=None,
+        help="Avec --discover : délai maximum de la découverte en secondes"
+    )
+    parser.add_argument(
+        "--stats", action="store_true",
+        help="Afficher les temps de réponse de l'API par point d'accès en fin d'exécution"
+    )
 
     args = parser.parse_args()
 
+    if args.stats:
+        atexit.register(cegid_http.print_stats)
+
     if not any([args.discover, args.list, args.force, args.disable, args.enable]):
         parser.print_help()
         sys.exit(0)
@@ -361,11 +528,11 @@ def main():
 
     # Mode découverte
     if args.discover:
-        discover_provider_id(token)
+        discover_provider_id(token, deadline=args.deadline, refresh=args.refresh)
         return
 
-    # Vérifier le provider ID
-    provider_id = cegid_provider_id
+    # Vérifier le provider ID (config.py, sinon cache de la découverte)
+    provider_id = cegid_provider_id or load_discovery_cache().get("provider_id")
     if not provider_id:
         print("ERREUR: cegid_provider_id non configuré dans config.py")
         print("Lancez d'abord : python cegid-requetes.py --discover")
@@ -378,11 +545,13 @@ def main():
 
     # Désactiver / Réactiver
     if args.disable or args.enable:
-        if not args.id:
-            print("ERREUR: --id <GUID> requis avec --disable ou --enable")
+        if not args.id and not args.name:
+            print("ERREUR: --id <GUID> ou --name <NOM> requis avec --disable ou --enable")
             print("Lancez d'abord : python cegid-requetes.py --list")
             sys.exit(1)
-        toggle_scheduler(token, provider_id, args.id, enable=args.enable)
+        queries = fetch_schedulers(token, provider_id)
+        toggle_scheduler(token, provider_id, queries, args.id, args.name, enable=args.enable,
+                         dry_run=args.dry_run)
         return
 
     # Forçage
@@ -391,8 +560,13 @@ def main():
         if not queries:
             return
         force_time = args.time or cegid_force_time or None
-        force_execution(token, provider_id, queries, args.name, force_time)
+        force_execution(token, provider_id, queries, args.name, force_time,
+                        scheduler_ids=args.id, dry_run=args.dry_run)
 
 
 if __name__ == "__main__":
-    main()
+    try:
+        main()
+    except CegidApiError as e:
+        print(f"ERREUR: {e}")
+        sys.exit(1)
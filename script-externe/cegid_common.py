@@ -1,10 +1,29 @@
 """
 Module commun pour les scripts Cegid Data Access.
 Fournit l'authentification et les fonctions utilitaires partagées.
+
+Tous les appels HTTP passent par un client partagé (cegid_http) : connexions réutilisées,
+délais d'attente, nouvelles tentatives avec attente exponentielle sur les erreurs transitoires.
+
+Le jeton d'accès et l'URL SAS sont mis en cache jusqu'à peu avant leur expiration :
+- en mémoire, pour le processus courant ;
+- dans un fichier (optionnel, paramètre `fichier_cache_jetons` de config.py, droits 0600),
+  pour les exécutions suivantes du script.
 """
 
-import sys
+import os
+import json
+import time
+import random
+import base64
+import logging
+import threading
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from urllib.parse import parse_qs, urlparse
 import requests
+from requests.adapters import HTTPAdapter
+import config
 from config import (
     cegid_api_base_url,
     cegid_tenant_id,
@@ -13,9 +32,251 @@ from config import (
     cegid_subscription_key,
 )
 
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+# Fichier de cache des jetons (vide = cache en mémoire uniquement)
+fichier_cache_jetons = getattr(config, "fichier_cache_jetons", "")
+
+# Délais d'attente HTTP en secondes : (connexion, lecture)
+http_timeout = tuple(getattr(config, "http_timeout", (10, 60)))
+# Nombre de nouvelles tentatives sur erreur transitoire (429, 5xx, coupure réseau)
+http_retries = getattr(config, "http_retries", 4)
+# Durée maximale d'un appel, nouvelles tentatives et attentes (Retry-After) comprises, en secondes
+http_total_timeout = getattr(config, "http_total_timeout", 600)
+
+# Renouveler un jeton ou une URL SAS cette durée (en secondes) avant son expiration
+MARGE_EXPIRATION = 300
+# Durée de validité supposée quand l'API ne la fournit pas
+VALIDITE_PAR_DEFAUT = 3600
+
+_logger = logging.getLogger(__name__)
+
+_cache = {}
+_cache_lock = threading.RLock()
+
+
+class CegidApiError(Exception):
+    """
+    Erreur renvoyée par l'API Cegid Data Access (code HTTP et corps de la réponse).
+    Levée à la place d'un arrêt du processus : le module est aussi chargé par Odoo (cegid_transfert),
+    seuls les scripts en ligne de commande la transforment en code de sortie.
+    """
+
+    def __init__(self, message, status=None, body=None):
+        super().__init__(f"{message} (HTTP {status})\nRéponse : {body}" if status is not None else message)
+        self.status = status
+        self.body = body
+
+
+class CegidHttpClient:
+    """
+    Client HTTP partagé pour l'API Cegid Data Access :
+    - une session requests avec un pool de connexions (keep-alive, une seule négociation TLS) ;
+    - délais d'attente de connexion et de lecture ;
+    - nouvelles tentatives avec attente exponentielle et aléatoire (jitter) sur 429, 5xx et erreurs réseau,
+      en respectant l'en-tête Retry-After, dans la limite de la durée maximale de l'appel (total_timeout) ;
+    - compteurs de latence par point d'accès (voir print_stats).
+    """
+
+    RETRY_STATUS = (429, 500, 502, 503, 504)
+
+    def __init__(self, timeout=(10, 60), retries=4, backoff=0.5, backoff_max=30, pool_size=20, total_timeout=600):
+        self.timeout = timeout
+        self.total_timeout = total_timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.backoff_max = backoff_max
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.stats = {}
+        self._stats_lock = threading.Lock()
+
+    def _retry_delay(self, attempt, response=None):
+        """
+        Attente avant la tentative suivante : Retry-After si fourni (sans plafond, le serveur refuserait
+        une tentative plus précoce), sinon exponentielle avec jitter plafonnée à backoff_max.
+        """
+        retry_after = response.headers.get("Retry-After") if response is not None else None
+        if retry_after:
+            try:
+                return max(float(retry_after), 0)
+            except ValueError:
+                try:
+                    delay = (parsedate_to_datetime(retry_after) - datetime.now(timezone.utc)).total_seconds()
+                    return max(delay, 0)
+                except (TypeError, ValueError):
+                    pass
+        return random.uniform(0, min(self.backoff * 2 ** attempt, self.backoff_max))
+
+    def _record(self, endpoint, elapsed, error=False):
+        with self._stats_lock:
+            stat = self.stats.setdefault(endpoint, {"calls": 0, "errors": 0, "total": 0.0, "max": 0.0})
+            stat["calls"] += 1
+            stat["errors"] += int(error)
+            stat["total"] += elapsed
+            stat["max"] = max(stat["max"], elapsed)
+
+    def request(self, method, url, endpoint=None, retries=None, total_timeout=None, **kwargs):
+        """
+        Envoyer une requête HTTP avec nouvelles tentatives.
+        :param endpoint: libellé du point d'accès pour les statistiques (par défaut : chemin de l'URL)
+        :param retries: nombre de nouvelles tentatives (par défaut, celui du client ; 0 pour aucune)
+        :param total_timeout: durée maximale de l'appel, attentes comprises (par défaut, celle du client) :
+            une tentative dont l'attente dépasserait cette durée n'est pas faite
+        Retourne la dernière réponse obtenue ; lève l'exception réseau si toutes les tentatives ont échoué.
+        """
+        endpoint = endpoint or urlparse(url).path
+        retries = self.retries if retries is None else retries
+        deadline = time.monotonic() + (self.total_timeout if total_timeout is None else total_timeout)
+        kwargs.setdefault("timeout", self.timeout)
+        for attempt in range(retries + 1):
+            start = time.monotonic()
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                self._record(endpoint, time.monotonic() - start, error=True)
+                delay = self._retry_delay(attempt)
+                if attempt >= retries or time.monotonic() + delay >= deadline:
+                    raise
+                time.sleep(delay)
+                continue
+            retry = response.status_code in self.RETRY_STATUS
+            self._record(endpoint, time.monotonic() - start, error=response.status_code >= 400)
+            if not retry or attempt >= retries:
+                return response
+            delay = self._retry_delay(attempt, response)
+            if time.monotonic() + delay >= deadline:
+                return response
+            time.sleep(delay)
+        return response
+
+    def get(self, url, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def put(self, url, **kwargs):
+        return self.request("PUT", url, **kwargs)
+
+    def print_stats(self):
+        """Afficher les compteurs de latence par point d'accès."""
+        if not self.stats:
+            return
+        label = "Point d'accès"
+        print(f"{label:<70} {'Appels':>7} {'Erreurs':>8} {'Moy. (ms)':>10} {'Max (ms)':>10}")
+        print("-" * 110)
+        for endpoint, stat in sorted(self.stats.items()):
+            average = stat["total"] / stat["calls"] * 1000
+            print(f"{endpoint[:70]:<70} {stat['calls']:>7} {stat['errors']:>8} {average:>10.0f} {stat['max'] * 1000:>10.0f}")
+
+
+# Client HTTP partagé par tous les appels à l'API Cegid Data Access
+cegid_http = CegidHttpClient(timeout=http_timeout, retries=http_retries, total_timeout=http_total_timeout)
 
-def get_cegid_token():
-    """Obtenir un jeton d'autorisation via l'API Cegid Data Access."""
+
+def _jwt_expiration(token):
+    """Date d'expiration (timestamp) lue dans la charge utile d'un jeton JWT, ou None."""
+    try:
+        payload = token.split(".")[1]
+        payload += "=" * (-len(payload) % 4)
+        return float(json.loads(base64.urlsafe_b64decode(payload))["exp"])
+    except (IndexError, KeyError, TypeError, ValueError):
+        return None
+
+
+def _sas_expiration(sas_token):
+    """Date d'expiration (timestamp) lue dans le paramètre 'se' d'un jeton SAS, ou None."""
+    try:
+        se = parse_qs(sas_token.lstrip("?"))["se"][0]
+        return datetime.fromisoformat(se.replace("Z", "+00:00")).astimezone(timezone.utc).timestamp()
+    except (KeyError, IndexError, ValueError):
+        return None
+
+
+class _FileLock:
+    """Verrou exclusif sur le fichier de cache, pour que plusieurs scripts lancés en même temps
+    ne redemandent pas tous un jeton à l'API.
+    Réentrant : l'obtention d'une URL SAS demande elle-même un jeton. N'est utilisé que sous _cache_lock."""
+
+    depth = 0
+    fd = None
+
+    def __init__(self, path):
+        self.path = path + ".lock" if path else None
+
+    def __enter__(self):
+        if self.path and fcntl:
+            if _FileLock.depth == 0:
+                _FileLock.fd = os.open(self.path, os.O_CREAT | os.O_RDWR, 0o600)
+                fcntl.flock(_FileLock.fd, fcntl.LOCK_EX)
+            _FileLock.depth += 1
+        return self
+
+    def __exit__(self, *args):
+        if self.path and fcntl:
+            _FileLock.depth -= 1
+            if _FileLock.depth == 0:
+                fcntl.flock(_FileLock.fd, fcntl.LOCK_UN)
+                os.close(_FileLock.fd)
+                _FileLock.fd = None
+        return False
+
+
+def _read_file_cache():
+    if not fichier_cache_jetons or not os.path.exists(fichier_cache_jetons):
+        return {}
+    try:
+        with open(fichier_cache_jetons, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_file_cache(data):
+    if not fichier_cache_jetons:
+        return
+    temp_path = fichier_cache_jetons + ".tmp"
+    fd = os.open(temp_path, os.O_CREAT | os.O_WRONLY | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    os.chmod(temp_path, 0o600)
+    os.replace(temp_path, fichier_cache_jetons)
+
+
+def _cached(name, fetch, force_refresh=False):
+    """
+    Retourner la valeur en cache `name` si elle est encore valide, sinon l'obtenir avec fetch().
+    fetch() retourne un tuple (valeur, timestamp d'expiration).
+    """
+    cache_key = f"{cegid_tenant_id}:{cegid_api_key_id}:{name}"
+    with _cache_lock:
+        now = time.time()
+        entry = _cache.get(cache_key)
+        if not force_refresh and entry and entry["expires"] - MARGE_EXPIRATION > now:
+            return entry["value"]
+        with _FileLock(fichier_cache_jetons):
+            file_cache = _read_file_cache()
+            entry = file_cache.get(cache_key)
+            if not force_refresh and entry and entry["expires"] - MARGE_EXPIRATION > now:
+                _cache[cache_key] = entry
+                return entry["value"]
+            value, expires = fetch()
+            entry = {"value": value, "expires": expires}
+            _cache[cache_key] = entry
+            # Relire le fichier : fetch() a pu y enregistrer un jeton (cas de l'URL SAS)
+            file_cache = _read_file_cache()
+            file_cache[cache_key] = entry
+            # Ne pas conserver les entrées expirées
+            file_cache = {k: v for k, v in file_cache.items() if v.get("expires", 0) > now}
+            _write_file_cache(file_cache)
+            return value
+
+
+def _fetch_cegid_token():
+    """Demander un nouveau jeton d'autorisation à l'API Cegid Data Access."""
     url = f"{cegid_api_base_url}/tokenprovider/Token"
     params = {"api-key-Id": cegid_api_key_id}
     headers = {
@@ -23,13 +284,20 @@ def get_cegid_token():
         "api-key-secret": cegid_api_key_secret,
         "Ocp-Apim-Subscription-Key": cegid_subscription_key,
     }
-    response = requests.get(url, params=params, headers=headers)
+    response = cegid_http.get(url, params=params, headers=headers, endpoint="tokenprovider/Token")
     if response.status_code != 200:
-        print(f"ERREUR: Impossible d'obtenir le token Cegid (HTTP {response.status_code})")
-        print(f"Réponse : {response.text}")
-        sys.exit(1)
+        raise CegidApiError("Impossible d'obtenir le token Cegid", response.status_code, response.text)
     data = response.json()
-    return data["accessToken"]
+    token = data["accessToken"]
+    expires = _jwt_expiration(token)
+    if not expires and data.get("expiresIn"):
+        expires = time.time() + float(data["expiresIn"])
+    return token, expires or time.time() + VALIDITE_PAR_DEFAUT
+
+
+def get_cegid_token(force_refresh=False):
+    """Obtenir un jeton d'autorisation via l'API Cegid Data Access (mis en cache jusqu'à son expiration)."""
+    return _cached("token", _fetch_cegid_token, force_refresh)
 
 
 def get_auth_headers(token):
@@ -42,17 +310,20 @@ def get_auth_headers(token):
     }
 
 
-def get_sas_url_from_api():
-    """Obtenir une URL SAS fraîche via l'API Cegid Data Access."""
+def _fetch_sas_url():
+    """Demander une nouvelle URL SAS à l'API Cegid Data Access."""
     token = get_cegid_token()
     headers = get_auth_headers(token)
     url = f"{cegid_api_base_url}/storage/api/V1/storages/GetSASTokenLRD"
-    response = requests.get(url, headers=headers)
+    response = cegid_http.get(url, headers=headers, endpoint="storages/GetSASTokenLRD")
     if response.status_code != 200:
-        print(f"ERREUR: Impossible d'obtenir le SAS token (HTTP {response.status_code})")
-        print(f"Réponse : {response.text}")
-        sys.exit(1)
+        raise CegidApiError("Impossible d'obtenir le SAS token", response.status_code, response.text)
     data = response.json()
     container_url = f"{data['blobServiceUri']}{data['containerName']}{data['sasToken']}"
-    print(f"SAS URL générée automatiquement via l'API Cegid (valide ~1h)")
-    return container_url
+    _logger.info("SAS URL générée automatiquement via l'API Cegid (valide ~1h)")
+    return container_url, _sas_expiration(data["sasToken"]) or time.time() + VALIDITE_PAR_DEFAUT
+
+
+def get_sas_url_from_api(force_refresh=False):
+    """Obtenir une URL SAS via l'API Cegid Data Access (mise en cache jusqu'à son expiration)."""
+    return _cached("sas_url", _fetch_sas_url, force_refresh)
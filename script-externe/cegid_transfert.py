@@ -0,0 +1,211 @@
+"""
+Transfert des fichiers du conteneur Azure Cegid vers le dossier local.
+
+Module importable : utilisé par le script transfert-azure-cegid.py et directement par Odoo
+(is.cegid.import._transfert_azure_cegid), sans lancer de processus séparé.
+Le SDK Azure n'est importé qu'au premier transfert ; le jeton d'accès et l'URL SAS sont ceux
+du cache partagé de cegid_common.
+
+Chaque blob est téléchargé par morceaux dans un fichier temporaire (.part), vérifié (taille, MD5),
+synchronisé sur disque, renommé, puis seulement supprimé du conteneur. Un manifeste local
+permet de reprendre une exécution interrompue.
+"""
+
+import os
+import json
+import time
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import config
+from config import mode, dossier_de_destintion
+
+# Nombre de téléchargements simultanés (paramètre optionnel de config.py)
+telechargements_simultanes = getattr(config, "telechargements_simultanes", 4)
+# Manifeste des transferts (paramètre optionnel, par défaut dans le dossier de destination)
+fichier_manifeste = getattr(config, "fichier_manifeste", "")
+
+
+def get_container_url():
+    """URL SAS du conteneur Azure selon le mode configuré (API Cegid ou URL statique)."""
+    if mode == "api":
+        from cegid_common import get_sas_url_from_api
+        return get_sas_url_from_api()
+    if mode == "sas_url":
+        return config.sas_url
+    raise ValueError(f"Mode '{mode}' non reconnu. Utilisez 'api' ou 'sas_url'.")
+
+
+def get_container_client(container_url=None):
+    """Client du conteneur Azure (import du SDK Azure à la demande)."""
+    from azure.storage.blob import ContainerClient
+    return ContainerClient.from_container_url(container_url or get_container_url())
+
+
+def blob_md5(blob):
+    """MD5 (hexadécimal) annoncé par Azure pour un blob, ou None s'il n'est pas renseigné."""
+    content_settings = getattr(blob, "content_settings", None)
+    content_md5 = content_settings.content_md5 if content_settings else None
+    return bytes(content_md5).hex() if content_md5 else None
+
+
+def format_size(size):
+    """Taille lisible (B, KB, MB)."""
+    if size < 1024:
+        return f"{size} B"
+    if size < 1024 * 1024:
+        return f"{size / 1024:.2f} KB"
+    return f"{size / (1024 * 1024):.2f} MB"
+
+
+class AzureTransfer:
+    """
+    Transfert des blobs d'un conteneur Azure vers un dossier local, avec manifeste de reprise.
+    """
+
+    def __init__(self, container_client, destination=None, manifest_path=None):
+        self.container_client = container_client
+        self.destination = destination or dossier_de_destintion
+        self.manifest_path = manifest_path or fichier_manifeste or os.path.join(
+            self.destination, ".transfert-azure-cegid.json")
+        self.manifest_lock = threading.Lock()
+        self.manifest = {}
+
+    def load_manifest(self):
+        """Charger le manifeste local des transferts (nom du blob => etag, taille, md5, état)."""
+        if not os.path.exists(self.manifest_path):
+            return {}
+        try:
+            with open(self.manifest_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (ValueError, OSError) as e:
+            print(f"ATTENTION: manifeste illisible ({e}), il sera recréé")
+            return {}
+
+    def save_manifest_entry(self, blob_name, **values):
+        """Mettre à jour une entrée du manifeste et l'écrire de façon atomique (fichier temporaire + renommage)."""
+        with self.manifest_lock:
+            self.manifest.setdefault(blob_name, {}).update(values)
+            temp_path = self.manifest_path + ".tmp"
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump(self.manifest, f, indent=2, sort_keys=True)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_path, self.manifest_path)
+
+    def download_blob(self, blob):
+        """
+        Télécharger un blob par morceaux dans un fichier temporaire (.part), vérifier son MD5, le synchroniser
+        sur disque, le renommer en fichier définitif, puis seulement le supprimer du conteneur Azure.
+        - un .part laissé par une exécution interrompue est repris là où il s'est arrêté (même etag)
+        - un blob déjà téléchargé et vérifié (même etag) n'est pas retéléchargé, il est seulement supprimé
+        La mémoire utilisée est limitée à la taille d'un morceau, quelle que soit la taille du fichier.
+        Retourne un tuple (action effectuée : 'téléchargé', 'repris' ou 'déjà téléchargé', chemin local)
+        """
+        # Extraire uniquement le nom du fichier (sans les sous-dossiers)
+        filename = os.path.basename(blob.name)
+        destination_path = os.path.join(self.destination, filename)
+        temp_path = destination_path + ".part"
+        expected_md5 = blob_md5(blob)
+        entry = self.manifest.get(blob.name, {})
+        blob_client = self.container_client.get_blob_client(blob.name)
+
+        if entry.get("etag") == blob.etag and entry.get("state") == "done":
+            action = "déjà téléchargé"
+        else:
+            # Reprise d'un téléchargement interrompu uniquement si le blob n'a pas changé depuis
+            offset = 0
+            if entry.get("etag") == blob.etag and os.path.exists(temp_path):
+                offset = os.path.getsize(temp_path)
+                if offset > blob.size:
+                    offset = 0
+            self.save_manifest_entry(blob.name, etag=blob.etag, size=blob.size, md5=expected_md5,
+                                     state="downloading", local_path=destination_path)
+
+            md5 = hashlib.md5()
+            with open(temp_path, "r+b" if offset else "wb") as file:
+                if offset:
+                    # Reprendre le calcul du MD5 sur la partie déjà téléchargée
+                    file.truncate(offset)
+                    for chunk in iter(lambda: file.read(1024 * 1024), b""):
+                        md5.update(chunk)
+                if offset < blob.size:
+                    download_stream = blob_client.download_blob(offset=offset)
+                    for chunk in download_stream.chunks():
+                        file.write(chunk)
+                        md5.update(chunk)
+                file.flush()
+                os.fsync(file.fileno())
+
+            size = os.path.getsize(temp_path)
+            if size != blob.size or (expected_md5 and md5.hexdigest() != expected_md5):
+                os.remove(temp_path)
+                self.save_manifest_entry(blob.name, state="corrupted")
+                raise ValueError(f"fichier local invalide (taille {size}/{blob.size}, md5 {md5.hexdigest()}/{expected_md5})")
+
+            os.replace(temp_path, destination_path)
+            # Rendre le renommage durable avant de supprimer l'original
+            dir_fd = os.open(self.destination, os.O_RDONLY)
+            try:
+                os.fsync(dir_fd)
+            finally:
+                os.close(dir_fd)
+            self.save_manifest_entry(blob.name, state="done", md5=md5.hexdigest())
+            action = "repris" if offset else "téléchargé"
+
+        # Supprimer le fichier d'origine sur Azure
+        blob_client.delete_blob()
+        self.save_manifest_entry(blob.name, state="deleted")
+        return action, destination_path
+
+    def run(self, blobs=None, workers=None, on_result=None):
+        """
+        Télécharger les blobs (par défaut, tout le conteneur) en parallèle.
+        on_result : fonction optionnelle appelée avec le résultat de chaque blob dès qu'il est traité.
+        Retourne la liste des résultats, un dict par blob :
+        {'name', 'path', 'size', 'action', 'success', 'error', 'duration'}
+        """
+        if blobs is None:
+            blobs = list(self.container_client.list_blobs())
+        workers = max(int(workers or telechargements_simultanes), 1)
+
+        # Créer le dossier de destination s'il n'existe pas
+        os.makedirs(self.destination, exist_ok=True)
+
+        self.manifest = self.load_manifest()
+        # Oublier les blobs supprimés d'Azure lors d'une exécution précédente
+        blob_names = {blob.name for blob in blobs}
+        for name in [name for name, entry in self.manifest.items()
+                     if entry.get("state") == "deleted" and name not in blob_names]:
+            del self.manifest[name]
+
+        def transfer(blob):
+            start = time.time()
+            result = {"name": blob.name, "path": None, "size": blob.size, "action": None,
+                      "success": False, "error": None}
+            try:
+                result["action"], result["path"] = self.download_blob(blob)
+                result["success"] = True
+            except Exception as e:
+                result["error"] = str(e)
+            result["duration"] = time.time() - start
+            return result
+
+        results = []
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(transfer, blob) for blob in blobs]
+            for future in as_completed(futures):
+                result = future.result()
+                results.append(result)
+                if on_result:
+                    on_result(result)
+        return results
+
+
+def transfer_all(destination=None, workers=None, container_url=None, on_result=None):
+    """
+    Transférer tout le conteneur Azure vers le dossier de destination.
+    Retourne la liste des résultats par blob (voir AzureTransfer.run).
+    """
+    transfer = AzureTransfer(get_container_client(container_url), destination)
+    return transfer.run(workers=workers, on_result=on_result)
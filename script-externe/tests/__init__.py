@@ -0,0 +1,35 @@
+"""
+Tests des scripts externes, sans Azure ni API Cegid (conteneur et serveur HTTP simulés).
+
+Lancement depuis le dossier script-externe :
+
+    python -m unittest discover -s tests -t .
+
+Un module config factice remplace config.py : les tests n'utilisent aucun identifiant réel.
+"""
+
+import os
+import sys
+import types
+import tempfile
+
+SCRIPT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if SCRIPT_DIR not in sys.path:
+    sys.path.insert(0, SCRIPT_DIR)
+
+config = types.ModuleType("config")
+config.mode = "api"
+config.cegid_api_base_url = "http://127.0.0.1:9"
+config.cegid_tenant_id = "tenant-test"
+config.cegid_api_key_id = "key-id"
+config.cegid_api_key_secret = "key-secret"
+config.cegid_subscription_key = "subscription"
+config.cegid_provider_id = ""
+config.cegid_force_time = ""
+config.http_timeout = (2, 5)
+config.http_retries = 2
+config.fichier_cache_jetons = ""
+config.fichier_cache_decouverte = os.path.join(tempfile.gettempdir(), "cegid-test-decouverte.json")
+config.dossier_de_destintion = tempfile.gettempdir()
+config.sas_url = ""
+sys.modules["config"] = config
@@ -0,0 +1,150 @@
+"""
+Découverte du provider ID (cegid-requetes.py --discover) contre un serveur HTTP local simulant
+des points d'accès lents, en erreur ou valides.
+"""
+
+import io
+import os
+import json
+import time
+import tempfile
+import threading
+import importlib
+import unittest
+from contextlib import redirect_stdout
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from tests import config
+
+requetes = importlib.import_module("cegid-requetes")
+
+PREFIXES = {
+    "/datasource/api/V2/datasources/tenant/": 1,
+    "/datasource/api/V1/foldersCollections/tenant/": 2,
+    "/query/api/V1/schedulers/tenant/provider/": 3,
+}
+
+
+class FakeCegidHandler(BaseHTTPRequestHandler):
+    """
+    Réponse selon server.behaviors[(méthode, provider ID)] : 'ok', 'slow' (ok après server.slow secondes),
+    'error' (HTTP 500), 'hang' (aucune réponse avant server.hang secondes) ; HTTP 404 par défaut
+    """
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        for prefix, method in PREFIXES.items():
+            if self.path.startswith(prefix):
+                pid = self.path[len(prefix):]
+                break
+        else:
+            return self.reply(404, {"errorMessage": "inconnu"})
+        with self.server.lock:
+            self.server.calls.append((method, pid))
+        behavior = self.server.behaviors.get((method, pid), "404")
+        if behavior == "slow":
+            time.sleep(self.server.slow)
+        elif behavior == "hang":
+            time.sleep(self.server.hang)
+        if behavior == "error":
+            return self.reply(500, {"errorMessage": "erreur serveur"})
+        if behavior == "404":
+            return self.reply(404, {"errorMessage": "provider inconnu"})
+        if method == 1:
+            return self.reply(200, {"data": [{"name": f"Source {pid}", "providerId": pid}]})
+        return self.reply(200, [{"name": f"Élément {pid}", "providerId": pid}])
+
+    def reply(self, status, data):
+        body = json.dumps(data).encode("utf-8")
+        try:
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+
+class FakeCegidServer(ThreadingHTTPServer):
+    # Tous les tests de la découverte se connectent en même temps
+    request_queue_size = 64
+    daemon_threads = True
+
+
+class TestDiscoverProviderId(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = FakeCegidServer(("127.0.0.1", 0), FakeCegidHandler)
+        cls.server.lock = threading.Lock()
+        cls.thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.thread.start()
+        cls.base_url = f"http://127.0.0.1:{cls.server.server_address[1]}"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        self.server.behaviors = {}
+        self.server.calls = []
+        self.server.slow = 0.5
+        self.server.hang = 5
+        self.cache_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.cache_dir.cleanup)
+        self.patch(requetes, "cegid_api_base_url", self.base_url)
+        self.patch(requetes, "fichier_cache_decouverte", os.path.join(self.cache_dir.name, "decouverte.json"))
+
+    def patch(self, obj, name, value):
+        old = getattr(obj, name)
+        setattr(obj, name, value)
+        self.addCleanup(setattr, obj, name, old)
+
+    def discover(self, **kwargs):
+        kwargs.setdefault("refresh", True)
+        with redirect_stdout(io.StringIO()):
+            return requetes.discover_provider_id("jeton", **kwargs)
+
+    def test_priority_wins_over_speed(self):
+        # Le tenant (premier ID testé) répond lentement, un ID moins prioritaire répond tout de suite
+        self.server.behaviors = {(1, config.cegid_tenant_id): "slow", (1, "xrp"): "ok"}
+        self.assertEqual(self.discover(deadline=5), config.cegid_tenant_id)
+
+    def test_stops_when_priority_probes_have_failed(self):
+        self.server.behaviors = {(1, "xrp"): "ok", (3, "paie"): "hang"}
+        start = time.monotonic()
+        self.assertEqual(self.discover(deadline=10), "xrp")
+        self.assertLess(time.monotonic() - start, 2)
+
+    def test_deadline_enforced_on_slow_endpoints(self):
+        self.server.behaviors = {(method, pid): "hang" for method in PREFIXES.values()
+                                 for pid in (config.cegid_tenant_id, "cegid-xrp", "xrp")}
+        start = time.monotonic()
+        self.assertIsNone(self.discover(deadline=1))
+        self.assertLess(time.monotonic() - start, 2)
+
+    def test_best_finished_probe_kept_at_deadline(self):
+        self.server.behaviors = {(1, config.cegid_tenant_id): "hang", (2, "paie"): "ok"}
+        self.assertEqual(self.discover(deadline=1), "paie")
+
+    def test_failing_endpoints_are_not_retried(self):
+        self.server.behaviors = {(method, pid): "error" for method in PREFIXES.values()
+                                 for pid in ("xrp", "paie")}
+        self.assertIsNone(self.discover(deadline=5))
+        for probe in self.server.behaviors:
+            self.assertEqual(self.server.calls.count(probe), 1, probe)
+
+    def test_cache_skips_discovery(self):
+        self.server.behaviors = {(2, "cegid-hr"): "ok"}
+        self.assertEqual(self.discover(deadline=5), "cegid-hr")
+        self.server.calls = []
+        self.assertEqual(self.discover(refresh=False), "cegid-hr")
+        self.assertEqual(self.server.calls, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,56 @@
+"""
+Analyse des requêtes Cegid Data Access (cegid-definitions.py) : requêtes composées et noms de champs réservés.
+"""
+
+import io
+import unittest
+import importlib
+from contextlib import redirect_stdout
+
+from tests import config  # noqa: F401 (config factice)
+
+definitions = importlib.import_module("cegid-definitions")
+
+
+class TestDefinitions(unittest.TestCase):
+
+    def test_simple_query(self):
+        definition = definitions.build_definition(
+            "CEGID_ECRITURE", "SELECT E_JOURNAL, CAST(E_DEBIT AS decimal(12,2)) AS E_DEBIT, E_DATECOMPTABLE FROM ECRITURE")
+        self.assertEqual(definition['model'], "is.cegid.ecriture")
+        self.assertEqual([(f['name'], f['type']) for f in definition['fields']],
+                         [('e_journal', 'char'), ('e_debit', 'float'), ('e_datecomptable', 'datetime')])
+        self.assertEqual(definition['mapping']['period_field'], 'e_datecomptable')
+
+    def test_compound_query_rejected(self):
+        for sql in ("SELECT E_JOURNAL FROM ECRITURE UNION SELECT E_JOURNAL FROM ECRITURE_ARCHIVE",
+                    "SELECT E_JOURNAL FROM ECRITURE union all SELECT Y_JOURNAL FROM ANALYTIQ",
+                    "SELECT E_GENERAL FROM ECRITURE EXCEPT SELECT G_GENERAL FROM GENERAUX"):
+            with self.assertRaisesRegex(ValueError, "composée"):
+                definitions.build_definition("CEGID_TEST", sql)
+
+    def test_union_in_string_or_subquery_ignored(self):
+        table, colonnes = definitions.parse_query(
+            "SELECT E_LIBELLE, (SELECT MAX(X) FROM (SELECT 1 AS X UNION SELECT 2) T) AS E_MAX "
+            "FROM ECRITURE WHERE E_LIBELLE <> 'UNION'")
+        self.assertEqual(table, "ECRITURE")
+        self.assertEqual([nom for nom, type_sql in colonnes], ["E_LIBELLE", "E_MAX"])
+
+    def test_reserved_names_prefixed(self):
+        with redirect_stdout(io.StringIO()) as output:
+            definition = definitions.build_definition(
+                "CEGID_TEST", "SELECT E_NUMERO AS ID, E_DATECREATION AS CREATE_DATE, E_LIBELLE AS DISPLAY_NAME, "
+                              "E_CLASSE AS CLASS, E_GENERAL FROM ECRITURE")
+        self.assertEqual([f['name'] for f in definition['fields']],
+                         ['cegid_id', 'cegid_create_date', 'cegid_display_name', 'cegid_class', 'e_general'])
+        self.assertEqual(definition['mapping']['fields']['ID'], 'cegid_id')
+        self.assertIn("ATTENTION", output.getvalue())
+
+    def test_reserved_name_collision_rejected(self):
+        with redirect_stdout(io.StringIO()):
+            with self.assertRaisesRegex(ValueError, "cegid_id"):
+                definitions.build_definition("CEGID_TEST", "SELECT E_NUMERO AS ID, E_AUTRE AS CEGID_ID FROM ECRITURE")
+
+
+if __name__ == "__main__":
+    unittest.main()
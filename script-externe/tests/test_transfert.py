@@ -0,0 +1,155 @@
+"""
+Transferts Azure -> dossier local (cegid_transfert.AzureTransfer) sur un conteneur simulé en mémoire :
+téléchargement vérifié, reprise après interruption, fichier corrompu, blob déjà téléchargé.
+"""
+
+import os
+import json
+import shutil
+import hashlib
+import tempfile
+import unittest
+from types import SimpleNamespace
+
+from tests import config  # noqa: F401 (config factice)
+from cegid_transfert import AzureTransfer
+
+CHUNK_SIZE = 1000
+
+
+class FakeDownload:
+    def __init__(self, blob, offset, fail_after):
+        self.blob = blob
+        self.offset = offset
+        self.fail_after = fail_after
+
+    def chunks(self):
+        sent = 0
+        for start in range(self.offset, len(self.blob.data), CHUNK_SIZE):
+            if self.fail_after is not None and sent >= self.fail_after:
+                raise ConnectionError("connexion interrompue")
+            chunk = self.blob.data[start:start + CHUNK_SIZE]
+            sent += len(chunk)
+            yield chunk
+
+
+class FakeBlob:
+    def __init__(self, name, data, etag="etag-1", md5=None):
+        self.name = name
+        self.data = data
+        self.size = len(data)
+        self.etag = etag
+        content_md5 = bytearray(hashlib.md5(data).digest()) if md5 is None else md5
+        self.content_settings = SimpleNamespace(content_md5=content_md5)
+
+
+class FakeBlobClient:
+    def __init__(self, container, name):
+        self.container = container
+        self.name = name
+
+    def download_blob(self, offset=0):
+        self.container.offsets.append((self.name, offset))
+        return FakeDownload(self.container.blobs[self.name], offset, self.container.fail_after.pop(self.name, None))
+
+    def delete_blob(self):
+        if self.name in self.container.delete_errors:
+            raise ConnectionError("suppression refusée")
+        del self.container.blobs[self.name]
+
+
+class FakeContainer:
+    """Conteneur Azure en mémoire : blobs, téléchargements par plage, coupures et erreurs simulées"""
+
+    def __init__(self, *blobs):
+        self.blobs = {blob.name: blob for blob in blobs}
+        self.offsets = []          # (nom, offset) de chaque téléchargement
+        self.fail_after = {}       # nom => coupure après ce nombre d'octets
+        self.delete_errors = set()
+
+    def list_blobs(self):
+        return list(self.blobs.values())
+
+    def get_blob_client(self, name):
+        return FakeBlobClient(self, name)
+
+
+class TestAzureTransfer(unittest.TestCase):
+
+    def setUp(self):
+        self.destination = tempfile.mkdtemp(prefix="cegid-transfert-")
+        self.addCleanup(shutil.rmtree, self.destination, ignore_errors=True)
+        self.data = os.urandom(10 * CHUNK_SIZE + 123)
+
+    def run_transfer(self, container):
+        return AzureTransfer(container, destination=self.destination).run(workers=2)
+
+    def manifest(self):
+        with open(os.path.join(self.destination, ".transfert-azure-cegid.json"), encoding="utf-8") as f:
+            return json.load(f)
+
+    def test_download_verified_then_deleted(self):
+        container = FakeContainer(FakeBlob("export/ECRITURE.csv", self.data))
+        [result] = self.run_transfer(container)
+        self.assertTrue(result["success"], result["error"])
+        self.assertEqual(result["action"], "téléchargé")
+        with open(os.path.join(self.destination, "ECRITURE.csv"), "rb") as f:
+            self.assertEqual(f.read(), self.data)
+        self.assertEqual(container.blobs, {})
+        self.assertEqual(self.manifest()["export/ECRITURE.csv"]["state"], "deleted")
+
+    def test_resume_after_interruption(self):
+        container = FakeContainer(FakeBlob("ECRITURE.csv", self.data))
+        container.fail_after["ECRITURE.csv"] = 4 * CHUNK_SIZE
+        [result] = self.run_transfer(container)
+        self.assertFalse(result["success"])
+        self.assertIn("ECRITURE.csv", container.blobs)
+        part_size = os.path.getsize(os.path.join(self.destination, "ECRITURE.csv.part"))
+        self.assertEqual(part_size, 4 * CHUNK_SIZE)
+
+        [result] = self.run_transfer(container)
+        self.assertTrue(result["success"], result["error"])
+        self.assertEqual(result["action"], "repris")
+        self.assertEqual(container.offsets[-1], ("ECRITURE.csv", part_size))
+        with open(os.path.join(self.destination, "ECRITURE.csv"), "rb") as f:
+            self.assertEqual(f.read(), self.data)
+        self.assertEqual(container.blobs, {})
+
+    def test_changed_blob_is_not_resumed(self):
+        container = FakeContainer(FakeBlob("ECRITURE.csv", self.data))
+        container.fail_after["ECRITURE.csv"] = 4 * CHUNK_SIZE
+        self.run_transfer(container)
+        container.blobs["ECRITURE.csv"] = FakeBlob("ECRITURE.csv", self.data[::-1], etag="etag-2")
+        [result] = self.run_transfer(container)
+        self.assertTrue(result["success"], result["error"])
+        self.assertEqual(result["action"], "téléchargé")
+        self.assertEqual(container.offsets[-1], ("ECRITURE.csv", 0))
+
+    def test_corrupted_download_keeps_blob(self):
+        container = FakeContainer(FakeBlob("ECRITURE.csv", self.data, md5=bytearray(16)))
+        [result] = self.run_transfer(container)
+        self.assertFalse(result["success"])
+        self.assertIn("md5", result["error"])
+        self.assertIn("ECRITURE.csv", container.blobs)
+        self.assertFalse(os.path.exists(os.path.join(self.destination, "ECRITURE.csv")))
+        self.assertFalse(os.path.exists(os.path.join(self.destination, "ECRITURE.csv.part")))
+        self.assertEqual(self.manifest()["ECRITURE.csv"]["state"], "corrupted")
+
+    def test_downloaded_blob_is_only_deleted_on_rerun(self):
+        container = FakeContainer(FakeBlob("ECRITURE.csv", self.data))
+        container.delete_errors.add("ECRITURE.csv")
+        [result] = self.run_transfer(container)
+        self.assertFalse(result["success"])
+        self.assertEqual(self.manifest()["ECRITURE.csv"]["state"], "done")
+
+        container.delete_errors.clear()
+        downloads = len(container.offsets)
+        [result] = self.run_transfer(container)
+        self.assertTrue(result["success"], result["error"])
+        self.assertEqual(result["action"], "déjà téléchargé")
+        self.assertEqual(len(container.offsets), downloads)
+        self.assertEqual(container.blobs, {})
+
+
+if __name__ == "__main__":
+    unittest.main()
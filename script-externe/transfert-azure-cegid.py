@@ -1,8 +1,13 @@
-import os
 import sys
-from azure.storage.blob import ContainerClient
-from config import mode, sas_url, dossier_de_destintion
-from cegid_common import get_sas_url_from_api
+from cegid_common import CegidApiError
+from cegid_transfert import (
+    mode,
+    dossier_de_destintion,
+    telechargements_simultanes,
+    AzureTransfer,
+    get_container_client,
+    format_size,
+)
 
 
 #** Mise en place de l'environnent python pour ce script **********************
@@ -13,76 +18,62 @@ from cegid_common import get_sas_url_from_api
 # pip install --upgrade pip
 # pip install azure-storage-blob requests
 # /opt/transfert-azure-cegid/venv/bin/python  /opt/addons/is_cegid2odoo/script-externe/transfert-azure-cegid.py
+# La logique de transfert est dans cegid_transfert.py (également appelé directement par Odoo)
 
 
-def get_container_client():
-    """Obtenir le client de conteneur Azure selon le mode configuré."""
+def print_result(result):
+    """Afficher le résultat du transfert d'un blob dès qu'il est traité."""
+    if result["success"]:
+        print(f"Téléchargement de {result['name']}... OK, {result['action']} (supprimé de Azure)")
+    else:
+        print(f"Téléchargement de {result['name']}... ERREUR : {result['error']}")
+
+
+def main():
+    # Créer un client pour le conteneur
     if mode == "api":
         print("Mode : API Cegid Data Access")
-        print("-" * 120)
-        container_url = get_sas_url_from_api()
     elif mode == "sas_url":
         print("Mode : SAS URL statique (dépannage)")
-        print("-" * 120)
-        container_url = sas_url
     else:
         print(f"ERREUR: Mode '{mode}' non reconnu. Utilisez 'api' ou 'sas_url'.")
         sys.exit(1)
-    return ContainerClient.from_container_url(container_url)
+    print("-" * 120)
+    container_client = get_container_client()
 
+    # Récupérer tous les fichiers
+    blobs = list(container_client.list_blobs())
 
-# Créer un client pour le conteneur
-container_client = get_container_client()
+    # Afficher l'en-tête
+    print(f"{'Nom du fichier':<80} {'Taille': >12} {'Date modification':<25}")
+    print("=" * 120)
 
-# Récupérer tous les fichiers
-blobs = list(container_client.list_blobs())
+    # Afficher chaque fichier sur une ligne
+    for blob in blobs:
+        date_str = blob.last_modified.strftime("%Y-%m-%d %H:%M:%S")
+        print(f"{blob.name:<80} {format_size(blob.size): >12} {date_str: <25}")
 
-# Afficher l'en-tête
-print(f"{'Nom du fichier':<80} {'Taille': >12} {'Date modification':<25}")
-print("=" * 120)
+    print("=" * 120)
+    print(f"Total : {len(blobs)} fichier(s)")
 
-# Afficher chaque fichier sur une ligne
-for blob in blobs:
-    # Formater la taille
-    if blob.size < 1024:
-        size_str = f"{blob.size} B"
-    elif blob.size < 1024*1024:
-        size_str = f"{blob.size/1024:.2f} KB"
-    else: 
-        size_str = f"{blob.size/(1024*1024):.2f} MB"
-    
-    # Formater la date
-    date_str = blob.last_modified.strftime("%Y-%m-%d %H:%M:%S")
-    
-    # Afficher la ligne
-    print(f"{blob.name:<80} {size_str: >12} {date_str: <25}")
+    # Télécharger les fichiers en parallèle
+    print(f"\nTéléchargement des fichiers ({telechargements_simultanes} simultanés)...")
+    print("-" * 120)
 
-print("=" * 120)
-print(f"Total : {len(blobs)} fichier(s)")
+    results = AzureTransfer(container_client).run(blobs, on_result=print_result)
+    nb_ok = sum(1 for result in results if result["success"])
+    nb_erreurs = len(results) - nb_ok
 
-# Créer le dossier de destination s'il n'existe pas
-os.makedirs(dossier_de_destintion, exist_ok=True)
-
-# Télécharger chaque fichier
-print("\nTéléchargement des fichiers...")
-print("-" * 120)
+    print("-" * 120)
+    print(f"Téléchargement terminé ! {nb_ok} fichier(s) téléchargé(s) dans {dossier_de_destintion}")
+    if nb_erreurs:
+        print(f"{nb_erreurs} fichier(s) en erreur, conservé(s) sur Azure pour le prochain transfert")
+        sys.exit(1)
 
-for blob in blobs:
-    # Extraire uniquement le nom du fichier (sans les sous-dossiers)
-    filename = os.path.basename(blob.name)
-    destination_path = os.path.join(dossier_de_destintion, filename)
-    
-    # Télécharger le blob
-    print(f"Téléchargement de {blob.name}...", end=" ")
-    blob_client = container_client.get_blob_client(blob.name)
-    
-    with open(destination_path, "wb") as file:
-        download_stream = blob_client.download_blob()
-        file.write(download_stream.readall())
-    
-    # Supprimer le fichier d'origine sur Azure
-    blob_client.delete_blob()
-    print("OK (supprimé de Azure)")
 
-print("-" * 120)
-print(f"Téléchargement terminé ! {len(blobs)} fichier(s) téléchargé(s) dans {dossier_de_destintion}")
+if __name__ == "__main__":
+    try:
+        main()
+    except CegidApiError as e:
+        print(f"ERREUR: {e}")
+        sys.exit(1)
@@ -0,0 +1,184 @@
+# -*- coding: utf-8 -*-
+
+import os
+import csv
+import shutil
+import tempfile
+
+from odoo.exceptions import UserError
+from odoo.tests import TransactionCase, tagged
+
+from ..benchmark import generators
+from ..models.is_cegid_import import _reset_peak_memory, _peak_memory, _iter_csv_records
+
+# Import sous plafond mémoire : nombre de lignes et plafond (Mo) réglables par variables d'environnement,
+# par exemple CEGID_TEST_MEMORY_ROWS=5000000 pour l'extraction analytique complète
+MEMORY_ROWS = int(os.environ.get('CEGID_TEST_MEMORY_ROWS', 200000))
+MEMORY_CEILING = float(os.environ.get('CEGID_TEST_MEMORY_CEILING', 100))
+
+
+@tagged('post_install', '-at_install')
+class TestIsCegidImport(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.importer = cls.env['is.cegid.import']
+        cls.Histo = cls.env['is.cegid.histocumsal']
+        cls.tmp_dir = tempfile.mkdtemp(prefix='cegid-test-')
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.tmp_dir, ignore_errors=True)
+        super().tearDownClass()
+
+    def _write_csv(self, name, header, rows):
+        path = os.path.join(self.tmp_dir, name)
+        with open(path, 'w', encoding='utf-8', newline='') as f:
+            writer = csv.writer(f, delimiter=';')
+            writer.writerow(header)
+            writer.writerows(rows)
+        return path
+
+    def _set_mode(self, model, mode):
+        self.env['ir.config_parameter'].sudo().set_param(f'is_cegid2odoo.{model}.import_mode', mode)
+
+    def _histo_rows(self, count, montant=10.0):
+        return [[f"{i:08d}", f"{i % 7:02d}", f"{montant + i:.2f}"] for i in range(count)]
+
+    def test_import_full(self):
+        self._set_mode('is.cegid.histocumsal', 'full')
+        path = self._write_csv('histo_full.csv', ['PHC_SALARIE', 'PHC_CUMULPAIE', 'PHC_MONTANT'],
+                               self._histo_rows(50))
+        result = self.importer._import_csv_file(path)
+        self.assertTrue(result['success'], result['error'])
+        self.assertEqual(result['mode'], 'full')
+        self.assertEqual(result['records'], 50)
+        self.assertEqual(self.Histo.search_count([]), 50)
+        record = self.Histo.search([('phc_salarie', '=', '00000003')])
+        self.assertAlmostEqual(record.phc_montant, 13.0)
+        self.assertTrue(record.row_hash)
+
+    def test_blank_lines_skipped(self):
+        self._set_mode('is.cegid.histocumsal', 'full')
+        path = os.path.join(self.tmp_dir, 'histo_blank.csv')
+        with open(path, 'w', encoding='utf-8', newline='') as f:
+            f.write("PHC_SALARIE;PHC_CUMULPAIE;PHC_MONTANT\r\n"
+                    "00000001;01;10.00\r\n"
+                    "\r\n"
+                    "00000002;02;20.00\r\n"
+                    ";;\r\n"
+                    "\r\n")
+        column_plan = [(0, 'phc_salarie', 'char'), (1, 'phc_cumulpaie', 'char'), (2, 'phc_montant', 'float')]
+        records = list(_iter_csv_records(path, 'utf-8', ';', column_plan))
+        self.assertEqual([vals['phc_salarie'] for vals in records], ['00000001', '00000002'])
+
+        result = self.importer._import_csv_file(path)
+        self.assertTrue(result['success'], result['error'])
+        self.assertEqual(result['records'], 2)
+        self.assertEqual(self.Histo.search_count([]), 2)
+
+    def test_import_delta(self):
+        self._set_mode('is.cegid.histocumsal', 'delta')
+        header = ['PHC_SALARIE', 'PHC_CUMULPAIE', 'PHC_MONTANT']
+        rows = self._histo_rows(20)
+        result = self.importer._import_csv_file(self._write_csv('histo_delta_1.csv', header, rows))
+        self.assertEqual((result['mode'], result['inserted']), ('delta', 20))
+
+        # Fichier identique : aucune écriture
+        result = self.importer._import_csv_file(self._write_csv('histo_delta_2.csv', header, rows))
+        self.assertEqual((result['inserted'], result['updated'], result['deleted'], result['unchanged']),
+                         (0, 0, 0, 20))
+
+        # Une ligne modifiée, une supprimée, une ajoutée
+        rows = [list(row) for row in rows[1:]]
+        rows[0][2] = '999.00'
+        rows.append(['00000099', '01', '1.00'])
+        result = self.importer._import_csv_file(self._write_csv('histo_delta_3.csv', header, rows))
+        self.assertEqual((result['inserted'], result['updated'], result['deleted'], result['unchanged']),
+                         (1, 1, 1, 18))
+        self.assertEqual(self.Histo.search_count([]), 20)
+        self.assertAlmostEqual(self.Histo.search([('phc_salarie', '=', '00000001')]).phc_montant, 999.0)
+
+    def test_delta_hash_independent_of_column_order(self):
+        self._set_mode('is.cegid.histocumsal', 'delta')
+        rows = self._histo_rows(10)
+        self.importer._import_csv_file(self._write_csv(
+            'histo_order_1.csv', ['PHC_SALARIE', 'PHC_CUMULPAIE', 'PHC_MONTANT'], rows))
+        result = self.importer._import_csv_file(self._write_csv(
+            'histo_order_2.csv', ['PHC_MONTANT', 'PHC_SALARIE', 'PHC_CUMULPAIE'],
+            [[montant, salarie, cumul] for salarie, cumul, montant in rows]))
+        self.assertEqual(result['unchanged'], 10)
+        self.assertEqual(result['updated'], 0)
+
+    def test_delta_rejects_incomplete_key(self):
+        self._set_mode('is.cegid.histocumsal', 'delta')
+        header = ['PHC_SALARIE', 'PHC_CUMULPAIE', 'PHC_MONTANT']
+        self.importer._import_csv_file(self._write_csv('histo_key_1.csv', header, self._histo_rows(5)))
+        rows = self._histo_rows(5) + [['00000042', '', '5.00']]
+        with self.assertRaises(UserError):
+            self.importer._import_csv_file(self._write_csv('histo_key_2.csv', header, rows))
+        self.assertEqual(self.Histo.search_count([]), 5)
+
+    def test_delta_duplicate_keys_fall_back_to_full(self):
+        model = 'is.cegid.absencesalarie'
+        self._set_mode(model, 'delta')
+        mapping_info = self.importer._get_cegid_table(model)
+        path = os.path.join(self.tmp_dir, 'absences.csv')
+        generators.write_extract(path, mapping_info, self.env[model], 10)
+        with open(path, encoding='utf-8-sig') as f:
+            lines = f.readlines()
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write(lines[-1])
+        result = self.importer._import_csv_file(path)
+        self.assertTrue(result['success'], result['error'])
+        self.assertEqual(result['mode'], 'full')
+        self.assertEqual(self.env[model].search_count([]), 11)
+
+    def test_range_replaces_exact_file_range(self):
+        model = 'is.cegid.ecriture'
+        self._set_mode(model, 'range')
+        Ecriture = self.env[model]
+        header = ['E_DATECOMPTABLE', 'E_JOURNAL', 'E_REFINTERNE', 'E_LIBELLE', 'E_GENERAL', 'E_DEBIT', 'E_CREDIT',
+                  'E_AUXILIAIRE', 'E_REFLIBRE']
+
+        def rows(*dates):
+            return [[day, 'OD', f"P{i}", 'Test', '401000', '10.00', '0.00', '', ''] for i, day in enumerate(dates)]
+
+        self.importer._import_csv_file(self._write_csv('ecriture_range_1.csv', header, rows(
+            '2024-01-05 00:00:00', '2024-01-25 00:00:00', '2024-02-10 00:00:00')))
+        self.assertEqual(Ecriture.search_count([]), 3)
+
+        # Extraction glissante à cheval sur deux mois : seules les dates du 20/01 au 05/02 sont remplacées
+        result = self.importer._import_csv_file(self._write_csv('ecriture_range_2.csv', header, rows(
+            '2024-01-20 00:00:00', '2024-02-05 00:00:00')))
+        self.assertTrue(result['success'], result['error'])
+        self.assertEqual((result['mode'], result['deleted'], result['inserted']), ('range', 1, 2))
+        self.assertEqual(sorted(str(day) for day in Ecriture.search([]).mapped('e_datecomptable')),
+                         ['2024-01-05 00:00:00', '2024-01-20 00:00:00', '2024-02-05 00:00:00',
+                          '2024-02-10 00:00:00'])
+
+        # Mois entiers sur demande : les lignes des mois du fichier absentes du fichier sont supprimées
+        self.env['ir.config_parameter'].sudo().set_param(f'is_cegid2odoo.{model}.range_period', 'month')
+        result = self.importer._import_csv_file(self._write_csv('ecriture_range_3.csv', header, rows(
+            '2024-01-20 00:00:00')))
+        self.assertEqual(result['deleted'], 2)
+        self.assertEqual(Ecriture.search_count([]), 3)
+
+    def test_import_memory_ceiling(self):
+        """
+        Import en flux : le pic de mémoire ne dépend pas de la taille du fichier
+        """
+        if not _reset_peak_memory():
+            self.skipTest("Remise à zéro du pic de mémoire impossible (/proc/self/clear_refs)")
+        model = 'is.cegid.analytiq'
+        path = os.path.join(self.tmp_dir, 'analytiq_memory.csv')
+        generators.write_extract(path, self.importer._get_cegid_table(model), self.env[model], MEMORY_ROWS)
+        _reset_peak_memory()
+        baseline = _peak_memory()
+        result = self.importer._import_csv_file(path)
+        growth = _peak_memory() - baseline
+        self.assertTrue(result['success'], result['error'])
+        self.assertEqual(result['records'], MEMORY_ROWS)
+        self.assertLess(growth, MEMORY_CEILING,
+                        f"Import de {MEMORY_ROWS} lignes : +{growth:.0f} Mo (plafond {MEMORY_CEILING:.0f} Mo)")